@@ -9,15 +9,47 @@ Backend Flask para el contador de tickets
 import json
 import os
 import sys
+import atexit
 import hashlib
 import secrets
+import threading
+import time
 from datetime import datetime
-from flask import Flask, jsonify, request, send_from_directory
+from flask import Flask, Response, g, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-import requests
 from pathlib import Path
+from session_store import SessionStore
+from storage import COUNTER_KEYS, empty_month
+from write_buffer import WriteBuffer
+from jira_config import JiraConfig
+from data_version import InvalidUserId, check_user_id
+from month_cache import MonthCache
+from profiling import RequestProfiler
+from retention import HistoryRetention
+from static_assets import StaticAssets
+from timeseries import GRANULARITIES, MonthSeriesCache, build_series
+from services import (DATA_DIR, JIRA_NOT_CONFIGURED, USERS_DIR, data_versions, jira_configs, jira_http,
+                      jira_scheduler, load_jira_config, metrics, storage)
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialización de las respuestas JSON con orjson"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__, static_folder='.')
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
 
 # Registrar health check INMEDIATAMENTE después de crear la app
@@ -49,46 +81,142 @@ logger.info("Health check disponible en: /health")
 logger.info("=" * 50)
 
 # Configuración
-DATA_DIR = Path('data')
-USERS_DIR = DATA_DIR / 'users'
 SESSIONS_FILE = DATA_DIR / 'sessions.json'
-JIRA_CONFIG_FILE = 'jira_config.json'
-
-# Crear directorios de datos si no existen
+SESSIONS_JOURNAL_FILE = DATA_DIR / 'sessions.journal'
+# Duración de las sesiones (días desde created_at); 0 = sin expiración
+SESSION_TTL_DAYS = float(os.environ.get('SESSION_TTL_DAYS', '30'))
+# Cada cuántos segundos se revisa si hay que compactar el journal de sesiones
+SESSION_COMPACT_INTERVAL = int(os.environ.get('SESSION_COMPACT_INTERVAL', '300'))
+# Máximo de entradas de historial por respuesta (0 = sin límite); el historial se guarda completo
+HISTORY_RESPONSE_LIMIT = int(os.environ.get('HISTORY_RESPONSE_LIMIT', '1000'))
+# Máximo de acciones por petición a /api/events/batch
+EVENT_BATCH_LIMIT = int(os.environ.get('EVENT_BATCH_LIMIT', '500'))
+# Retención del historial de meses cerrados: completo los últimos HISTORY_RAW_MONTHS meses,
+# resumido por hora los HISTORY_HOURLY_MONTHS siguientes y por día el resto (0 = conservar todo)
+HISTORY_RAW_MONTHS = int(os.environ.get('HISTORY_RAW_MONTHS', '3'))
+HISTORY_HOURLY_MONTHS = int(os.environ.get('HISTORY_HOURLY_MONTHS', '9'))
+# Memoria máxima (bytes estimados) de la caché de meses parseados de cada worker; 0 = sin caché
+MONTH_CACHE_MAX_BYTES = int(os.environ.get('MONTH_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+# Intervalo (segundos) para agrupar los guardados de un mismo usuario+mes; 0 = escritura directa
+WRITE_COALESCE_INTERVAL = float(os.environ.get('WRITE_COALESCE_INTERVAL', '0.25'))
+# Canal de eventos (SSE): cada conexión comprueba la versión de datos cada SSE_POLL_INTERVAL
+# segundos, envía un comentario cada SSE_HEARTBEAT y se cierra (el navegador reconecta)
+# tras SSE_MAX_SECONDS para no retener hilos indefinidamente
+SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', '1'))
+SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', '15'))
+SSE_MAX_SECONDS = int(os.environ.get('SSE_MAX_SECONDS', '300'))
+# Conexiones SSE simultáneas por worker: cada una ocupa un hilo de gthread, así que se deja
+# la mayoría para la API; las que sobran reciben 503 y el frontend consulta periódicamente
+SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', '6'))
+# Perfilado con cProfile (desactivado por defecto: sin hooks ni coste). Con PROFILE_ENABLED=1
+# se perfila una fracción PROFILE_SAMPLE_RATE de peticiones, las rutas de PROFILE_ROUTES, los
+# usuarios de PROFILE_USERS (listas separadas por comas) y las que envían X-Profile: 1 con
+# el token de administración. Se guardan los últimos PROFILE_MAX_FILES en data/profiles/
+PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', '0').lower() in ('1', 'true', 'yes')
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_ROUTES = [r.strip() for r in os.environ.get('PROFILE_ROUTES', '').split(',') if r.strip()]
+PROFILE_USERS = [u.strip() for u in os.environ.get('PROFILE_USERS', '').split(',') if u.strip()]
+PROFILE_FORMAT = os.environ.get('PROFILE_FORMAT', 'pstats').lower()
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '200'))
+PROFILES_DIR = DATA_DIR / 'profiles'
+# Token de los endpoints internos (/api/internal/stats, /metrics) y del perfilado forzado con
+# X-Profile; sin él, esos endpoints quedan cerrados
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+@app.before_request
+def _start_request_timer():
+    metrics.ensure_started()
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - start,
+                        route=route, method=request.method)
+        metrics.inc('http_requests_total', route=route, method=request.method, status=str(response.status_code))
+        if response.status_code >= 500:
+            metrics.inc('http_request_errors_total', route=route, method=request.method)
+    return response
+
+# Perfilado de peticiones: los hooks sólo se registran si está activado
+profiler = None
+if PROFILE_ENABLED:
+    profiler = RequestProfiler(
+        PROFILES_DIR,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        routes=PROFILE_ROUTES,
+        users=PROFILE_USERS,
+        fmt=PROFILE_FORMAT,
+        max_files=PROFILE_MAX_FILES
+    )
+
+    @app.before_request
+    def _start_profile():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        forced = request.headers.get('X-Profile') == '1' and internal_access_allowed()
+        user_id = get_current_user() if profiler.users else None
+        if profiler.wanted(route, user_id, forced):
+            g.profile = profiler.start()
+            g.profile_info = {'route': route, 'method': request.method, 'path': request.path,
+                              'user_id': user_id, 'forced': forced, 'start': time.perf_counter()}
+
+    def _stop_profile(status):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return None
+        info = g.pop('profile_info')
+        info['seconds'] = round(time.perf_counter() - info.pop('start'), 6)
+        info['status'] = status
+        info['timestamp'] = datetime.now().isoformat()
+        try:
+            return profiler.stop(profile, info)
+        except Exception as e:
+            logger.error(f"Error guardando el perfil: {e}")
+            return None
+
+    @app.after_request
+    def _finish_profile(response):
+        profile_id = _stop_profile(response.status_code)
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _abort_profile(error=None):
+        # Petición terminada sin pasar por after_request: no dejar el perfil activo
+        _stop_profile(500)
+
+# Índice de sesiones en memoria (uno por worker, snapshot + journal en disco)
+session_store = SessionStore(
+    SESSIONS_FILE,
+    journal_path=SESSIONS_JOURNAL_FILE,
+    ttl_seconds=int(SESSION_TTL_DAYS * 86400),
+    compact_interval=SESSION_COMPACT_INTERVAL
+)
 try:
-    DATA_DIR.mkdir(exist_ok=True)
-    USERS_DIR.mkdir(exist_ok=True)
+    # Reproducir snapshot + journal al arrancar el worker
+    session_store.load_all()
 except Exception as e:
-    print(f"Advertencia: No se pudo crear directorio data: {e}")
+    logger.error(f"Error cargando sesiones: {e}")
 
 # Cargar sesiones
 def load_sessions():
     """Carga las sesiones activas"""
-    if SESSIONS_FILE.exists():
-        try:
-            with open(SESSIONS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
+    return session_store.load_all()
 
 def save_sessions(sessions):
-    """Guarda las sesiones activas"""
-    with open(SESSIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(sessions, f, indent=2)
+    """Reemplaza todas las sesiones (reescribe el snapshot y vacía el journal)"""
+    session_store.replace_all(sessions)
 
 def get_session_from_token(token):
     """Obtiene la sesión desde un token."""
-    if not token:
-        return None
-    sessions = load_sessions()
-    session = sessions.get(token)
-    if isinstance(session, dict):
-        return session
-    # Compatibilidad con formato antiguo: token -> user_id
-    if isinstance(session, str):
-        return {'user_id': session, 'email': ''}
-    return None
+    # El índice también resuelve el formato antiguo: token -> user_id
+    with metrics.timer('session_lookup_seconds') as labels:
+        session = session_store.get(token)
+        labels['outcome'] = 'hit' if session else 'miss'
+    return session
 
 def get_user_id_from_token(token):
     """Obtiene el user_id desde un token"""
@@ -114,47 +242,83 @@ def get_user_dir(user_id):
     user_dir.mkdir(exist_ok=True)
     return user_dir
 
+# Motor de almacenamiento, versiones de datos y Jira: en services.py (compartidos con los scripts)
+logger.info(f"Almacenamiento: {storage.name}")
+
+# Meses ya parseados en este worker; se invalidan cuando cambia la versión de datos del usuario
+month_cache = MonthCache(
+    storage,
+    data_versions.get,
+    MONTH_CACHE_MAX_BYTES,
+    on_event=lambda event, count: metrics.inc('month_cache_events_total', count, event=event)
+)
+
+# Buffer de escritura: agrupa los guardados rápidos en una sola escritura
+write_buffer = WriteBuffer(
+    storage,
+    WRITE_COALESCE_INTERVAL,
+    on_write=lambda user_id, month: data_versions.bump(user_id)
+)
+# Volcar lo pendiente al terminar el proceso (gunicorn.conf.py también lo hace en worker_exit)
+atexit.register(write_buffer.flush)
+
+# Agregados de series temporales por mes (memoriza los meses cerrados)
+month_series = MonthSeriesCache(storage)
+
+# Retención del historial: se aplica en el primer acceso de cada usuario en un mes nuevo
+history_retention = None
+if HISTORY_RAW_MONTHS > 0:
+    history_retention = HistoryRetention(
+        storage,
+        DATA_DIR / 'retention',
+        raw_months=HISTORY_RAW_MONTHS,
+        hourly_months=HISTORY_HOURLY_MONTHS,
+        on_compact=data_versions.bump
+    )
+
+def check_month_rollover(user_id, month):
+    """Al empezar un mes nuevo, resume en segundo plano el historial de los meses antiguos"""
+    if history_retention is not None and month == datetime.now().strftime('%Y-%m'):
+        history_retention.on_rollover(user_id, month)
+
+def flush_pending_writes():
+    """Vuelca a disco todos los guardados pendientes de este worker"""
+    write_buffer.flush()
+
 def get_month_file(user_id=None, month=None):
-    """Obtiene el archivo JSON del mes actual para un usuario"""
+    """Obtiene la ubicación de los datos del mes para un usuario"""
     if month is None:
         month = datetime.now().strftime('%Y-%m')
-    if user_id:
-        user_dir = get_user_dir(user_id)
-        if user_dir:
-            return user_dir / f'tickets-{month}.json'
-    # Fallback a formato antiguo (sin usuario)
-    return DATA_DIR / f'tickets-{month}.json'
+    check_month_rollover(user_id, month)
+    return storage.month_path(user_id, month)
+
+def get_history_limit():
+    """Límite de historial de la respuesta (?history_limit=N, 0 = todo)"""
+    try:
+        return max(0, int(request.args.get('history_limit', HISTORY_RESPONSE_LIMIT)))
+    except ValueError:
+        return HISTORY_RESPONSE_LIMIT
 
-def load_month_data(user_id=None, month=None):
+def load_month_data(user_id=None, month=None, history_limit=HISTORY_RESPONSE_LIMIT):
     """Carga los datos del mes actual para un usuario"""
     if month is None:
         month = datetime.now().strftime('%Y-%m')
+    check_month_rollover(user_id, month)
     
     try:
-        month_file = get_month_file(user_id, month)
-        if month_file and month_file.exists():
-            with open(month_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return write_buffer.read(user_id, month, lambda: month_cache.load(user_id, month, history_limit))
     except Exception as e:
         logger.error(f"Error cargando datos del mes: {e}")
     
-    return {
-        "pendingTickets": 0,
-        "totalTickets": 0,
-        "resolvedTickets": 0,
-        "month": month,
-        "history": []
-    }
+    return empty_month(month)
 
 def save_month_data(data, user_id=None):
     """Guarda los datos del mes actual para un usuario"""
     try:
-        month_file = get_month_file(user_id)
-        if not month_file:
-            raise Exception("No se pudo obtener archivo del mes")
-        data['month'] = datetime.now().strftime('%Y-%m')
-        with open(month_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        month = datetime.now().strftime('%Y-%m')
+        check_month_rollover(user_id, month)
+        storage.save_month(user_id, month, data)
+        data_versions.bump(user_id)
     except Exception as e:
         logger.error(f"Error guardando datos del mes: {e}")
         raise
@@ -168,30 +332,25 @@ def migrate_old_data():
                 with open(old_file, 'r', encoding='utf-8') as f:
                     old_data = json.load(f)
                 
-                # Crear entrada de historial
-                history_entry = {
-                    "timestamp": datetime.now().isoformat(),
-                    "action": "migrated_from_old_format",
-                    "data": old_data
-                }
-                
-                # Cargar datos del mes actual
-                current_data = load_month_data()
-                
                 # Si el mes actual está vacío, usar datos antiguos
+                current_data = load_month_data(history_limit=1)
+                counters = {}
                 if current_data['totalTickets'] == 0:
-                    current_data.update({
+                    counters = {
                         "pendingTickets": old_data.get('pendingTickets', 0),
                         "totalTickets": old_data.get('totalTickets', 0),
                         "resolvedTickets": old_data.get('resolvedTickets', 0)
-                    })
+                    }
                 
                 # Agregar al historial
-                if 'history' not in current_data:
-                    current_data['history'] = []
-                current_data['history'].append(history_entry)
-                
-                save_month_data(current_data)
+                storage.record_event(
+                    None,
+                    datetime.now().strftime('%Y-%m'),
+                    counters,
+                    "migrated_from_old_format",
+                    extra={"data": old_data}
+                )
+                data_versions.bump(None)
                 
                 # Renombrar archivo antiguo como backup
                 backup_file = Path('tickets-data.json.backup')
@@ -208,100 +367,19 @@ def migrate_old_data():
         print(f"Error en migrate_old_data: {e}")
         return False
 
-def load_jira_config(user_id=None):
-    """Carga la configuración de Jira (por usuario o global)"""
-    # Si hay user_id, intentar cargar configuración del usuario
-    if user_id:
-        user_config_file = DATA_DIR / f'jira_config_{user_id}.json'
-        if user_config_file.exists():
-            with open(user_config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    
-    # Fallback a configuración global
-    if os.path.exists(JIRA_CONFIG_FILE):
-        with open(JIRA_CONFIG_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return None
-
-def fetch_jira_tickets(user_id=None):
-    """Obtiene tickets de Jira usando la API. Retorna (datos, None) o (None, mensaje_error)."""
-    config = load_jira_config(user_id)
-    if not config:
-        return None, 'No hay configuración de Jira. Usa "Configurar Jira" y guarda tus datos.'
-    
-    try:
-        jira_url = config.get('url', '').rstrip('/')
-        email = config.get('email', '')
-        api_token = config.get('api_token', '')
-        jql = config.get('jql', 'assignee = currentUser() AND status != Done')
-        
-        if not all([jira_url, email, api_token]):
-            return None, 'Faltan URL, email o API token en la configuración.'
-        
-        # Construir URL de búsqueda
-        search_url = f"{jira_url}/rest/api/3/search"
-        
-        headers = {
-            'Accept': 'application/json',
-            'Content-Type': 'application/json'
-        }
-        
-        auth = (email, api_token)
-        
-        params = {
-            'jql': jql,
-            'maxResults': 100
-        }
-        
-        response = requests.get(search_url, headers=headers, auth=auth, params=params, timeout=15)
-        
-        if response.status_code == 200:
-            data = response.json()
-            issues = data.get('issues', [])
-            
-            # Contar tickets por estado
-            pending = 0
-            resolved = 0
-            
-            for issue in issues:
-                status = issue.get('fields', {}).get('status', {}).get('name', '').lower()
-                if 'done' in status or 'resolved' in status or 'closed' in status:
-                    resolved += 1
-                else:
-                    pending += 1
-            
-            return {
-                'pendingTickets': pending,
-                'resolvedTickets': resolved,
-                'totalTickets': len(issues),
-                'lastSync': datetime.now().isoformat()
-            }, None
-        elif response.status_code == 401:
-            return None, 'Credenciales incorrectas. Revisa tu email y API token en "Configurar Jira".'
-        elif response.status_code == 403:
-            return None, 'Sin permiso para acceder a Jira. Revisa que el API token sea válido.'
-        elif response.status_code == 404:
-            return None, f'URL de Jira no encontrada. Revisa que {jira_url} sea correcta.'
-        else:
-            try:
-                err_body = response.json()
-                msg = err_body.get('errorMessages', err_body.get('errors', [str(response.text)]))
-                if isinstance(msg, list):
-                    msg = msg[0] if msg else response.text
-            except Exception:
-                msg = response.text[:200] if response.text else f'HTTP {response.status_code}'
-            logger.error(f"Jira API: {response.status_code} - {msg}")
-            return None, f'Jira respondió con error: {msg}'
-            
-    except requests.exceptions.Timeout:
-        return None, 'Tiempo de espera agotado al conectar con Jira.'
-    except requests.exceptions.ConnectionError:
-        return None, 'No se pudo conectar con Jira. Revisa la URL y tu conexión.'
-    except Exception as e:
-        logger.exception("Error obteniendo tickets de Jira")
-        return None, f'Error inesperado: {str(e)}'
-
 # Rutas de Autenticación
+def set_auth_cookie(response, token):
+    """Cookie de sesión HttpOnly (la usa el canal SSE: EventSource no envía cabeceras)"""
+    response.set_cookie(
+        'auth_token',
+        token,
+        max_age=int(SESSION_TTL_DAYS * 86400) or None,
+        httponly=True,
+        secure=request.is_secure,
+        samesite='Strict'
+    )
+    return response
+
 @app.route('/api/auth/login', methods=['POST'])
 def login():
     """Inicia sesión con email/username"""
@@ -316,19 +394,17 @@ def login():
         user_id = hashlib.sha256(email.encode()).hexdigest()[:16]
         token = secrets.token_urlsafe(32)
         
-        # Guardar sesión
-        sessions = load_sessions()
-        sessions[token] = {
+        # Guardar sesión (una línea en el journal)
+        session_store.add(token, {
             'user_id': user_id,
             'email': email,
             'created_at': datetime.now().isoformat()
-        }
-        save_sessions(sessions)
+        })
         
         # Crear directorio del usuario si no existe
         get_user_dir(user_id)
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'token': token,
             'user': {
@@ -336,6 +412,7 @@ def login():
                 'email': email
             }
         })
+        return set_auth_cookie(response, token)
     except Exception as e:
         logger.exception("Error en login")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -349,12 +426,11 @@ def logout():
             token = request.cookies.get('auth_token')
         
         if token:
-            sessions = load_sessions()
-            if token in sessions:
-                del sessions[token]
-                save_sessions(sessions)
+            session_store.remove(token)
         
-        return jsonify({'success': True})
+        response = jsonify({'success': True})
+        response.delete_cookie('auth_token', samesite='Strict')
+        return response
     except Exception as e:
         logger.exception("Error en logout")
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -367,24 +443,89 @@ def get_current_user_info():
     if not session:
         return jsonify({'authenticated': False}), 401
 
-    return jsonify({
+    response = jsonify({
         'authenticated': True,
         'user': {
             'id': session.get('user_id'),
             'email': session.get('email', '')
         }
     })
+    # Sesiones iniciadas antes de que existiera la cookie: la necesitan para el canal SSE
+    if request.cookies.get('auth_token') != token:
+        set_auth_cookie(response, token)
+    return response
+
+# GET condicionales (ETag derivado de la versión de datos del usuario)
+def not_modified(etag, weak=False):
+    """Respuesta 304 si el cliente ya tiene esta versión (If-None-Match), si no None"""
+    if_none_match = request.if_none_match
+    if not (if_none_match.contains_weak(etag) if weak else if_none_match.contains(etag)):
+        return None
+    data_versions.record_not_modified()
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=weak)
+    return response
+
+def json_with_etag(data, etag, weak=False):
+    """Respuesta JSON con su ETag (débil si el cuerpo lleva campos calculados al responder)"""
+    response = jsonify(data)
+    response.set_etag(etag, weak=weak)
+    return response
+
+def client_user_id():
+    """user_id que envía el cliente (X-User-ID o cookie user_id) para Jira, o None.
+
+    No está autenticado y acaba en nombres de archivo: si no es un id válido se responde 400.
+    """
+    return check_user_id(request.headers.get('X-User-ID') or request.cookies.get('user_id'))
+
+@app.errorhandler(InvalidUserId)
+def _invalid_user_id(e):
+    return jsonify({'success': False, 'error': str(e)}), 400
 
 # Rutas API
 @app.route('/api/data', methods=['GET'])
 def get_data():
     """Obtiene los datos del mes actual"""
     user_id = get_current_user()
+    # Obtener user_id si existe (para compatibilidad con Jira)
+    jira_user_id = client_user_id() or user_id
+    history_limit = get_history_limit()
     
+    # Sin cambios desde la última respuesta: 304 sin leer los datos. El ETag es débil:
+    # jiraSync.age y jiraSync.stale se calculan en cada respuesta
+    etag = current_data_etag(user_id, jira_user_id, history_limit)
+    response = not_modified(etag, weak=True)
+    if response:
+        return response
+    
+    data, complete = current_data(user_id, jira_user_id, history_limit)
+    return json_with_etag(data, etag, weak=True) if complete else jsonify(data)
+
+def current_data_etag(user_id, jira_user_id, history_limit):
+    """ETag de los datos del mes actual (incluye la versión del usuario de Jira si es otro, la
+    de la configuración global si el usuario de Jira no tiene configuración propia y la del
+    último resultado de Jira)"""
+    etag_parts = [datetime.now().strftime('%Y-%m'), history_limit]
+    if jira_user_id != user_id:
+        etag_parts.append(data_versions.get(jira_user_id))
+    jira_config = load_jira_config(jira_user_id)
+    if jira_user_id and jira_config and not jira_config.user_specific:
+        # Guardar la configuración global cambia la versión '_'
+        etag_parts.append(data_versions.get(None))
+    if jira_config:
+        # Un refresco que sólo cambia lastSync no cambia la versión de datos, pero sí la respuesta
+        etag_parts.append(jira_scheduler.result_version(jira_user_id, jira_config))
+    return data_versions.etag(user_id, *etag_parts)
+
+def current_data(user_id, jira_user_id, history_limit):
+    """Datos del mes actual con el último resultado de Jira. Retorna (datos, completos)."""
+    complete = True
     try:
-        data = load_month_data(user_id)
+        data = load_month_data(user_id, history_limit=history_limit)
     except Exception as e:
         logger.error(f"Error cargando datos: {e}")
+        complete = False
         # Retornar datos por defecto en lugar de error 500
         data = {
             "pendingTickets": 0,
@@ -394,23 +535,72 @@ def get_data():
             "history": []
         }
     
-    # Obtener user_id si existe (para compatibilidad con Jira)
+    # Si hay configuración de Jira, devolver el último resultado en caché (sin bloquear)
     try:
-        jira_user_id = request.headers.get('X-User-ID') or request.cookies.get('user_id') or user_id
-        
-        # Si hay configuración de Jira, intentar sincronizar (sin bloquear si falla)
-        try:
-            if load_jira_config(jira_user_id):
-                jira_data, _ = fetch_jira_tickets(jira_user_id)
-                if jira_data:
-                    data['jiraSync'] = jira_data
-        except Exception as e:
-            logger.error(f"Error sincronizando con Jira: {e}")
-            # Continuar sin datos de Jira
+        jira_config = load_jira_config(jira_user_id)
+        if jira_config:
+            jira_data = jira_scheduler.lookup(jira_user_id, jira_config)
+            if jira_data:
+                data['jiraSync'] = jira_data
     except Exception as e:
-        logger.error(f"Error procesando request: {e}")
+        logger.error(f"Error sincronizando con Jira: {e}")
+        complete = False
+        # Continuar sin datos de Jira
+    
+    return data, complete
+
+# Conexiones SSE abiertas en este worker
+sse_streams = threading.BoundedSemaphore(max(1, SSE_MAX_STREAMS))
+sse_lock = threading.Lock()
+sse_metrics = {'active': 0, 'rejected': 0}
+
+@app.route('/api/events', methods=['GET'])
+def events():
+    """Canal SSE: envía los contadores y jiraSync del usuario cada vez que cambian"""
+    # EventSource no permite cabeceras: se autentica con la cookie HttpOnly (nunca en la URL,
+    # que acaba en los logs de acceso, proxies e historial)
+    user_id = get_current_user()
+    if not user_id:
+        return jsonify({'error': 'No autenticado'}), 401
+    jira_user_id = client_user_id() or user_id
+    if not sse_streams.acquire(blocking=False):
+        with sse_lock:
+            sse_metrics['rejected'] += 1
+        return jsonify({'error': 'Demasiadas conexiones de eventos'}), 503, {'Retry-After': '60'}
+    with sse_lock:
+        sse_metrics['active'] += 1
+    last_event_id = request.headers.get('Last-Event-ID')
     
-    return jsonify(data)
+    def stream():
+        yield 'retry: 3000\n\n'
+        last_version = last_event_id
+        started = last_sent = time.monotonic()
+        while time.monotonic() - started < SSE_MAX_SECONDS:
+            # La versión en disco cambia con las escrituras de cualquier worker
+            version = current_data_etag(user_id, jira_user_id, 0)
+            if version != last_version:
+                data, _ = current_data(user_id, jira_user_id, 1)
+                data.pop('history', None)
+                yield f'id: {version}\nevent: data\ndata: {app.json.dumps(data, ensure_ascii=False)}\n\n'
+                last_version = version
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= SSE_HEARTBEAT:
+                yield ': ping\n\n'
+                last_sent = time.monotonic()
+            time.sleep(SSE_POLL_INTERVAL)
+    
+    def release():
+        with sse_lock:
+            sse_metrics['active'] -= 1
+        sse_streams.release()
+    
+    response = Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # El servidor WSGI cierra la respuesta al terminar o al desconectarse el cliente
+    response.call_on_close(release)
+    return response
 
 @app.route('/api/save', methods=['POST'])
 def save_data():
@@ -429,66 +619,125 @@ def save_data():
             # Para sendBeacon, leer el body directamente
             data = json.loads(request.data.decode('utf-8'))
         
-        current_data = load_month_data(user_id)
-        
-        # Actualizar contadores
-        current_data.update({
-            'pendingTickets': data.get('pendingTickets', current_data.get('pendingTickets', 0)),
-            'totalTickets': data.get('totalTickets', current_data.get('totalTickets', 0)),
-            'resolvedTickets': data.get('resolvedTickets', current_data.get('resolvedTickets', 0))
-        })
-        
-        # Agregar al historial
-        if 'history' not in current_data:
-            current_data['history'] = []
-        
-        history_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'action': data.get('action', 'manual_update'),
-            'pendingTickets': current_data['pendingTickets'],
-            'totalTickets': current_data['totalTickets'],
-            'resolvedTickets': current_data['resolvedTickets']
-        }
-        current_data['history'].append(history_entry)
-        
-        # Mantener solo últimos 1000 registros
-        if len(current_data['history']) > 1000:
-            current_data['history'] = current_data['history'][-1000:]
-        
-        save_month_data(current_data, user_id)
+        # Actualizar contadores y agregar al historial (agrupado por el buffer de escritura)
+        month = datetime.now().strftime('%Y-%m')
+        check_month_rollover(user_id, month)
+        write_buffer.record_event(
+            user_id,
+            month,
+            {key: data[key] for key in ('pendingTickets', 'totalTickets', 'resolvedTickets') if key in data},
+            data.get('action', 'manual_update')
+        )
+        # Las lecturas de este worker ya ven el evento pendiente
+        data_versions.bump(user_id)
         
-        return jsonify({'success': True, 'month': current_data['month']})
+        return jsonify({'success': True, 'month': month})
     except Exception as e:
         logger.exception("Error guardando datos")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# Acciones en lote (cola del cliente): incrementos por acción; reset pone los contadores a 0
+BATCH_DELTAS = {
+    'new_ticket': {'pendingTickets': 1, 'totalTickets': 1},
+    'ticket_resolved': {'pendingTickets': -1, 'resolvedTickets': 1},
+    'reset': None
+}
+
+def client_timestamp(value, now):
+    """Timestamp del cliente (epoch en ms o ISO 8601) en hora local del servidor, nunca futuro"""
+    try:
+        if isinstance(value, (int, float)):
+            timestamp = datetime.fromtimestamp(value / 1000)
+        else:
+            timestamp = datetime.fromisoformat(str(value))
+            if timestamp.tzinfo is not None:
+                timestamp = timestamp.astimezone().replace(tzinfo=None)
+    except (TypeError, ValueError, OverflowError, OSError):
+        return now
+    return min(timestamp, now)
+
+@app.route('/api/events/batch', methods=['POST'])
+def ingest_event_batch():
+    """Aplica en orden las acciones encoladas por el cliente y devuelve el estado resultante"""
+    user_id = get_current_user()
+    if not user_id:
+        return jsonify({'success': False, 'error': 'No autenticado'}), 401
+    
+    body = request.get_json(silent=True)
+    items = body.get('events') if isinstance(body, dict) else None
+    if not isinstance(items, list) or len(items) > EVENT_BATCH_LIMIT:
+        return jsonify({'success': False, 'error': f'events debe ser una lista de hasta {EVENT_BATCH_LIMIT} acciones'}), 400
+    
+    now = datetime.now()
+    events_by_month = {}
+    for item in items:
+        action = item.get('action') if isinstance(item, dict) else None
+        if action not in BATCH_DELTAS:
+            return jsonify({'success': False, 'error': f'Acción no válida: {action}'}), 400
+        timestamp = client_timestamp(item.get('ts'), now)
+        # El ts del cliente sólo elige el mes y fecha el historial: se aplica en orden de llegada
+        event = {
+            'action': action,
+            'timestamp': timestamp.isoformat(),
+            'applied_at': now.isoformat(),
+            'idempotency_key': str(item['key'])[:100] if item.get('key') else None
+        }
+        if BATCH_DELTAS[action] is None:
+            # El reset fija una base nueva sin depender del reloj del cliente
+            event['counters'] = {key: 0 for key in COUNTER_KEYS}
+            event['baseline'] = True
+        else:
+            event['delta'] = BATCH_DELTAS[action]
+        # Cada acción cuenta en el mes en que ocurrió (la cola puede venir de antes del cambio de mes)
+        events_by_month.setdefault(timestamp.strftime('%Y-%m'), []).append(event)
+    
+    try:
+        current_month = now.strftime('%Y-%m')
+        results = {}
+        for month in sorted(events_by_month):
+            # Los guardados pendientes de este worker van antes que el lote
+            write_buffer.flush_key(user_id, month)
+            # Todo el lote del mes en una sola transacción (las claves repetidas se ignoran)
+            results[month] = storage.record_events(user_id, month, events_by_month[month])
+        if results:
+            data_versions.bump(user_id)
+        data = results.get(current_month) or load_month_data(user_id, current_month, 1)
+        return jsonify({
+            'success': True,
+            'accepted': len(items),
+            'month': current_month,
+            'state': {key: data.get(key, 0) for key in COUNTER_KEYS},
+            'updatedAt': data.get('updatedAt')
+        })
+    except Exception as e:
+        logger.exception("Error aplicando lote de eventos")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # Rutas de Estadísticas
 @app.route('/api/stats/months', methods=['GET'])
 def list_months():
     """Lista todos los meses disponibles para el usuario actual"""
     user_id = get_current_user()
-    months = []
-    
-    if user_id:
-        user_dir = get_user_dir(user_id)
-        if user_dir:
-            for file in user_dir.glob('tickets-*.json'):
-                month = file.stem.replace('tickets-', '')
-                months.append(month)
-    else:
-        # Fallback a formato antiguo
-        for file in DATA_DIR.glob('tickets-*.json'):
-            month = file.stem.replace('tickets-', '')
-            months.append(month)
+    write_buffer.flush_key(user_id, datetime.now().strftime('%Y-%m'))
+    etag = data_versions.etag(user_id, 'months')
+    response = not_modified(etag)
+    if response:
+        return response
+    months = storage.list_months(user_id)
     
-    return jsonify(sorted(months, reverse=True))
+    return json_with_etag(sorted(months, reverse=True), etag)
 
 @app.route('/api/stats/month/<month>', methods=['GET'])
 def get_month_stats(month):
     """Obtiene datos de un mes específico para el usuario actual"""
     user_id = get_current_user()
-    data = load_month_data(user_id, month)
-    return jsonify(data)
+    history_limit = get_history_limit()
+    etag = data_versions.etag(user_id, 'month', month, history_limit)
+    response = not_modified(etag)
+    if response:
+        return response
+    data = load_month_data(user_id, month, history_limit)
+    return json_with_etag(data, etag)
 
 @app.route('/api/stats/summary', methods=['GET'])
 def get_stats_summary():
@@ -497,21 +746,13 @@ def get_stats_summary():
     months = []
     
     if user_id:
-        user_dir = get_user_dir(user_id)
-        if user_dir:
-            for file in sorted(user_dir.glob('tickets-*.json'), reverse=True):
-                month = file.stem.replace('tickets-', '')
-                try:
-                    with open(file, 'r', encoding='utf-8') as f:
-                        month_data = json.load(f)
-                        months.append({
-                            'month': month,
-                            'totalTickets': month_data.get('totalTickets', 0),
-                            'pendingTickets': month_data.get('pendingTickets', 0),
-                            'resolvedTickets': month_data.get('resolvedTickets', 0)
-                        })
-                except Exception as e:
-                    logger.error(f"Error leyendo {file}: {e}")
+        write_buffer.flush_key(user_id, datetime.now().strftime('%Y-%m'))
+    etag = data_versions.etag(user_id, 'summary')
+    response = not_modified(etag)
+    if response:
+        return response
+    if user_id:
+        months = storage.month_summaries(user_id)
     
     # Calcular totales
     totals = {
@@ -521,74 +762,170 @@ def get_stats_summary():
         'months': months
     }
     
-    return jsonify(totals)
+    return json_with_etag(totals, etag)
+
+def parse_date_arg(name, default):
+    """Fecha YYYY-MM-DD de la query (o default); ValueError si el formato no es válido"""
+    value = request.args.get(name) or default
+    datetime.strptime(value, '%Y-%m-%d')
+    return value
+
+@app.route('/api/stats/range', methods=['GET'])
+def get_stats_range():
+    """Totales de un rango de meses (?from=YYYY-MM&to=YYYY-MM, ambos incluidos)"""
+    user_id = get_current_user()
+    current_month = datetime.now().strftime('%Y-%m')
+    month_to = request.args.get('to') or current_month
+    month_from = request.args.get('from') or month_to
+    try:
+        datetime.strptime(month_from, '%Y-%m')
+        datetime.strptime(month_to, '%Y-%m')
+    except ValueError:
+        return jsonify({'error': 'Meses inválidos, usa el formato YYYY-MM'}), 400
+    
+    # El mes en curso se suma al vuelo: primero se vuelcan sus guardados pendientes
+    write_buffer.flush_key(user_id, current_month)
+    etag = data_versions.etag(user_id, 'range', month_from, month_to)
+    response = not_modified(etag)
+    if response:
+        return response
+    return json_with_etag(storage.month_range(user_id, month_from, month_to), etag)
+
+@app.route('/api/stats/timeseries', methods=['GET'])
+def get_stats_timeseries():
+    """Creados/resueltos por día u hora, curva de backlog y tasa de resolución de un rango"""
+    user_id = get_current_user()
+    now = datetime.now()
+    try:
+        date_from = parse_date_arg('from', now.strftime('%Y-%m-01'))
+        date_to = parse_date_arg('to', now.strftime('%Y-%m-%d'))
+    except ValueError:
+        return jsonify({'error': 'Fechas inválidas, usa el formato YYYY-MM-DD'}), 400
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return jsonify({'error': 'granularity debe ser day u hour'}), 400
+    
+    current_month = now.strftime('%Y-%m')
+    write_buffer.flush_key(user_id, current_month)
+    etag = data_versions.etag(user_id, 'timeseries', date_from, date_to, granularity)
+    response = not_modified(etag)
+    if response:
+        return response
+    summaries = {row['month']: row for row in storage.month_summaries(user_id)}
+    aggregates = [
+        month_series.month(user_id, month, summaries[month], closed=month < current_month)
+        for month in sorted(summaries) if date_from[:7] <= month <= date_to[:7]
+    ]
+    return json_with_etag(build_series(aggregates, granularity, date_from, date_to), etag)
 
 @app.route('/api/jira/config', methods=['GET'])
 def get_jira_config():
     """Obtiene la configuración de Jira (sin token)"""
     # Primero intentar obtener de la sesión del usuario (si existe)
-    user_id = request.headers.get('X-User-ID') or request.cookies.get('user_id')
-    
-    if user_id:
-        user_config_file = DATA_DIR / f'jira_config_{user_id}.json'
-        if user_config_file.exists():
-            with open(user_config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                safe_config = {k: v for k, v in config.items() if k != 'api_token'}
-                safe_config['configured'] = True
-                safe_config['user_specific'] = True
-                return jsonify(safe_config)
+    user_id = client_user_id()
     
-    # Fallback a configuración global (solo para uso personal)
-    config = load_jira_config()
+    # Configuración del usuario o, si no tiene, la global (solo para uso personal)
+    config = load_jira_config(user_id)
     if config:
-        safe_config = {k: v for k, v in config.items() if k != 'api_token'}
-        safe_config['configured'] = True
-        safe_config['user_specific'] = False
-        return jsonify(safe_config)
+        return jsonify(config.public_dict())
     return jsonify({'configured': False})
 
+def jira_config_error(config):
+    """Mensaje de error si la configuración recibida no es válida, si no None"""
+    if not isinstance(config, dict):
+        return 'La configuración debe ser un objeto JSON'
+    if not isinstance(config.get('url'), str) or not config['url'].strip():
+        return 'URL de Jira requerida'
+    # Se parsea igual que al cargarla: una configuración que no se puede leer no se guarda
+    try:
+        JiraConfig.from_dict(config)
+    except (AttributeError, TypeError, ValueError) as e:
+        return f'Configuración de Jira no válida: {e}'
+    return None
+
 @app.route('/api/jira/config', methods=['POST'])
 def set_jira_config():
     """Configura Jira (por usuario o global)"""
+    # Fuera del try: un id no válido nunca debe caer en la configuración global
+    user_id = client_user_id()
     try:
-        config = request.get_json()
-        user_id = request.headers.get('X-User-ID') or request.cookies.get('user_id')
+        config = request.get_json(silent=True)
+        error = jira_config_error(config)
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        # Si hay user_id, guardar configuración por usuario
-        if user_id:
-            user_config_file = DATA_DIR / f'jira_config_{user_id}.json'
-            with open(user_config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2)
-            return jsonify({'success': True, 'user_specific': True})
-        else:
-            # Fallback: configuración global (solo para uso personal)
-            with open(JIRA_CONFIG_FILE, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2)
-            return jsonify({'success': True, 'user_specific': False})
+        # Con user_id se guarda por usuario; si no, configuración global (solo para uso personal)
+        jira_configs.save(user_id, config)
+        # El resultado de Jira de /api/data depende de la configuración
+        data_versions.bump(user_id)
+        return jsonify({'success': True, 'user_specific': bool(user_id)})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/jira/sync', methods=['POST'])
 def sync_jira():
     """Sincroniza manualmente con Jira"""
+    user_id = get_current_user() or client_user_id()
     try:
-        user_id = get_current_user() or request.headers.get('X-User-ID') or request.cookies.get('user_id')
-        jira_data, error_msg = fetch_jira_tickets(user_id)
+        # Refresco forzado: consulta Jira ahora y actualiza la caché
+        config = load_jira_config(user_id)
+        if not config:
+            return jsonify({'success': False, 'error': JIRA_NOT_CONFIGURED}), 200
+        jira_data, error_msg = jira_scheduler.refresh_now(user_id, config)
         if error_msg:
             return jsonify({'success': False, 'error': error_msg}), 200
-        current_data = load_month_data(user_id)
-        current_data.update({
+        month = datetime.now().strftime('%Y-%m')
+        # Los guardados pendientes van antes que los contadores de Jira
+        write_buffer.flush_key(user_id, month)
+        storage.update_counters(user_id, month, {
             'pendingTickets': jira_data['pendingTickets'],
             'resolvedTickets': jira_data['resolvedTickets'],
             'totalTickets': jira_data['totalTickets']
         })
-        save_month_data(current_data, user_id)
+        data_versions.bump(user_id)
         return jsonify({'success': True, 'data': jira_data})
     except Exception as e:
         logger.exception("Error en sync_jira")
         return jsonify({'success': False, 'error': str(e)}), 200
 
+# Métricas internas
+def internal_access_allowed():
+    """Acceso a endpoints internos: exige ADMIN_TOKEN (si no está definido, se deniega).
+
+    Se acepta en X-Admin-Token o como Authorization: Bearer (p. ej. desde Prometheus).
+    """
+    if not ADMIN_TOKEN:
+        return False
+    token = request.headers.get('X-Admin-Token') or request.headers.get('Authorization', '').replace('Bearer ', '')
+    return secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/internal/stats', methods=['GET'])
+def internal_stats():
+    """Métricas internas de este worker"""
+    if not internal_access_allowed():
+        return jsonify({'error': 'No autorizado'}), 403
+    return jsonify({
+        'sessions': session_store.stats(),
+        'writes': write_buffer.stats(),
+        'jira_scheduler': jira_scheduler.stats(),
+        'jira_config': jira_configs.stats(),
+        'timeseries': month_series.stats(),
+        'etags': data_versions.stats(),
+        'month_cache': month_cache.stats(),
+        'sse': dict(sse_metrics, max_streams=SSE_MAX_STREAMS),
+        'static': static_assets.stats(),
+        'jira_hosts': jira_http.stats(),
+        'profiler': profiler.stats() if profiler else {'enabled': False},
+        'retention': history_retention.stats() if history_retention else {'enabled': False}
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métricas de todos los workers en formato Prometheus"""
+    if not internal_access_allowed():
+        return jsonify({'error': 'No autorizado'}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # Health check endpoint ya está registrado arriba (_early_health_check)
 # Sobrescribir con versión completa después de que todo esté inicializado
 @app.route('/health', methods=['GET', 'HEAD', 'OPTIONS'])
@@ -597,26 +934,43 @@ def health_check():
     """Endpoint de health check - respuesta inmediata sin verificaciones"""
     return '{"status":"ok"}', 200, {'Content-Type': 'application/json'}
 
-# Servir archivos estáticos
+# Servir archivos estáticos (desde memoria, comprimidos y con huella)
+static_assets = StaticAssets(app.root_path)
+try:
+    logger.info(f"Archivos estáticos cargados: {static_assets.load()} rutas")
+except Exception as e:
+    logger.error(f"Error cargando archivos estáticos: {e}")
+
+def static_response(path):
+    """Respuesta de un archivo del manifiesto (o None si no existe)"""
+    rendered = static_assets.render(
+        path,
+        request.headers.get('Accept-Encoding', ''),
+        request.headers.get('If-None-Match', '')
+    )
+    if rendered is None:
+        return None
+    status, headers, body = rendered
+    return app.response_class(body, status=status, headers=headers)
+
 @app.route('/', methods=['GET', 'HEAD'])
 def root():
     """Root endpoint - sirve index.html"""
-    try:
-        return send_from_directory('.', 'index.html')
-    except Exception as e:
-        logger.error(f"Error sirviendo index.html: {e}")
-        # Retornar respuesta básica en lugar de error
-        return '<!DOCTYPE html><html><head><title>Contador de Tickets</title></head><body><h1>Contador de Tickets</h1><p>Error cargando página</p></body></html>', 200
+    response = static_response('')
+    if response is not None:
+        return response
+    logger.error("Error sirviendo index.html: no está cargado")
+    # Retornar respuesta básica en lugar de error
+    return '<!DOCTYPE html><html><head><title>Contador de Tickets</title></head><body><h1>Contador de Tickets</h1><p>Error cargando página</p></body></html>', 200
 
 # Ruta catch-all para archivos estáticos - DEBE estar AL FINAL
-@app.route('/<path:path>')
+@app.route('/<path:path>', methods=['GET', 'HEAD'])
 def serve_static(path):
-    try:
-        return send_from_directory('.', path)
-    except Exception as e:
-        logger.error(f"Error sirviendo archivo {path}: {e}")
-        # Si no se encuentra el archivo, devolver 404
-        return jsonify({'error': 'File not found'}), 404
+    response = static_response(path)
+    if response is not None:
+        return response
+    # Sólo se sirven los archivos del manifiesto (nunca data/ ni la configuración)
+    return jsonify({'error': 'File not found'}), 404
 
 if __name__ == '__main__':
     # Migrar datos antiguos al iniciar (solo si se ejecuta directamente)
@@ -625,5 +979,9 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"Advertencia al migrar datos: {e}")
     
+    # SIGTERM termina limpiamente para que atexit vuelque los guardados pendientes
+    import signal
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
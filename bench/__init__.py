@@ -0,0 +1,4 @@
+"""
+Benchmark del contador de tickets (datos sintéticos, Jira simulado y generador de carga)
+Uso: python3 -m bench.run --help
+"""
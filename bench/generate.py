@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Datos sintéticos para el benchmark
+- N usuarios (bench-<i>@example.com) con M meses y H entradas de historial por mes,
+  escritos con el motor de almacenamiento real (json o sqlite)
+- Sesiones: una por usuario más las necesarias hasta --sessions
+- Opcionalmente una configuración de Jira por usuario que apunta al Jira simulado
+- Guarda bench.json (usuarios y tokens) para el generador de carga
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import secrets
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from jira_config import JiraConfigCache
+from session_store import SessionStore
+from storage import create_storage
+
+MANIFEST_FILE = 'bench.json'
+ACTIONS = ('new_ticket', 'new_ticket', 'ticket_resolved', 'manual_update')
+
+
+def user_id_for(email):
+    """Mismo identificador que asigna /api/auth/login"""
+    return hashlib.sha256(email.encode()).hexdigest()[:16]
+
+
+def month_list(count, end=None):
+    """Los últimos `count` meses (YYYY-MM), del más antiguo al actual"""
+    end = end or datetime.now()
+    year, month = end.year, end.month
+    months = []
+    for _ in range(count):
+        months.append(f'{year:04d}-{month:02d}')
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def synthetic_month(month, entries, rng, now=None):
+    """Documento de un mes con `entries` eventos repartidos entre su inicio y su fin (o ahora)"""
+    now = now or datetime.now()
+    start = datetime.strptime(month, '%Y-%m')
+    end = (start + timedelta(days=32)).replace(day=1)
+    span = max(1.0, (min(end, now) - start).total_seconds())
+    offsets = sorted(rng.uniform(0, span) for _ in range(entries))
+    pending = total = resolved = 0
+    history = []
+    for offset in offsets:
+        action = rng.choice(ACTIONS)
+        if action == 'new_ticket' or (action == 'ticket_resolved' and pending == 0):
+            action = 'new_ticket'
+            pending += 1
+            total += 1
+        elif action == 'ticket_resolved':
+            pending -= 1
+            resolved += 1
+        history.append({
+            'timestamp': (start + timedelta(seconds=offset)).isoformat(),
+            'action': action,
+            'pendingTickets': pending,
+            'totalTickets': total,
+            'resolvedTickets': resolved
+        })
+    return {
+        'pendingTickets': pending,
+        'totalTickets': total,
+        'resolvedTickets': resolved,
+        'month': month,
+        'history': history,
+        'updatedAt': history[-1]['timestamp'] if history else start.isoformat()
+    }
+
+
+def generate(root, users=10, months=12, history=200, sessions=0, backend='json', jira_url=None, seed=1):
+    """Crea root/data con los datos sintéticos. Retorna el manifiesto (también en root/bench.json)."""
+    root = Path(root)
+    data_dir = root / 'data'
+    users_dir = data_dir / 'users'
+    users_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    storage = create_storage(backend, data_dir, users_dir, data_dir / 'tickets.db')
+    jira_configs = JiraConfigCache(data_dir, root / 'jira_config.json')
+    month_names = month_list(months)
+
+    manifest = {'users': [], 'backend': backend, 'months': month_names, 'history': history}
+    all_sessions = {}
+    created_at = datetime.now().isoformat()
+    for i in range(users):
+        email = f'bench-{i}@example.com'
+        user_id = user_id_for(email)
+        for month in month_names:
+            storage.save_month(user_id, month, synthetic_month(month, history, rng))
+        if jira_url:
+            jira_configs.save(user_id, {
+                'url': jira_url,
+                'email': email,
+                'api_token': 'bench',
+                'jql': f'project = BENCH{i % 4}'
+            })
+        token = secrets.token_urlsafe(32)
+        all_sessions[token] = {'user_id': user_id, 'email': email, 'created_at': created_at}
+        manifest['users'].append({'email': email, 'id': user_id, 'token': token})
+    # Sesiones adicionales (otros dispositivos de los mismos usuarios)
+    for i in range(max(0, sessions - users)):
+        user = manifest['users'][i % users] if users else {'id': f'anon{i}', 'email': ''}
+        all_sessions[secrets.token_urlsafe(32)] = {
+            'user_id': user['id'], 'email': user['email'], 'created_at': created_at
+        }
+    SessionStore(data_dir / 'sessions.json', journal_path=data_dir / 'sessions.journal').replace_all(all_sessions)
+    manifest['sessions'] = len(all_sessions)
+
+    with open(root / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para el benchmark')
+    parser.add_argument('root', help='Directorio de trabajo (se crea root/data)')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--history', type=int, default=200, help='Entradas de historial por mes')
+    parser.add_argument('--sessions', type=int, default=0, help='Sesiones totales (mínimo una por usuario)')
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--jira-url', help='URL del Jira simulado para la configuración de cada usuario')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    result = generate(args.root, args.users, args.months, args.history, args.sessions,
+                      args.backend, args.jira_url, args.seed)
+    print(f"✓ {len(result['users'])} usuarios, {len(result['months'])} meses, {result['sessions']} sesiones")
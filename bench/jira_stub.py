@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Jira simulado para el benchmark (GET /rest/api/3/search)
+- Cada JQL tiene `issues` issues; la fracción `resolved_ratio` está en statusCategory "done"
+- maxResults=0 devuelve sólo el total (filtrando por statusCategory IN (...) si la JQL lo pide)
+- Latencia configurable (más jitter), tamaño máximo de página y tasa de errores 503
+- GET /stats devuelve las peticiones atendidas
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+_STATUS_CATEGORY_IN = re.compile(r'statusCategory\s+IN\s*\(', re.IGNORECASE)
+
+
+class JiraStub:
+    """Servidor HTTP en un hilo que imita la búsqueda de Jira"""
+
+    def __init__(self, host='127.0.0.1', port=0, issues=500, resolved_ratio=0.4, latency=0.05,
+                 jitter=0.5, page_size=100, error_rate=0.0, seed=None):
+        self.issues = issues
+        self.resolved_ratio = resolved_ratio
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._metrics = {'requests': 0, 'errors': 0, 'issues_sent': 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == '/stats':
+                    self._send(200, stub.stats())
+                elif parsed.path.startswith('/rest/api/3/search'):
+                    status, body, headers = stub.search({k: v[0] for k, v in parse_qs(parsed.query).items()})
+                    self._send(status, body, headers)
+                else:
+                    self._send(404, {'errorMessages': ['Not found']})
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _issue(self, index):
+        resolved = index < int(self.issues * self.resolved_ratio)
+        return {
+            'key': f'BENCH-{index + 1}',
+            'fields': {
+                'status': {
+                    'name': 'Done' if resolved else 'In Progress',
+                    'statusCategory': {'key': 'done' if resolved else 'indeterminate'}
+                },
+                'updated': '2026-01-01T00:00:00.000+0000'
+            }
+        }
+
+    def search(self, params):
+        """Respuesta a una búsqueda: (status, cuerpo, cabeceras)"""
+        with self._lock:
+            self._metrics['requests'] += 1
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self._metrics['errors'] += 1
+        time.sleep(max(0.0, delay))
+        if failed:
+            return 503, {'errorMessages': ['Service Unavailable (stub)']}, {'Retry-After': '0'}
+        jql = params.get('jql', '')
+        if _STATUS_CATEGORY_IN.search(jql):
+            total = int(self.issues * self.resolved_ratio)
+        else:
+            total = self.issues
+        max_results = int(params.get('maxResults', 50))
+        if max_results == 0:
+            return 200, {'startAt': 0, 'maxResults': 0, 'total': total, 'issues': []}, {}
+        start_at = int(params.get('startAt', 0))
+        count = max(0, min(max_results, self.page_size, total - start_at))
+        issues = [self._issue(i) for i in range(start_at, start_at + count)]
+        with self._lock:
+            self._metrics['issues_sent'] += count
+        return 200, {'startAt': start_at, 'maxResults': count, 'total': total, 'issues': issues}, {}
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='jira-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._metrics)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Jira simulado para el benchmark')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--issues', type=int, default=500)
+    parser.add_argument('--resolved-ratio', type=float, default=0.4)
+    parser.add_argument('--latency', type=float, default=0.05, help='Segundos por petición')
+    parser.add_argument('--page-size', type=int, default=100, help='Máximo de issues por página')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fracción de respuestas 503')
+    args = parser.parse_args()
+
+    stub = JiraStub(port=args.port, issues=args.issues, resolved_ratio=args.resolved_ratio,
+                    latency=args.latency, page_size=args.page_size, error_rate=args.error_rate)
+    print(f"Jira simulado en {stub.url}")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Generador de carga contra una instancia en marcha
+- Escenarios: login, data (/api/data), save (/api/save), summary (/api/stats/summary)
+  y jira_sync (/api/jira/sync), cada uno con N peticiones repartidas en C hilos
+- Usa los usuarios y tokens de bench.json (bench/generate.py)
+- Resultado en JSON: peticiones, errores, peticiones/s y latencias p50/p95/p99 en ms
+"""
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SCENARIOS = ('login', 'data', 'save', 'summary', 'jira_sync')
+
+
+def percentile(sorted_values, p):
+    """Percentil p (0-100) por interpolación lineal de una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies, errors, failures, seconds):
+    """Métricas de un escenario (latencias en segundos)"""
+    ordered = sorted(latencies)
+    ms = lambda value: round(value * 1000, 2)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'failures': failures,
+        'seconds': round(seconds, 3),
+        'rps': round(len(ordered) / seconds, 2) if seconds > 0 else 0.0,
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1]) if ordered else 0.0
+    }
+
+
+def _call(http, base_url, scenario, user, timeout):
+    headers = {'Authorization': f"Bearer {user['token']}"}
+    if scenario == 'login':
+        return http.post(f'{base_url}/api/auth/login', json={'email': user['email']}, timeout=timeout)
+    if scenario == 'data':
+        return http.get(f'{base_url}/api/data', headers=headers, timeout=timeout)
+    if scenario == 'save':
+        body = {'pendingTickets': 1, 'totalTickets': 1, 'resolvedTickets': 0, 'action': 'new_ticket'}
+        return http.post(f'{base_url}/api/save', json=body, headers=headers, timeout=timeout)
+    if scenario == 'summary':
+        return http.get(f'{base_url}/api/stats/summary', headers=headers, timeout=timeout)
+    if scenario == 'jira_sync':
+        return http.post(f'{base_url}/api/jira/sync', headers=headers, timeout=timeout)
+    raise ValueError(f'Escenario desconocido: {scenario}')
+
+
+def run_scenario(base_url, scenario, users, total_requests, concurrency, timeout=30):
+    """Lanza total_requests peticiones del escenario con `concurrency` hilos"""
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies = []
+    outcome = {'errors': 0, 'failures': 0}
+
+    def worker():
+        http = requests.Session()
+        own = []
+        errors = failures = 0
+        while True:
+            i = next(counter)
+            if i >= total_requests:
+                break
+            start = time.perf_counter()
+            try:
+                response = _call(http, base_url, scenario, users[i % len(users)], timeout)
+                own.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+                elif response.headers.get('Content-Type', '').startswith('application/json'):
+                    # 200 con success: false (p. ej. Jira caído en /api/jira/sync)
+                    if response.json().get('success') is False:
+                        failures += 1
+            except requests.RequestException:
+                own.append(time.perf_counter() - start)
+                errors += 1
+        with lock:
+            latencies.extend(own)
+            outcome['errors'] += errors
+            outcome['failures'] += failures
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(worker) for _ in range(concurrency)]
+    # Un hilo que falla (p. ej. una respuesta JSON inválida) no debe pasar como menos peticiones
+    for future in futures:
+        future.result()
+    return summarize(latencies, outcome['errors'], outcome['failures'], time.perf_counter() - start)
+
+
+def run_load(base_url, manifest, scenarios=SCENARIOS, total_requests=500, concurrency=8):
+    """Ejecuta los escenarios en orden. Retorna {escenario: métricas}."""
+    users = manifest['users']
+    return {
+        scenario: run_scenario(base_url, scenario, users, total_requests, concurrency)
+        for scenario in scenarios
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generador de carga del contador de tickets')
+    parser.add_argument('base_url', help='URL de la aplicación, p. ej. http://127.0.0.1:5000')
+    parser.add_argument('manifest', help='bench.json generado por bench/generate.py')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones por escenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    args = parser.parse_args()
+
+    with open(args.manifest, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    result = run_load(args.base_url.rstrip('/'), manifest, args.scenarios.split(','),
+                      args.requests, args.concurrency)
+    print(json.dumps(result, indent=2))
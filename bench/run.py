@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark completo en un directorio temporal
+1. Genera los datos sintéticos (bench/generate.py)
+2. Arranca el Jira simulado (bench/jira_stub.py)
+3. Arranca la aplicación con gunicorn (gthread, como en el Dockerfile) sobre esos datos
+4. Lanza la carga (bench/load.py) e imprime el resultado en JSON
+Con --baseline compara con un resultado anterior (variación en % de rps y p95).
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from bench.generate import generate
+from bench.jira_stub import JiraStub
+from bench.load import SCENARIOS, run_load
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def start_app(workdir, port, workers, threads, env):
+    """Arranca gunicorn con cwd en el directorio de datos y espera al health check"""
+    command = [
+        sys.executable, '-m', 'gunicorn',
+        '--config', str(REPO_ROOT / 'gunicorn.conf.py'),
+        '--pythonpath', str(REPO_ROOT),
+        '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers),
+        '--worker-class', 'gthread',
+        '--threads', str(threads),
+        '--log-level', 'warning',
+        'app:app'
+    ]
+    process = subprocess.Popen(command, cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn terminó al arrancar: {process.stderr.read().decode()[-2000:]}')
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/health', timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn no respondió al health check')
+
+
+def compare(result, baseline):
+    """Variación (%) de rps y p95 respecto al resultado anterior, por escenario"""
+    deltas = {}
+    for scenario, metrics in result['scenarios'].items():
+        before = baseline.get('scenarios', {}).get(scenario)
+        if not before:
+            continue
+        deltas[scenario] = {
+            key: round((metrics[key] - before[key]) * 100 / before[key], 1) if before[key] else None
+            for key in ('rps', 'p95_ms')
+        }
+    return deltas
+
+
+def run(args):
+    with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+        stub = JiraStub(issues=args.jira_issues, latency=args.jira_latency, page_size=args.jira_page_size,
+                        error_rate=args.jira_error_rate, seed=args.seed).start()
+        generate_start = time.perf_counter()
+        manifest = generate(workdir, args.users, args.months, args.history, args.sessions,
+                            args.backend, stub.url, args.seed)
+        generate_seconds = time.perf_counter() - generate_start
+
+        port = free_port()
+        env = dict(os.environ, STORAGE_BACKEND=args.backend)
+        process = start_app(workdir, port, args.workers, args.threads, env)
+        try:
+            scenarios = run_load(f'http://127.0.0.1:{port}', manifest, args.scenarios.split(','),
+                                 args.requests, args.concurrency)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+            stub.stop()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'commit': git_commit(),
+            'backend': args.backend,
+            'users': args.users,
+            'months': args.months,
+            'history': args.history,
+            'sessions': manifest['sessions'],
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'threads': args.threads,
+            'generate_seconds': round(generate_seconds, 3)
+        },
+        'jira_stub': dict(stub.stats(), latency=args.jira_latency, error_rate=args.jira_error_rate),
+        'scenarios': scenarios
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark del contador de tickets')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--history', type=int, default=500, help='Entradas de historial por mes')
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--backend', choices=('json', 'sqlite'), default='json')
+    parser.add_argument('--requests', type=int, default=500, help='Peticiones por escenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--jira-issues', type=int, default=500)
+    parser.add_argument('--jira-latency', type=float, default=0.05, help='Segundos por petición al Jira simulado')
+    parser.add_argument('--jira-page-size', type=int, default=100)
+    parser.add_argument('--jira-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Guardar el resultado en este archivo')
+    parser.add_argument('--baseline', help='Resultado anterior con el que comparar')
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            result['vs_baseline'] = compare(result, json.load(f))
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
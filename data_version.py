@@ -0,0 +1,78 @@
+"""
+Versión de los datos de cada usuario para ETags y GET condicionales
+- Cada cambio (guardado, volcado del buffer, sincronización con Jira) añade un byte
+  a data/versions/<usuario> con O_APPEND: no necesita lock entre workers
+- La versión es (inodo, tamaño, mtime) del archivo: comprobarla cuesta un stat
+- El archivo se reinicia al superar max_bytes (el inodo nuevo mantiene la versión única)
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+
+# Ids de usuario válidos como nombre de archivo: el de la sesión (16 hex) o el que genera
+# script.js para X-User-ID (user_<ms>_<aleatorio>); nada de '/', '.' ni rutas
+USER_ID_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+
+class InvalidUserId(ValueError):
+    """Id de usuario que no se puede usar en un nombre de archivo"""
+
+
+def check_user_id(user_id):
+    """Retorna user_id (o None) si es seguro como nombre de archivo; si no, InvalidUserId"""
+    if user_id and not USER_ID_PATTERN.fullmatch(user_id):
+        raise InvalidUserId('user_id no válido')
+    return user_id or None
+
+
+class DataVersions:
+    """Versión de datos por usuario compartida entre workers vía disco"""
+
+    def __init__(self, versions_dir, max_bytes=4096):
+        self.versions_dir = Path(versions_dir)
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._metrics = {'checks': 0, 'bumps': 0, 'not_modified': 0}
+
+    def _path(self, user_id):
+        return self.versions_dir / (check_user_id(user_id) or '_')
+
+    def get(self, user_id):
+        """Versión actual (cambia con cada bump, en cualquier worker)"""
+        self._metrics['checks'] += 1
+        try:
+            st = os.stat(self._path(user_id))
+        except FileNotFoundError:
+            return '0'
+        return f'{st.st_ino:x}.{st.st_size:x}.{st.st_mtime_ns:x}'
+
+    def bump(self, user_id):
+        """Marca que los datos del usuario cambiaron"""
+        path = self._path(user_id)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            os.write(fd, b'.')
+        finally:
+            os.close(fd)
+        if size + 1 >= self.max_bytes:
+            tmp_file = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(b'.')
+            os.replace(tmp_file, path)
+        self._metrics['bumps'] += 1
+
+    def etag(self, user_id, *parts):
+        """ETag fuerte: usuario + versión de sus datos + lo que varía la respuesta (mes, query...)"""
+        return '-'.join([user_id or '_', self.get(user_id), *(str(part) for part in parts)])
+
+    def record_not_modified(self):
+        self._metrics['not_modified'] += 1
+
+    def stats(self):
+        m = dict(self._metrics)
+        m['pid'] = os.getpid()
+        return m
@@ -0,0 +1,14 @@
+"""
+Hooks de gunicorn para el contador de tickets
+gunicorn carga ./gunicorn.conf.py automáticamente; los parámetros del
+Dockerfile (workers, timeout, logs) siguen viniendo de la línea de comandos.
+"""
+
+
+def worker_exit(server, worker):
+    """Vuelca los guardados pendientes antes de que el worker termine (SIGTERM)"""
+    try:
+        import app
+        app.flush_pending_writes()
+    except Exception as e:
+        server.log.error(f"Error volcando guardados pendientes: {e}")
@@ -0,0 +1,317 @@
+"""
+Cliente y conteo de tickets de Jira
+- Cliente HTTP compartido: pool keep-alive por URL base, reintentos con backoff
+  que respetan Retry-After y circuit breaker por host
+- Reglas de clasificación pendiente/resuelto configurables por usuario
+- Modo totales: consultas maxResults=0 por statusCategory (sólo se transfieren los totales)
+- Modo escaneo: paginación pidiendo sólo el campo status cuando no hay totales
+"""
+
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Reglas por defecto (compatibles con el comportamiento original: subcadenas del nombre del estado)
+DEFAULT_RESOLVED_STATUSES = ('done', 'resolved', 'closed')
+SCAN_PAGE_SIZE = 100
+
+_ORDER_BY = re.compile(r'\s+ORDER\s+BY\s+.*$', re.IGNORECASE | re.DOTALL)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """El circuit breaker del host está abierto: se falla sin llamar a Jira"""
+
+
+class _CappedRetry(Retry):
+    """Retry que respeta Retry-After pero sin esperar más de max_retry_after segundos"""
+
+    max_retry_after = 30
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+class CircuitBreaker:
+    """Abre el circuito tras `threshold` fallos seguidos y lo mantiene `cooldown` segundos"""
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Indica si se puede llamar al host (en half-open sólo pasa una prueba)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._half_open_probe:
+                self._half_open_probe = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._half_open_probe = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._half_open_probe = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+def request_outcome(status=None, error=None):
+    """Resultado de una llamada a Jira para las métricas"""
+    if error or status is None:
+        return 'error'
+    if status == 429:
+        return 'throttled'
+    if status >= 500:
+        return 'server_error'
+    if status >= 400:
+        return 'client_error'
+    return 'ok'
+
+
+class JiraHttpClient:
+    """Sesiones HTTP reutilizables por URL base de Jira, con reintentos y circuit breaker"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, pool_size=10, retries=3, backoff_factor=0.5, timeout=15,
+                 breaker_threshold=5, breaker_cooldown=30, max_retry_after=30, on_request=None):
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.max_retry_after = max_retry_after
+        # on_request(segundos, outcome) tras cada llamada (métricas)
+        self.on_request = on_request
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._breakers = {}
+        self._metrics = {}
+
+    @staticmethod
+    def _host_key(url):
+        parts = urlsplit(url)
+        return f'{parts.scheme}://{parts.netloc}'
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                retry = _CappedRetry(
+                    total=self.retries,
+                    connect=self.retries,
+                    # Un timeout de lectura no se reintenta: se informa como tal al usuario
+                    read=False,
+                    status=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=self.RETRY_STATUSES,
+                    allowed_methods=frozenset(['GET']),
+                    respect_retry_after_header=True,
+                    raise_on_status=False
+                )
+                retry.max_retry_after = self.max_retry_after
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount(host, adapter)
+                self._sessions[host] = session
+                self._breakers[host] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+                self._metrics[host] = {
+                    'requests': 0,
+                    'errors': 0,
+                    'retries': 0,
+                    'circuit_rejections': 0,
+                    'latency_seconds': 0.0,
+                    'latency_max_seconds': 0.0,
+                    'status': {},
+                }
+            return session
+
+    def _record(self, host, elapsed, status=None, error=None, retries=0):
+        with self._lock:
+            m = self._metrics[host]
+            m['requests'] += 1
+            m['retries'] += retries
+            m['latency_seconds'] += elapsed
+            m['latency_max_seconds'] = max(m['latency_max_seconds'], elapsed)
+            key = str(status) if status is not None else error
+            m['status'][key] = m['status'].get(key, 0) + 1
+            if error or (status is not None and status >= 500) or status == 429:
+                m['errors'] += 1
+        if self.on_request:
+            self.on_request(elapsed, request_outcome(status, error))
+
+    def get(self, url, auth=None, params=None, headers=None):
+        """GET a Jira. Lanza CircuitOpenError si el host está caído (circuito abierto)."""
+        host = self._host_key(url)
+        session = self._session(host)
+        breaker = self._breakers[host]
+        if not breaker.allow():
+            with self._lock:
+                self._metrics[host]['circuit_rejections'] += 1
+            if self.on_request:
+                self.on_request(0.0, 'circuit_open')
+            raise CircuitOpenError(f'Circuito abierto para {host}')
+        start = time.perf_counter()
+        try:
+            response = session.get(url, auth=auth, params=params, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._record(host, time.perf_counter() - start, error=type(e).__name__)
+            breaker.record_failure()
+            raise
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', ()) or ()
+        self._record(host, time.perf_counter() - start, status=response.status_code, retries=len(retries))
+        if response.status_code >= 500 or response.status_code == 429:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def stats(self):
+        """Latencia, errores y estado del circuito por host"""
+        with self._lock:
+            hosts = {}
+            for host, m in self._metrics.items():
+                data = dict(m)
+                data['status'] = dict(m['status'])
+                data['latency_avg_seconds'] = m['latency_seconds'] / m['requests'] if m['requests'] else 0.0
+                data['circuit'] = self._breakers[host].state
+                hosts[host] = data
+        return hosts
+
+
+class JiraResponseError(Exception):
+    """Jira respondió con un código distinto de 200"""
+
+    def __init__(self, response):
+        super().__init__(f'HTTP {response.status_code}')
+        self.response = response
+
+
+def classification_rules(config):
+    """Reglas de clasificación de la configuración del usuario.
+
+    "classification": {"resolved_categories": ["done"], "resolved_statuses": ["resuelto"]}
+    Un ticket está resuelto si su statusCategory está en resolved_categories o si el
+    nombre de su estado contiene alguna de las subcadenas de resolved_statuses.
+    """
+    rules = config.get('classification') or {}
+    categories = [c.lower() for c in rules.get('resolved_categories', [])]
+    if 'resolved_statuses' in rules:
+        statuses = [s.lower() for s in rules['resolved_statuses']]
+    else:
+        statuses = [] if categories else list(DEFAULT_RESOLVED_STATUSES)
+    return {'resolved_categories': categories, 'resolved_statuses': statuses}
+
+
+def is_resolved(status, rules):
+    """Clasifica un campo status de Jira según las reglas"""
+    status = status or {}
+    category = (status.get('statusCategory') or {}).get('key', '').lower()
+    if category and category in rules['resolved_categories']:
+        return True
+    name = status.get('name', '').lower()
+    return any(s in name for s in rules['resolved_statuses'])
+
+
+def strip_order_by(jql):
+    """Quita el ORDER BY (no afecta al conteo e impide combinar la JQL)"""
+    return _ORDER_BY.sub('', jql).strip()
+
+
+def _search(get, search_url, params):
+    response = get(search_url, params)
+    if response.status_code != 200:
+        raise JiraResponseError(response)
+    return response.json()
+
+
+def count_by_totals(get, search_url, jql, rules):
+    """Cuenta con dos consultas maxResults=0. Retorna (pendientes, resueltos, total) o None."""
+    if rules['resolved_statuses'] or not rules['resolved_categories']:
+        # Las subcadenas del nombre del estado no se pueden expresar en JQL
+        return None
+    base = strip_order_by(jql)
+    categories = ', '.join(f'"{c}"' for c in rules['resolved_categories'])
+    total = _search(get, search_url, {'jql': base, 'maxResults': 0, 'fields': 'none'}).get('total')
+    if total is None:
+        return None
+    resolved = _search(get, search_url, {
+        'jql': f'({base}) AND statusCategory IN ({categories})',
+        'maxResults': 0,
+        'fields': 'none'
+    }).get('total')
+    if resolved is None:
+        return None
+    return total - resolved, resolved, total
+
+
+def iter_issues(get, search_url, jql, fields, page_size=SCAN_PAGE_SIZE):
+    """Recorre todas las issues de la JQL pidiendo sólo los campos indicados"""
+    start_at = 0
+    next_page_token = None
+    while True:
+        params = {'jql': jql, 'maxResults': page_size, 'fields': fields}
+        if next_page_token:
+            params['nextPageToken'] = next_page_token
+        else:
+            params['startAt'] = start_at
+        data = _search(get, search_url, params)
+        issues = data.get('issues', [])
+        yield from issues
+        start_at += len(issues)
+        next_page_token = data.get('nextPageToken')
+        if not issues or data.get('isLast'):
+            return
+        total = data.get('total')
+        if total is not None and start_at >= total:
+            return
+        if total is None and not next_page_token and len(issues) < page_size:
+            return
+
+
+def count_by_scan(get, search_url, jql, rules, page_size=SCAN_PAGE_SIZE):
+    """Cuenta paginando con fields=status. Retorna (pendientes, resueltos, total)."""
+    pending = resolved = 0
+    for issue in iter_issues(get, search_url, strip_order_by(jql), 'status', page_size):
+        if is_resolved(issue.get('fields', {}).get('status'), rules):
+            resolved += 1
+        else:
+            pending += 1
+    return pending, resolved, pending + resolved
+
+
+def count_issues(get, search_url, jql, rules, page_size=SCAN_PAGE_SIZE):
+    """Conteo exacto: totales si las reglas lo permiten, si no escaneo paginado"""
+    counts = count_by_totals(get, search_url, jql, rules)
+    if counts is None:
+        counts = count_by_scan(get, search_url, jql, rules, page_size)
+    return counts
@@ -0,0 +1,150 @@
+"""
+Configuración de Jira por usuario
+- Se parsea una sola vez a un objeto tipado (URL, credenciales, JQL, reglas)
+- Caché por archivo invalidada por mtime (cambios de otros workers) o
+  explícitamente al guardar desde este worker
+"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from data_version import check_user_id
+from jira_client import SCAN_PAGE_SIZE, classification_rules
+
+DEFAULT_JQL = 'assignee = currentUser() AND status != Done'
+
+
+def config_fingerprint(config):
+    """Huella de la configuración (cambia si cambia URL, credenciales, JQL o clasificación)"""
+    token_hash = hashlib.sha256(config.get('api_token', '').encode()).hexdigest()
+    parts = [config.get('url', '').rstrip('/'), config.get('email', ''), token_hash, config.get('jql', ''),
+             json.dumps(config.get('classification'), sort_keys=True)]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class JiraConfig:
+    """Configuración de Jira ya parseada"""
+
+    url: str
+    email: str
+    api_token: str
+    jql: str
+    rules: dict
+    sync_mode: str = 'full'
+    page_size: int = SCAN_PAGE_SIZE
+    sync_interval: int = None
+    reconcile_interval: int = None
+    user_specific: bool = False
+    fingerprint: str = ''
+    raw: dict = field(default_factory=dict, repr=False, compare=False)
+
+    @classmethod
+    def from_dict(cls, raw, user_specific=False):
+        return cls(
+            url=raw.get('url', '').rstrip('/'),
+            email=raw.get('email', ''),
+            api_token=raw.get('api_token', ''),
+            jql=raw.get('jql', DEFAULT_JQL),
+            rules=classification_rules(raw),
+            sync_mode=raw.get('sync_mode') or 'full',
+            page_size=_int_or_none(raw.get('page_size')) or SCAN_PAGE_SIZE,
+            sync_interval=_int_or_none(raw.get('sync_interval')),
+            reconcile_interval=_int_or_none(raw.get('reconcile_interval')),
+            user_specific=user_specific,
+            fingerprint=config_fingerprint(raw),
+            raw=raw
+        )
+
+    @property
+    def complete(self):
+        return all([self.url, self.email, self.api_token])
+
+    @property
+    def auth(self):
+        return (self.email, self.api_token)
+
+    @property
+    def search_url(self):
+        return f'{self.url}/rest/api/3/search'
+
+    def public_dict(self):
+        """Configuración tal como se guardó, sin el token"""
+        safe_config = {k: v for k, v in self.raw.items() if k != 'api_token'}
+        safe_config['configured'] = True
+        safe_config['user_specific'] = self.user_specific
+        return safe_config
+
+
+class JiraConfigCache:
+    """Configuraciones parseadas por archivo, revalidadas con stat en cada acceso"""
+
+    def __init__(self, data_dir, global_file):
+        self.data_dir = Path(data_dir)
+        self.global_file = Path(global_file)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._metrics = {'hits': 0, 'loads': 0, 'invalidations': 0}
+
+    def path_for(self, user_id=None):
+        if user_id:
+            return self.data_dir / f'jira_config_{check_user_id(user_id)}.json'
+        return self.global_file
+
+    def _load(self, path, user_specific):
+        """Configuración del archivo (o None si no existe); sólo se parsea si cambió"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached and cached[0] == stamp:
+                self._metrics['hits'] += 1
+                return cached[1]
+        with open(path, 'r', encoding='utf-8') as f:
+            config = JiraConfig.from_dict(json.load(f), user_specific)
+        with self._lock:
+            self._entries[path] = (stamp, config)
+            self._metrics['loads'] += 1
+        return config
+
+    def get(self, user_id=None):
+        """Configuración del usuario o, si no tiene, la global (o None)"""
+        if user_id:
+            config = self._load(self.path_for(user_id), True)
+            if config:
+                return config
+        return self._load(self.global_file, False)
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if self._entries.pop(self.path_for(user_id), None):
+                self._metrics['invalidations'] += 1
+
+    def save(self, user_id, raw):
+        """Guarda la configuración (escritura atómica) e invalida la caché"""
+        path = self.path_for(user_id)
+        tmp_file = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(raw, f, separators=(',', ':'), ensure_ascii=False)
+        os.replace(tmp_file, path)
+        self.invalidate(user_id)
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['entries'] = len(self._entries)
+        return m
@@ -0,0 +1,376 @@
+"""
+Caché de sincronización con Jira y planificador en segundo plano
+- /api/data devuelve el último resultado de Jira al instante, con su antigüedad
+- Un planificador refresca las entradas según el intervalo de cada usuario,
+  con jitter, backoff exponencial en errores y un máximo de refrescos simultáneos
+- Sólo un worker por máquina ejecuta el planificador (lock de archivo)
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def visible_result(entry):
+    """Lo que ve el usuario de una entrada: contadores y error (lastSync cambia en cada refresco)"""
+    result = {k: v for k, v in (entry.get('result') or {}).items() if k != 'lastSync'}
+    return result, entry.get('error')
+
+
+class JiraSyncCache:
+    """Resultados de Jira por usuario+configuración, compartidos entre workers vía disco"""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    @staticmethod
+    def key_for(user_id, config):
+        return hashlib.sha256(f'{user_id or ""}|{config.fingerprint}'.encode()).hexdigest()[:24]
+
+    def _path(self, key):
+        return self.cache_dir / f'{key}.json'
+
+    def read(self, key):
+        """Lee una entrada (releyendo el disco sólo si otro worker la modificó)"""
+        path = self._path(key)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == stamp:
+                return dict(cached[1])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception:
+            return None
+        with self._lock:
+            self._entries[key] = (stamp, entry)
+        return dict(entry)
+
+    def write(self, key, entry):
+        """Escritura atómica de una entrada"""
+        path = self._path(key)
+        tmp_file = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        os.replace(tmp_file, path)
+        st = os.stat(path)
+        with self._lock:
+            self._entries[key] = ((st.st_ino, st.st_mtime_ns), dict(entry))
+
+    def remove(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def keys(self):
+        return [path.stem for path in self.cache_dir.glob('*.json')]
+
+
+class JiraSyncScheduler:
+    """Refresca en segundo plano las entradas de la caché que vencen"""
+
+    def __init__(self, cache, fetch, load_config, default_interval=300, max_concurrency=4,
+                 max_backoff=3600, active_window=86400, jitter=0.1, tick=5, on_update=None):
+        self.cache = cache
+        # fetch(user_id, config) -> (datos, None) o (None, mensaje_error)
+        self.fetch = fetch
+        # load_config(user_id) -> JiraConfig vigente (o None)
+        self.load_config = load_config
+        # on_update(user_id) cuando cambia el resultado guardado de un usuario
+        self.on_update = on_update
+        self.default_interval = default_interval
+        self.max_concurrency = max_concurrency
+        self.max_backoff = max_backoff
+        self.active_window = active_window
+        self.jitter = jitter
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._started_pid = None
+        self._leader_file = None
+        self._executor = None
+        self._metrics = {
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'refresh_seconds': 0.0,
+            'skipped_concurrency': 0,
+            'leader': False,
+        }
+
+    # --- Cálculo de tiempos ---
+
+    def _interval_for(self, config):
+        if config.sync_interval is None:
+            return self.default_interval
+        return max(30, config.sync_interval)
+
+    def _with_jitter(self, seconds):
+        return seconds + random.uniform(0, seconds * self.jitter)
+
+    def _next_after_success(self, config):
+        return time.time() + self._with_jitter(self._interval_for(config))
+
+    def _next_after_error(self, config, failures):
+        backoff = min(self._interval_for(config) * (2 ** failures), self.max_backoff)
+        return time.time() + self._with_jitter(backoff)
+
+    # --- Acceso desde las rutas ---
+
+    def lookup(self, user_id, config):
+        """Último resultado para el usuario (o None) y registra el interés en refrescarlo"""
+        key = self.cache.key_for(user_id, config)
+        entry = self.cache.read(key)
+        now = time.time()
+        if entry is None:
+            # Primera vez: que el planificador lo refresque cuanto antes
+            self.cache.write(key, {
+                'user_id': user_id,
+                'result': None,
+                'error': None,
+                'fetched_at': None,
+                'failures': 0,
+                'next_refresh': 0,
+                'last_requested': now
+            })
+            self.ensure_started()
+            return None
+        if now - entry.get('last_requested', 0) > 60:
+            entry['last_requested'] = now
+            self.cache.write(key, entry)
+        self.ensure_started()
+        if not entry.get('result'):
+            return None
+        result = dict(entry['result'])
+        result['age'] = round(now - entry['fetched_at'], 1)
+        result['stale'] = result['age'] > self._interval_for(config) * 2
+        if entry.get('error'):
+            result['lastError'] = entry['error']
+        return result
+
+    def result_version(self, user_id, config):
+        """Marca del último resultado guardado: cambia con cada refresco correcto (lastSync)"""
+        entry = self.cache.read(self.cache.key_for(user_id, config))
+        return entry.get('fetched_at') if entry else None
+
+    def refresh_now(self, user_id, config):
+        """Refresco forzado (/api/jira/sync): consulta Jira y guarda el resultado"""
+        key = self.cache.key_for(user_id, config)
+        return self._refresh(key, user_id, config)
+
+    # --- Refresco ---
+
+    def _refresh(self, key, user_id, config):
+        start = time.perf_counter()
+        try:
+            data, error_msg = self.fetch(user_id, config)
+        except Exception as e:
+            data, error_msg = None, f'Error inesperado: {str(e)}'
+        self.store_result(user_id, config, data, error_msg, time.perf_counter() - start, key)
+        return data, error_msg
+
+    def store_result(self, user_id, config, data, error_msg, elapsed=0.0, key=None):
+        """Guarda el resultado de una consulta a Jira y programa el siguiente refresco"""
+        key = key or self.cache.key_for(user_id, config)
+        entry = self.cache.read(key) or {'user_id': user_id, 'result': None, 'fetched_at': None}
+        entry.setdefault('last_requested', time.time())
+        previous = visible_result(entry)
+        if data:
+            entry.update({
+                'result': data,
+                'error': None,
+                'fetched_at': time.time(),
+                'failures': 0,
+                'next_refresh': self._next_after_success(config)
+            })
+        else:
+            failures = entry.get('failures', 0) + 1
+            entry.update({
+                'error': error_msg,
+                'failures': failures,
+                'next_refresh': self._next_after_error(config, failures)
+            })
+        self.cache.write(key, entry)
+        # Un refresco que no cambia contadores ni error no invalida los ETags del usuario
+        if self.on_update and visible_result(entry) != previous:
+            self.on_update(user_id)
+        with self._lock:
+            self._metrics['refreshes'] += 1
+            self._metrics['refresh_seconds'] += elapsed
+            if not data:
+                self._metrics['refresh_errors'] += 1
+
+    def _run_one(self, key, user_id, config):
+        try:
+            self._refresh(key, user_id, config)
+        except Exception as e:
+            logger.error(f"Error refrescando Jira ({key}): {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+
+    def run_due(self):
+        """Lanza los refrescos vencidos respetando el máximo de concurrencia"""
+        now = time.time()
+        for key in self.cache.keys():
+            entry = self.cache.read(key)
+            if not entry:
+                continue
+            if now - entry.get('last_requested', 0) > self.active_window:
+                # Nadie la consulta hace tiempo: se deja de refrescar y se borra
+                self.cache.remove(key)
+                continue
+            if entry.get('next_refresh', 0) > now:
+                continue
+            user_id = entry.get('user_id')
+            config = self.load_config(user_id)
+            if not config or self.cache.key_for(user_id, config) != key:
+                # La configuración cambió o se eliminó: la entrada quedó huérfana
+                self.cache.remove(key)
+                continue
+            with self._lock:
+                if key in self._in_flight:
+                    continue
+                if len(self._in_flight) >= self.max_concurrency:
+                    self._metrics['skipped_concurrency'] += 1
+                    return
+                self._in_flight.add(key)
+            self._executor.submit(self._run_one, key, user_id, config)
+
+    # --- Ciclo de vida ---
+
+    def _try_become_leader(self):
+        """Sólo un worker ejecuta el planificador; el lock se libera al morir el proceso"""
+        lock_file = open(self.cache.cache_dir / '.scheduler.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._leader_file = lock_file
+        return True
+
+    def _loop(self):
+        while True:
+            if self._leader_file is None and self._try_become_leader():
+                self._metrics['leader'] = True
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                    thread_name_prefix='jira-sync')
+                logger.info(f"Planificador de Jira activo en el worker {os.getpid()}")
+            if self._leader_file is not None:
+                try:
+                    self.run_due()
+                except Exception as e:
+                    logger.error(f"Error en el planificador de Jira: {e}")
+            time.sleep(self.tick)
+
+    def ensure_started(self):
+        """Arranca el hilo del planificador en este proceso (tras el fork de gunicorn)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+        threading.Thread(target=self._loop, name='jira-scheduler', daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['in_flight'] = len(self._in_flight)
+        m['max_concurrency'] = self.max_concurrency
+        m['pid'] = os.getpid()
+        return m
+
+
+class JiraIssueMirror:
+    """Espejo local de issues (clave -> estado, updated) por usuario+configuración"""
+
+    def __init__(self, mirror_dir):
+        self.mirror_dir = Path(mirror_dir)
+        self.mirror_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.mirror_dir / f'{key}.json'
+
+    def load(self, key):
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, key, mirror):
+        path = self._path(key)
+        tmp_file = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(mirror, f, separators=(',', ':'))
+        os.replace(tmp_file, path)
+
+
+def _mirror_row(issue):
+    fields = issue.get('fields') or {}
+    status = fields.get('status') or {}
+    return {
+        'status': status.get('name', ''),
+        'category': (status.get('statusCategory') or {}).get('key', ''),
+        'updated': fields.get('updated')
+    }
+
+
+def sync_mirror(mirror, iter_issues, jql, reconcile_interval=21600, overlap_minutes=5):
+    """Actualiza el espejo: carga completa (o reconciliación periódica) o incremental.
+
+    iter_issues(jql, fields) recorre las issues de una JQL.
+    La incremental pide sólo `updated >= -Nm` (relativo, independiente de la zona horaria
+    del usuario en Jira) y además quita del espejo las issues recién actualizadas que
+    ya no cumplen la JQL (p. ej. resueltas con `status != Done`).
+    """
+    now = time.time()
+    fields = 'status,updated'
+    if not mirror or now - mirror.get('lastFull', 0) >= reconcile_interval:
+        issues = {issue['key']: _mirror_row(issue) for issue in iter_issues(jql, fields)}
+        return {'issues': issues, 'lastSync': now, 'lastFull': now, 'mode': 'full'}
+
+    minutes = int((now - mirror['lastSync']) // 60) + overlap_minutes
+    issues = dict(mirror['issues'])
+    for issue in iter_issues(f'({jql}) AND updated >= -{minutes}m', fields):
+        issues[issue['key']] = _mirror_row(issue)
+    projects = sorted({key.rsplit('-', 1)[0] for key in issues})
+    if projects:
+        project_list = ', '.join(f'"{p}"' for p in projects)
+        exits_jql = f'project IN ({project_list}) AND updated >= -{minutes}m AND NOT ({jql})'
+        for issue in iter_issues(exits_jql, 'status'):
+            issues.pop(issue['key'], None)
+    return {'issues': issues, 'lastSync': now, 'lastFull': mirror['lastFull'], 'mode': 'incremental'}
+
+
+def count_mirror(mirror, is_resolved):
+    """Cuenta pendientes/resueltos localmente a partir del espejo"""
+    pending = resolved = 0
+    for row in mirror['issues'].values():
+        status = {'name': row.get('status', ''), 'statusCategory': {'key': row.get('category', '')}}
+        if is_resolved(status):
+            resolved += 1
+        else:
+            pending += 1
+    return pending, resolved, pending + resolved
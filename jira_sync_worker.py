@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Sincronización masiva con Jira para todo el equipo
+- Recorre las configuraciones por usuario (data/jira_config_*.json) y los usuarios con
+  entradas en la caché de sincronización (que pueden usar la configuración global)
+- Agrupa las configuraciones equivalentes (misma URL, credenciales, JQL y clasificación):
+  cada grupo se consulta una sola vez y el resultado se guarda para todos sus usuarios
+- Las consultas distintas se ejecutan en paralelo con un máximo de hilos
+- Pensado para ejecutarse periódicamente (cron) junto a los workers de gunicorn
+"""
+
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# services.py no importa la app web: no se registran rutas ni se cargan sesiones
+from services import (DATA_DIR, JIRA_SYNC_CONCURRENCY, fetch_jira_tickets, jira_configs,
+                      jira_scheduler, jira_sync_cache)
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PREFIX = 'jira_config_'
+
+
+def configured_users():
+    """Usuarios con configuración propia o con una entrada en la caché de sincronización"""
+    users = {path.stem[len(CONFIG_PREFIX):] for path in DATA_DIR.glob(f'{CONFIG_PREFIX}*.json')}
+    for key in jira_sync_cache.keys():
+        entry = jira_sync_cache.read(key)
+        if entry and entry.get('user_id'):
+            users.add(entry['user_id'])
+    return sorted(users)
+
+
+def group_configs(user_ids):
+    """Agrupa los usuarios por huella de configuración: {huella: (config, [usuarios])}"""
+    groups = {}
+    for user_id in user_ids:
+        config = jira_configs.get(user_id)
+        if not config or not config.complete:
+            continue
+        groups.setdefault(config.fingerprint, (config, []))[1].append(user_id)
+    return groups
+
+
+def sync_group(config, user_ids):
+    """Consulta Jira una vez y guarda el resultado para cada usuario del grupo"""
+    start = time.perf_counter()
+    try:
+        data, error_msg = fetch_jira_tickets(user_ids[0], config)
+    except Exception as e:
+        data, error_msg = None, f'Error inesperado: {str(e)}'
+    elapsed = time.perf_counter() - start
+    for user_id in user_ids:
+        jira_scheduler.store_result(user_id, config, dict(data) if data else None, error_msg, elapsed)
+    return data, error_msg, elapsed
+
+
+def run(concurrency):
+    """Una pasada completa; retorna las métricas de la ejecución"""
+    start = time.perf_counter()
+    user_ids = configured_users()
+    groups = group_configs(user_ids)
+    users = sum(len(members) for _, members in groups.values())
+    errors = 0
+    query_seconds = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='jira-bulk') as executor:
+        futures = {
+            executor.submit(sync_group, config, members): (config, members)
+            for config, members in groups.values()
+        }
+        for future in as_completed(futures):
+            config, members = futures[future]
+            data, error_msg, elapsed = future.result()
+            query_seconds.append(elapsed)
+            if data:
+                logger.info(f"Jira {config.url}: {len(members)} usuario(s) en {elapsed:.2f}s")
+            else:
+                errors += 1
+                logger.warning(f"Jira {config.url}: {error_msg} ({len(members)} usuario(s))")
+    wall = time.perf_counter() - start
+    query_seconds.sort()
+    return {
+        'users': users,
+        'skipped_users': len(user_ids) - users,
+        'queries': len(groups),
+        'deduplicated': users - len(groups),
+        'errors': errors,
+        'concurrency': concurrency,
+        'seconds': round(wall, 3),
+        'queries_per_second': round(len(groups) / wall, 2) if wall > 0 else 0.0,
+        'users_per_second': round(users / wall, 2) if wall > 0 else 0.0,
+        'query_seconds_max': round(query_seconds[-1], 3) if query_seconds else 0.0,
+        'query_seconds_median': round(query_seconds[len(query_seconds) // 2], 3) if query_seconds else 0.0
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sincronización masiva con Jira (consultas deduplicadas)')
+    parser.add_argument('--concurrency', type=int, default=JIRA_SYNC_CONCURRENCY,
+                        help='Máximo de consultas simultáneas a Jira (por defecto JIRA_SYNC_CONCURRENCY)')
+    parser.add_argument('--loop', type=float, default=0,
+                        help='Repetir cada N segundos (por defecto una sola pasada)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    while True:
+        print(json.dumps(run(args.concurrency)), flush=True)
+        if args.loop <= 0:
+            break
+        time.sleep(args.loop)
@@ -0,0 +1,208 @@
+"""
+Métricas en formato Prometheus (/metrics)
+- Contadores e histogramas en memoria por worker (un lock y un bisect por observación)
+- Cada worker vuelca su snapshot a data/metrics/<pid>-<arranque>.json en segundo plano;
+  /metrics suma los snapshots de todos los workers (los contadores son acumulados)
+- Los snapshots sin actualizar durante `retention` segundos (workers que ya no existen)
+  se borran al recolectar
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+IO_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# nombre -> (tipo, ayuda, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Peticiones HTTP por ruta, método y código', None),
+    'http_request_errors_total': ('counter', 'Peticiones HTTP con error (5xx) por ruta y método', None),
+    'http_request_duration_seconds': ('histogram', 'Duración de las peticiones HTTP por ruta', REQUEST_BUCKETS),
+    'session_lookup_seconds': ('histogram', 'Búsqueda de la sesión de un token (outcome: hit, miss)', IO_BUCKETS),
+    'month_cache_events_total': ('counter', 'Caché de meses de cada worker (event: hit, miss, eviction, '
+                                            'invalidation)', None),
+    'storage_operation_seconds': ('histogram', 'Lecturas y escrituras del almacenamiento por operación', IO_BUCKETS),
+    'jira_http_request_seconds': ('histogram', 'Llamadas HTTP a Jira (outcome: ok, client_error, throttled, '
+                                               'server_error, error, circuit_open)', REQUEST_BUCKETS),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metrics:
+    """Métricas de este worker, agregadas entre workers vía disco"""
+
+    def __init__(self, metrics_dir, flush_interval=5, retention=86400):
+        self.metrics_dir = Path(metrics_dir)
+        self.metrics_dir.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._counters = {}
+        # (nombre, labels) -> [cuenta por bucket..., +Inf, suma]
+        self._histograms = {}
+        self._started_pid = None
+        self._path = None
+
+    # --- Registro ---
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        index = bisect.bisect_left(buckets, seconds)
+        with self._lock:
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Mide el bloque; outcome = 'ok' o 'error' (o el que el bloque ponga en el dict)"""
+        labels.setdefault('outcome', 'ok')
+        start = time.perf_counter()
+        try:
+            yield labels
+        except Exception:
+            labels['outcome'] = 'error'
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed_methods(self, obj, name, methods):
+        """Envuelve métodos de una instancia para medirlos (label operation = método)"""
+        for method_name in methods:
+            method = getattr(obj, method_name)
+
+            def timed(*args, _method=method, _operation=method_name, **kwargs):
+                with self.timer(name, operation=_operation):
+                    return _method(*args, **kwargs)
+
+            setattr(obj, method_name, wraps(method)(timed))
+        return obj
+
+    # --- Snapshots entre workers ---
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'counters': [[name, dict(labels), value] for (name, labels), value in self._counters.items()],
+                'histograms': [[name, dict(labels), list(values)] for (name, labels), values in self._histograms.items()]
+            }
+
+    def flush(self):
+        """Escribe el snapshot de este worker (escritura atómica)"""
+        self.ensure_started()
+        tmp_file = self._path.with_name(f'{self._path.name}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.replace(tmp_file, self._path)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def ensure_started(self):
+        """Arranca el volcado periódico en este proceso (tras el fork de gunicorn)"""
+        if self._started_pid == os.getpid():
+            return
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            if self._started_pid is not None:
+                # Proceso hijo de un fork: empieza de cero con su propio archivo
+                self._counters.clear()
+                self._histograms.clear()
+            self._started_pid = os.getpid()
+            self._path = self.metrics_dir / f'{os.getpid()}-{int(time.time() * 1000):x}.json'
+        threading.Thread(target=self._loop, name='metrics-flush', daemon=True).start()
+
+    def collect(self):
+        """Suma los snapshots de todos los workers: (contadores, histogramas, workers)"""
+        self.flush()
+        counters = {}
+        histograms = {}
+        workers = 0
+        now = time.time()
+        for path in self.metrics_dir.glob('*.json'):
+            try:
+                if now - path.stat().st_mtime > self.retention:
+                    path.unlink()
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            workers += 1
+            for name, labels, value in snapshot.get('counters', []):
+                key = (name, _label_key(labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot.get('histograms', []):
+                if name not in METRICS or len(values) != len(METRICS[name][2]) + 2:
+                    continue
+                key = (name, _label_key(labels))
+                current = histograms.get(key)
+                histograms[key] = list(values) if current is None else [a + b for a, b in zip(current, values)]
+        return counters, histograms, workers
+
+    def render(self):
+        """Texto de exposición de Prometheus con los valores de todos los workers"""
+        counters, histograms, workers = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            for (metric, labels), values in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), values[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        lines.append('# HELP metrics_workers Workers cuyos snapshots se sumaron')
+        lines.append('# TYPE metrics_workers gauge')
+        lines.append(f'metrics_workers {workers}')
+        return '\n'.join(lines) + '\n'
@@ -1,17 +1,48 @@
 #!/usr/bin/env python3
 """
 Script para migrar datos del formato antiguo al nuevo formato mensual
+- Sin argumentos: migra tickets-data.json al formato mensual (--legacy-user EMAIL lo
+  guarda en el directorio de ese usuario en lugar del fallback sin usuario de data/)
+- --import-sqlite: importa los archivos tickets-*.json a la base SQLite
+- --bulk: recorre todo data/ (usuarios, meses, jira_config_*, sesiones), convierte los
+  meses antiguos al formato compacto con un pool de procesos y reconstruye los índices
+  de resumen; el progreso se guarda en data/.migration-checkpoint.json y una ejecución
+  interrumpida continúa donde quedó (--check sólo valida, sin escribir nada)
 """
 
+import argparse
+import hashlib
 import json
 import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 
-def migrate():
+from data_version import DataVersions
+from jira_config import JiraConfig
+from session_store import SessionStore
+from storage import JsonStorage, SqliteStorage, import_json_to_sqlite
+
+CHECKPOINT_FILE = '.migration-checkpoint.json'
+# Como mucho un checkpoint por intervalo (segundos): las unidades son idempotentes, así que
+# tras una interrupción sólo se repite lo procesado desde el último guardado
+CHECKPOINT_INTERVAL = 1.0
+GLOBAL_UNIT = '_'
+
+
+def user_id_for(email):
+    """Mismo identificador que asigna /api/auth/login"""
+    return hashlib.sha256(email.encode()).hexdigest()[:16]
+
+
+def migrate(user_email=None):
     old_file = Path('tickets-data.json')
     data_dir = Path('data')
-    data_dir.mkdir(exist_ok=True)
+    users_dir = data_dir / 'users'
+    users_dir.mkdir(parents=True, exist_ok=True)
     
     if not old_file.exists():
         print("No se encontró tickets-data.json para migrar")
@@ -23,35 +54,23 @@ def migrate():
     with open(old_file, 'r', encoding='utf-8') as f:
         old_data = json.load(f)
     
-    # Crear archivo del mes actual
+    # Mes actual del usuario indicado (o del fallback sin usuario)
+    user_id = user_id_for(user_email) if user_email else None
     month = datetime.now().strftime('%Y-%m')
-    month_file = data_dir / f'tickets-{month}.json'
+    storage = JsonStorage(data_dir, users_dir)
     
-    # Crear estructura nueva
-    new_data = {
-        "pendingTickets": old_data.get('pendingTickets', 0),
-        "totalTickets": old_data.get('totalTickets', 0),
-        "resolvedTickets": old_data.get('resolvedTickets', 0),
-        "month": month,
-        "history": [{
-            "timestamp": datetime.now().isoformat(),
-            "action": "migrated_from_old_format",
+    # El historial existente del mes se conserva: el evento se añade al log
+    storage.record_event(
+        user_id,
+        month,
+        {
             "pendingTickets": old_data.get('pendingTickets', 0),
             "totalTickets": old_data.get('totalTickets', 0),
             "resolvedTickets": old_data.get('resolvedTickets', 0)
-        }]
-    }
-    
-    # Si el archivo del mes ya existe, preservar su historial
-    if month_file.exists():
-        with open(month_file, 'r', encoding='utf-8') as f:
-            existing_data = json.load(f)
-            if 'history' in existing_data:
-                new_data['history'] = existing_data['history'] + new_data['history']
-    
-    # Guardar nuevo formato
-    with open(month_file, 'w', encoding='utf-8') as f:
-        json.dump(new_data, f, indent=2, ensure_ascii=False)
+        },
+        "migrated_from_old_format"
+    )
+    DataVersions(data_dir / 'versions').bump(user_id)
     
     # Hacer backup del archivo antiguo
     backup_file = Path('tickets-data.json.backup')
@@ -59,8 +78,249 @@ def migrate():
         backup_file.unlink()
     old_file.rename(backup_file)
     
-    print(f"✓ Datos migrados exitosamente a data/tickets-{month}.json")
+    print(f"✓ Datos migrados exitosamente a {storage.month_path(user_id, month)}")
     print(f"✓ Archivo antiguo renombrado a tickets-data.json.backup")
 
+def migrate_to_sqlite(db_path):
+    """Importa todos los meses en JSON (data/ y data/users/*) a SQLite"""
+    data_dir = Path('data')
+    users_dir = data_dir / 'users'
+    users_dir.mkdir(parents=True, exist_ok=True)
+    
+    print(f"Importando meses JSON a {db_path}...")
+    imported = import_json_to_sqlite(JsonStorage(data_dir, users_dir), SqliteStorage(db_path))
+    print(f"✓ {imported} meses importados")
+    print("✓ Usa STORAGE_BACKEND=sqlite para activar el nuevo almacenamiento")
+
+# --- Migración masiva ---
+
+def migrate_user(data_dir, user_id, check=False):
+    """Convierte (o sólo valida) todos los meses de un usuario; se ejecuta en el pool de procesos"""
+    data_dir = Path(data_dir)
+    storage = JsonStorage(data_dir, data_dir / 'users')
+    base_dir = data_dir / 'users' / user_id if user_id else data_dir
+    result = {'files': 0, 'bytes': 0, 'months': 0, 'upgraded': 0, 'legacy': 0, 'events': 0,
+              'invalid_lines': 0, 'errors': []}
+    months = sorted(path.name[len('tickets-'):-len('.json')] for path in base_dir.glob('tickets-*.json'))
+    for month in months:
+        for path in (storage.month_path(user_id, month), storage.history_path(user_id, month)):
+            try:
+                result['bytes'] += path.stat().st_size
+                result['files'] += 1
+            except FileNotFoundError:
+                pass
+        try:
+            report = storage.verify_month(user_id, month)
+            if report['invalid_counters']:
+                result['errors'].append(f"{month}: contadores no numéricos {report['invalid_counters']}")
+            result['events'] += report['events']
+            result['invalid_lines'] += report['invalid_lines']
+            if report['legacy']:
+                result['legacy'] += 1
+                if not check and storage.upgrade_month(user_id, month):
+                    result['upgraded'] += 1
+        except Exception as e:
+            result['errors'].append(f'{month}: {e}')
+        result['months'] += 1
+    if months and not check:
+        # El índice de resumen es derivado: se reconstruye desde los meses ya convertidos
+        storage.reindex(user_id)
+    return result
+
+
+def _ignore_sigint():
+    # Ctrl+C lo gestiona el proceso principal: los workers terminan el usuario en curso
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def validate_jira_config(path, check=False):
+    """Valida una configuración de Jira y la reescribe en JSON compacto si hace falta"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    raw = json.loads(text)
+    if not isinstance(raw, dict):
+        raise ValueError('no es un objeto JSON')
+    JiraConfig.from_dict(raw)
+    compact = json.dumps(raw, separators=(',', ':'), ensure_ascii=False)
+    if check or compact == text:
+        return False
+    tmp_file = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(compact)
+    os.replace(tmp_file, path)
+    return True
+
+
+def compact_sessions(data_dir, check=False):
+    """Valida las sesiones y compacta snapshot + journal (descarta las expiradas)"""
+    ttl_seconds = int(float(os.environ.get('SESSION_TTL_DAYS', '30')) * 86400)
+    store = SessionStore(data_dir / 'sessions.json', journal_path=data_dir / 'sessions.journal',
+                         ttl_seconds=ttl_seconds)
+    sessions = store.load_all()
+    if not check:
+        store.compact()
+    return len(sessions)
+
+
+def _load_checkpoint(path, mode, restart):
+    """Progreso de una ejecución anterior del mismo modo sin terminar (o uno nuevo)"""
+    if not restart:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('mode') == mode and not checkpoint.get('finished'):
+                return checkpoint
+        except (FileNotFoundError, ValueError):
+            pass
+    return {'mode': mode, 'started': datetime.now().isoformat(), 'finished': False, 'done': [],
+            'totals': {'files': 0, 'bytes': 0, 'months': 0, 'upgraded': 0, 'legacy': 0, 'events': 0,
+                       'invalid_lines': 0, 'jira_configs': 0, 'sessions': 0, 'errors': 0}}
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp_file = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, separators=(',', ':'))
+    os.replace(tmp_file, path)
+
+
+def bulk_migrate(data_dir='data', workers=None, check=False, restart=False, progress_interval=5):
+    """Recorre data/ completo con un pool de procesos; retorna los totales de la ejecución"""
+    data_dir = Path(data_dir)
+    users_dir = data_dir / 'users'
+    users_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = data_dir / CHECKPOINT_FILE
+    checkpoint = _load_checkpoint(checkpoint_path, 'check' if check else 'migrate', restart)
+    done = set(checkpoint['done'])
+    totals = checkpoint['totals']
+    # Las unidades que fallaron no quedaron en el checkpoint y se reintentan: sus errores se recuentan
+    totals['errors'] = 0
+    resumed = bool(done)
+    if resumed:
+        print(f"Continuando la ejecución del {checkpoint['started']}: {len(done)} unidades ya procesadas")
+
+    user_units = [GLOBAL_UNIT] + sorted(path.name for path in users_dir.iterdir() if path.is_dir())
+    user_units = [unit for unit in user_units if f'user:{unit}' not in done]
+    jira_files = sorted(data_dir.glob('jira_config_*.json'))
+    if Path('jira_config.json').exists():
+        jira_files.append(Path('jira_config.json'))
+    jira_files = [path for path in jira_files if f'jira:{path.name}' not in done]
+    total_units = len(user_units) + len(jira_files) + (0 if 'sessions' in done else 1)
+    versions = None if check else DataVersions(data_dir / 'versions')
+
+    start = time.monotonic()
+    run = {'units': 0, 'files': 0, 'bytes': 0}
+    last_report = last_save = start
+
+    def finish_unit(key, files=0, size=0, failed=False):
+        nonlocal last_report, last_save
+        if not failed:
+            done.add(key)
+            checkpoint['done'].append(key)
+        run['units'] += 1
+        run['files'] += files
+        run['bytes'] += size
+        now = time.monotonic()
+        if now - last_save >= CHECKPOINT_INTERVAL:
+            last_save = now
+            _save_checkpoint(checkpoint_path, checkpoint)
+        if now - last_report >= progress_interval:
+            last_report = now
+            elapsed = now - start
+            print(f"  {run['units']}/{total_units} unidades, {run['files']} archivos "
+                  f"({run['files'] / elapsed:.0f} archivos/s, {run['bytes'] / elapsed / 1048576:.1f} MB/s)",
+                  flush=True)
+
+    print(f"{'Validando' if check else 'Migrando'} {data_dir}: {total_units} unidades, "
+          f"{workers or os.cpu_count()} procesos")
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_ignore_sigint)
+    try:
+        futures = {
+            pool.submit(migrate_user, str(data_dir), None if unit == GLOBAL_UNIT else unit, check): unit
+            for unit in user_units
+        }
+        # Configuraciones de Jira y sesiones (pocos archivos pequeños) en este proceso
+        for path in jira_files:
+            try:
+                validate_jira_config(path, check)
+                totals['jira_configs'] += 1
+                failed = False
+            except Exception as e:
+                print(f"  ✗ {path}: {e}")
+                totals['errors'] += 1
+                failed = True
+            finish_unit(f'jira:{path.name}', 1, path.stat().st_size, failed)
+        if 'sessions' not in done:
+            try:
+                totals['sessions'] = compact_sessions(data_dir, check)
+                failed = False
+            except Exception as e:
+                print(f"  ✗ sesiones: {e}")
+                totals['errors'] += 1
+                failed = True
+            finish_unit('sessions', failed=failed)
+
+        for future in as_completed(futures):
+            unit = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'files': 0, 'bytes': 0, 'errors': [str(e)]}
+            for error in result['errors']:
+                print(f"  ✗ {unit}/{error}")
+            totals['errors'] += len(result['errors'])
+            if not result['errors']:
+                for key in ('files', 'bytes', 'months', 'upgraded', 'legacy', 'events', 'invalid_lines'):
+                    totals[key] += result[key]
+            if result.get('upgraded') and versions:
+                # Invalida ETags y cachés de los workers que tengan datos de este usuario
+                versions.bump(None if unit == GLOBAL_UNIT else unit)
+            finish_unit(f'user:{unit}', result['files'], result['bytes'], failed=bool(result['errors']))
+    except KeyboardInterrupt:
+        # Se descarta lo pendiente y se espera a los usuarios en curso; lo terminado queda
+        # en el checkpoint y la próxima ejecución sigue desde ahí
+        pool.shutdown(cancel_futures=True)
+        _save_checkpoint(checkpoint_path, checkpoint)
+        print(f"Interrumpido: {len(done)} unidades guardadas en {checkpoint_path}")
+        raise
+    pool.shutdown()
+
+    elapsed = time.monotonic() - start
+    checkpoint['finished'] = not totals['errors']
+    _save_checkpoint(checkpoint_path, checkpoint)
+    summary = dict(totals, seconds=round(elapsed, 3),
+                   files_per_second=round(run['files'] / elapsed, 1) if elapsed else 0.0,
+                   resumed=resumed)
+    print(json.dumps(summary))
+    return summary
+
 if __name__ == '__main__':
-    migrate()
+    parser = argparse.ArgumentParser(description='Migración de datos del contador de tickets')
+    parser.add_argument('--import-sqlite', action='store_true',
+                        help='Importar los archivos tickets-*.json a SQLite')
+    parser.add_argument('--db', default=os.environ.get('SQLITE_PATH', 'data/tickets.db'),
+                        help='Ruta de la base SQLite (por defecto data/tickets.db)')
+    parser.add_argument('--legacy-user', metavar='EMAIL',
+                        help='Usuario al que asignar tickets-data.json (por defecto, el fallback sin usuario)')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Convertir y validar todo data/ con un pool de procesos (reanudable)')
+    parser.add_argument('--check', action='store_true',
+                        help='Con --bulk: sólo validar, sin escribir')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Con --bulk: procesos del pool (por defecto, uno por CPU)')
+    parser.add_argument('--restart', action='store_true',
+                        help='Con --bulk: ignorar el checkpoint y empezar de cero')
+    args = parser.parse_args()
+
+    if args.import_sqlite:
+        migrate_to_sqlite(args.db)
+    elif args.bulk:
+        if args.legacy_user and not args.check:
+            migrate(args.legacy_user)
+        try:
+            summary = bulk_migrate(workers=args.workers, check=args.check, restart=args.restart)
+        except KeyboardInterrupt:
+            sys.exit(130)
+        sys.exit(1 if summary['errors'] else 0)
+    else:
+        migrate(args.legacy_user)
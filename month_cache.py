@@ -0,0 +1,127 @@
+"""
+Caché LRU de documentos de mes en cada worker
+- Guarda los meses ya leídos y parseados (por usuario, mes y límite de historial) hasta
+  max_bytes estimados en memoria; al superarlo descarta los menos usados
+- Cada entrada lleva la versión de datos del usuario (data/versions, un stat): cualquier
+  escritura de cualquier worker la cambia y la entrada deja de servirse
+- Entrega copias: los llamadores (p. ej. el buffer de escritura) modifican el documento
+"""
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Entradas de historial que se miden para estimar el tamaño de todo el historial
+SIZE_SAMPLE = 8
+
+
+def _deep_size(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(item) for item in value)
+    return size
+
+
+def document_size(data):
+    """Bytes aproximados del documento en memoria (el historial se estima con una muestra)"""
+    history = data.get('history') or []
+    size = _deep_size({k: v for k, v in data.items() if k != 'history'}) + sys.getsizeof(history)
+    if history:
+        step = max(1, len(history) // SIZE_SAMPLE)
+        sample = history[::step][:SIZE_SAMPLE]
+        size += sum(_deep_size(entry) for entry in sample) * len(history) // len(sample)
+    return size
+
+
+def copy_month(data):
+    """Copia que se puede modificar (contadores y lista de historial) sin tocar la caché"""
+    copy = dict(data)
+    if 'history' in copy:
+        copy['history'] = list(copy['history'])
+    return copy
+
+
+class MonthCache:
+    """Documentos de mes parseados, con límite de memoria e invalidación entre workers"""
+
+    def __init__(self, storage, version, max_bytes=32 * 1024 * 1024, on_event=None):
+        self.storage = storage
+        # version(user_id) -> marca que cambia con cada escritura del usuario en cualquier worker
+        self.version = version
+        self.max_bytes = max_bytes
+        # on_event(evento, cantidad) con 'hit', 'miss', 'eviction' o 'invalidation'
+        self.on_event = on_event
+        self._lock = threading.Lock()
+        # (usuario, mes, límite) -> (versión, documento, bytes)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._metrics = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'too_large': 0}
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _event(self, name, count=1):
+        if self.on_event and count:
+            self.on_event(name, count)
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._bytes -= entry[2]
+
+    def load(self, user_id, month, history_limit=None):
+        """Documento del mes (copia), desde la caché si la versión del usuario no cambió"""
+        if not self.enabled:
+            return self.storage.load_month(user_id, month, history_limit)
+        key = (user_id, month, history_limit or 0)
+        # La versión se lee antes que los datos: una escritura posterior siempre la cambia
+        stamp = self.version(user_id)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == stamp:
+                self._entries.move_to_end(key)
+                self._metrics['hits'] += 1
+                data = cached[1]
+            else:
+                data = None
+                self._metrics['misses'] += 1
+                if cached:
+                    self._discard(key)
+                    self._metrics['invalidations'] += 1
+        if data is not None:
+            self._event('hit')
+            return copy_month(data)
+        self._event('miss')
+        if cached:
+            self._event('invalidation')
+
+        data = self.storage.load_month(user_id, month, history_limit)
+        size = document_size(data)
+        evicted = 0
+        with self._lock:
+            self._discard(key)
+            if size > self.max_bytes:
+                self._metrics['too_large'] += 1
+            else:
+                self._entries[key] = (stamp, data, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                    self._bytes -= evicted_size
+                    evicted += 1
+                self._metrics['evictions'] += evicted
+        self._event('eviction', evicted)
+        return copy_month(data)
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['entries'] = len(self._entries)
+            m['bytes'] = self._bytes
+        m['max_bytes'] = self.max_bytes
+        m['pid'] = os.getpid()
+        return m
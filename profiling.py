@@ -0,0 +1,174 @@
+"""
+Perfilado opcional de peticiones con cProfile
+- Sólo existe si PROFILE_ENABLED está activo (si no, no se registra ningún hook)
+- Se perfila una fracción aleatoria de peticiones, las de ciertas rutas o usuarios, o las
+  que lo piden con la cabecera X-Profile (sólo administradores)
+- Cada perfil se guarda en data/profiles/ como pstats (.prof) o pilas colapsadas
+  (.collapsed, listas para flamegraph.pl / speedscope) más un .json con la petición y las
+  llamadas a almacenamiento y Jira; se conservan los últimos max_files
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import random
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+FORMATS = ('pstats', 'collapsed')
+# Módulos cuyas llamadas se resumen en el .json del perfil
+TRACKED_MODULES = ('storage.py', 'jira_client.py', 'jira_sync.py', 'jira_config.py')
+# Por debajo de este tiempo (segundos) no se emiten pilas colapsadas
+MIN_STACK_SECONDS = 0.000001
+MAX_STACK_DEPTH = 128
+
+_SLUG = re.compile(r'[^A-Za-z0-9]+')
+
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    # Carpeta + archivo para distinguir, p. ej., el app.py del proyecto del de flask
+    short = os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+    return f'{name} ({short}:{line})'
+
+
+def collapsed_stacks(stats):
+    """Pilas colapsadas ("a;b;c microsegundos") reconstruidas del grafo de llamadas de cProfile.
+
+    cProfile sólo guarda pares llamador -> llamado, así que el tiempo de cada función se
+    reparte entre sus llamadores en proporción al tiempo acumulado de cada llamada.
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller in callers:
+            callees.setdefault(caller, []).append(func)
+    roots = [func for func, entry in stats.items() if not entry[4]]
+    lines = {}
+
+    def walk(func, stack, weight):
+        _, _, self_time, total_time, _ = stats[func]
+        own = self_time * weight
+        if own >= MIN_STACK_SECONDS:
+            key = ';'.join(stack)
+            lines[key] = lines.get(key, 0) + own
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee in callees.get(func, ()):
+            callee_name = _frame_name(callee)
+            if callee_name in stack:
+                continue
+            edge_time = stats[callee][4][func][3]
+            callee_total = stats[callee][3]
+            if callee_total <= 0 or edge_time * weight < MIN_STACK_SECONDS:
+                continue
+            walk(callee, stack + [callee_name], edge_time * weight / callee_total)
+
+    for root in roots:
+        walk(root, [_frame_name(root)], 1.0)
+    return [f'{stack} {max(1, int(seconds * 1000000))}' for stack, seconds in sorted(lines.items())]
+
+
+def tracked_calls(stats):
+    """Llamadas a almacenamiento y Jira del perfil: [{función, llamadas, segundos}]"""
+    calls = []
+    for func, (_, ncalls, _, total_time, _) in stats.items():
+        if func[0].endswith(TRACKED_MODULES) and not func[2].startswith('<'):
+            calls.append({
+                'function': _frame_name(func),
+                'calls': ncalls,
+                'seconds': round(total_time, 6)
+            })
+    calls.sort(key=lambda call: call['seconds'], reverse=True)
+    return calls
+
+
+class RequestProfiler:
+    """Decide qué peticiones perfilar y guarda los perfiles en un directorio rotativo"""
+
+    def __init__(self, profiles_dir, sample_rate=0.0, routes=(), users=(), fmt='pstats', max_files=200):
+        self.profiles_dir = Path(profiles_dir)
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        self.sample_rate = sample_rate
+        self.routes = set(routes)
+        self.users = set(users)
+        self.fmt = fmt if fmt in FORMATS else 'pstats'
+        self.max_files = max_files
+        # Un solo perfil activo por proceso: en Python 3.12+ cProfile usa sys.monitoring,
+        # que es global al proceso
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._metrics = {'profiled': 0, 'skipped_busy': 0, 'dumps_removed': 0}
+
+    def wanted(self, route, user_id=None, forced=False):
+        """Indica si hay que perfilar esta petición"""
+        if forced or route in self.routes:
+            return True
+        if user_id and user_id in self.users:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        """Perfil activo para la petición, o None si ya hay otra perfilándose en el proceso"""
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self._metrics['skipped_busy'] += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Otro perfilador (p. ej. un depurador) ocupa el hook de este proceso
+            self._active.release()
+            return None
+        return profile
+
+    def stop(self, profile, info):
+        """Detiene el perfil y lo guarda; info describe la petición. Retorna el id del perfil."""
+        try:
+            profile.disable()
+        finally:
+            self._active.release()
+        stats = pstats.Stats(profile).stats
+        slug = _SLUG.sub('_', info.get('route', '')).strip('_') or 'root'
+        profile_id = f'{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{os.getpid()}-{slug}'
+        if self.fmt == 'collapsed':
+            with open(self.profiles_dir / f'{profile_id}.collapsed', 'w', encoding='utf-8') as f:
+                f.write('\n'.join(collapsed_stacks(stats)) + '\n')
+        else:
+            profile.dump_stats(str(self.profiles_dir / f'{profile_id}.prof'))
+        meta = dict(info, id=profile_id, format=self.fmt, pid=os.getpid(), calls=tracked_calls(stats))
+        with open(self.profiles_dir / f'{profile_id}.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        with self._lock:
+            self._metrics['profiled'] += 1
+        self._rotate()
+        return profile_id
+
+    def _rotate(self):
+        """Borra los perfiles más antiguos por encima de max_files"""
+        metas = sorted(self.profiles_dir.glob('*.json'))
+        for meta in metas[:max(0, len(metas) - self.max_files)]:
+            for path in self.profiles_dir.glob(f'{meta.stem}.*'):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._metrics['dumps_removed'] += 1
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+        m.update({
+            'sample_rate': self.sample_rate,
+            'routes': sorted(self.routes),
+            'users': sorted(self.users),
+            'format': self.fmt,
+            'pid': os.getpid()
+        })
+        return m
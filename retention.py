@@ -0,0 +1,183 @@
+"""
+Retención del historial de los meses cerrados
+- Los últimos raw_months meses cerrados conservan todos los eventos
+- Los siguientes hourly_months se resumen en un evento 'rollup' por hora y los más antiguos
+  en uno por día: eventos representados, creados, resueltos, resets y los contadores al
+  final del intervalo (las series temporales y los totales del mes no cambian)
+- Se ejecuta en segundo plano la primera vez que un usuario usa la app en un mes nuevo;
+  un archivo por usuario en data/retention/ (con lock) evita repetirlo en otros workers
+"""
+
+import fcntl
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from storage import COUNTER_KEYS, ROLLUP_ACTION
+from timeseries import iter_steps
+
+logger = logging.getLogger(__name__)
+
+# Longitud del prefijo del timestamp ISO que define cada intervalo
+TIERS = {'hour': 13, 'day': 10}
+
+
+def months_between(month, current_month):
+    """Meses de antigüedad de `month` respecto a `current_month` (YYYY-MM)"""
+    year, mon = map(int, month.split('-'))
+    current_year, current_mon = map(int, current_month.split('-'))
+    return (current_year - year) * 12 + current_mon - mon
+
+
+def rollup_history(entries, granularity):
+    """Resume el historial en un evento por intervalo (acepta eventos ya resumidos).
+
+    Creados y resueltos son los de iter_steps, así que las series temporales no cambian.
+    """
+    length = TIERS[granularity]
+    buckets = {}
+    for entry, created, resolved in iter_steps(entries):
+        timestamp = entry.get('timestamp', '')
+        key = timestamp[:length]
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {
+                'timestamp': timestamp,
+                'action': ROLLUP_ACTION,
+                'events': 0,
+                'created': 0,
+                'resolved': 0,
+                'resets': 0
+            }
+        if entry.get('action') == ROLLUP_ACTION:
+            bucket['events'] += entry.get('events', 0)
+            bucket['resets'] += entry.get('resets', 0)
+        else:
+            bucket['events'] += 1
+            if entry.get('action') == 'reset':
+                bucket['resets'] += 1
+        bucket['created'] += created or 0
+        bucket['resolved'] += resolved or 0
+        # Contadores al final del intervalo: los del último evento
+        bucket['timestamp'] = timestamp
+        for counter in COUNTER_KEYS:
+            if counter in entry:
+                bucket[counter] = entry[counter]
+    return [buckets[key] for key in sorted(buckets)]
+
+
+def is_rolled_up(data, history, granularity):
+    """Indica si el mes ya está resumido con esa granularidad (o una más gruesa)"""
+    if TIERS.get(data.get('retention'), 0) == 0 or TIERS[data['retention']] > TIERS[granularity]:
+        return False
+    return all(entry.get('action') == ROLLUP_ACTION for entry in history)
+
+
+class HistoryRetention:
+    """Resume el historial de los meses cerrados al empezar cada mes"""
+
+    def __init__(self, storage, marker_dir, raw_months=3, hourly_months=9, on_compact=None):
+        self.storage = storage
+        self.marker_dir = Path(marker_dir)
+        self.marker_dir.mkdir(parents=True, exist_ok=True)
+        # Al menos el último mes cerrado se conserva completo (puede recibir volcados tardíos)
+        self.raw_months = max(1, raw_months)
+        self.hourly_months = max(0, hourly_months)
+        # on_compact(user_id) cuando cambia el historial de algún mes del usuario
+        self.on_compact = on_compact
+        self._lock = threading.Lock()
+        self._checked = {}
+        self._in_flight = set()
+        self._metrics = {'runs': 0, 'months_compacted': 0, 'events_removed': 0, 'errors': 0}
+
+    def tier_for(self, month, current_month):
+        """'raw', 'hour' o 'day' según la antigüedad del mes"""
+        age = months_between(month, current_month)
+        if age <= self.raw_months:
+            return 'raw'
+        if age <= self.raw_months + self.hourly_months:
+            return 'hour'
+        return 'day'
+
+    def compact_month(self, user_id, month, granularity):
+        """Resume un mes; retorna cuántas entradas de historial eliminó.
+
+        La reescritura la hace el motor (bajo su lock o transacción): un volcado tardío que
+        llegue a la vez no se pierde.
+        """
+        def compact(data, history):
+            if not history or is_rolled_up(data, history, granularity):
+                return None
+            data['retention'] = granularity
+            return rollup_history(history, granularity)
+
+        return self.storage.compact_history(user_id, month, compact)
+
+    def compact_user(self, user_id, current_month=None):
+        """Aplica la retención a todos los meses cerrados del usuario"""
+        current_month = current_month or datetime.now().strftime('%Y-%m')
+        compacted = removed = 0
+        for month in sorted(self.storage.list_months(user_id)):
+            tier = self.tier_for(month, current_month)
+            if tier == 'raw':
+                continue
+            try:
+                count = self.compact_month(user_id, month, tier)
+            except Exception as e:
+                logger.error(f"Error aplicando retención a {user_id or '(sin usuario)'}/{month}: {e}")
+                with self._lock:
+                    self._metrics['errors'] += 1
+                continue
+            if count:
+                compacted += 1
+                removed += count
+        with self._lock:
+            self._metrics['runs'] += 1
+            self._metrics['months_compacted'] += compacted
+            self._metrics['events_removed'] += removed
+        if compacted and self.on_compact:
+            self.on_compact(user_id)
+        return {'months_compacted': compacted, 'events_removed': removed}
+
+    def _run(self, user_id, current_month):
+        """Aplica la retención si ningún worker lo hizo ya este mes"""
+        marker = self.marker_dir / (user_id or '_')
+        try:
+            with open(marker, 'a+', encoding='utf-8') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return  # otro worker la está aplicando
+                f.seek(0)
+                if f.read().strip() != current_month:
+                    self.compact_user(user_id, current_month)
+                    f.seek(0)
+                    f.truncate()
+                    f.write(current_month)
+        except Exception as e:
+            logger.error(f"Error en la retención de {user_id or '(sin usuario)'}: {e}")
+        finally:
+            with self._lock:
+                self._checked[user_id] = current_month
+                self._in_flight.discard(user_id)
+
+    def on_rollover(self, user_id, current_month=None):
+        """Llamado en cada lectura/escritura del mes actual: sólo trabaja con el primer acceso del mes"""
+        current_month = current_month or datetime.now().strftime('%Y-%m')
+        if self._checked.get(user_id) == current_month:
+            return
+        with self._lock:
+            if self._checked.get(user_id) == current_month or user_id in self._in_flight:
+                return
+            self._in_flight.add(user_id)
+        threading.Thread(target=self._run, args=(user_id, current_month),
+                         name='history-retention', daemon=True).start()
+
+    def stats(self):
+        with self._lock:
+            m = dict(self._metrics)
+            m['in_flight'] = len(self._in_flight)
+        m.update({'raw_months': self.raw_months, 'hourly_months': self.hourly_months, 'pid': os.getpid()})
+        return m
@@ -93,7 +93,9 @@ async function login(email) {
             updateUserHeader();
             
             // Cargar datos y inicializar la aplicación
+            await flushEventQueue();
             await loadData();
+            connectEvents();
             
             // Registrar event listeners de la aplicación después del login
             const newTicketBtn = document.getElementById('newTicketBtn');
@@ -161,6 +163,10 @@ async function login(email) {
 }
 
 async function logout() {
+    // Enviar lo pendiente antes de cerrar sesión; lo que no se pueda enviar se descarta
+    await flushEventQueue();
+    eventQueue = [];
+    persistEventQueue();
     try {
         await fetch(`${API_BASE}/api/auth/logout`, {
             method: 'POST',
@@ -175,6 +181,8 @@ async function logout() {
     authToken = null;
     currentUser = null;
     localStorage.removeItem('auth_token');
+    conditionalCache.clear();
+    disconnectEvents();
     showLoginModal();
     state = { pendingTickets: 0, totalTickets: 0, resolvedTickets: 0 };
     updateUI();
@@ -190,30 +198,118 @@ function getAuthHeaders() {
     return headers;
 }
 
+// Última respuesta y ETag de cada URL (GET condicionales)
+const conditionalCache = new Map();
+
+// GET que envía If-None-Match y reutiliza la respuesta guardada si el servidor responde 304
+async function fetchJsonConditional(url) {
+    const headers = getAuthHeaders();
+    const cached = conditionalCache.get(url);
+    if (cached) {
+        headers['If-None-Match'] = cached.etag;
+    }
+    const response = await fetch(url, { headers, cache: 'no-store' });
+    if (response.status === 304 && cached) {
+        return cached.data;
+    }
+    if (!response.ok) {
+        return null;
+    }
+    const data = await response.json();
+    const etag = response.headers.get('ETag');
+    if (etag) {
+        conditionalCache.set(url, { etag, data });
+    } else {
+        conditionalCache.delete(url);
+    }
+    return data;
+}
+
+// Aplicar los datos del servidor (respuesta de /api/data o evento del canal SSE)
+function applyServerData(data) {
+    state = {
+        pendingTickets: data.pendingTickets || 0,
+        totalTickets: data.totalTickets || 0,
+        resolvedTickets: data.resolvedTickets || 0
+    };
+    
+    // Mostrar información de sincronización Jira si está disponible
+    if (data.jiraSync) {
+        updateJiraStatus(data.jiraSync);
+    }
+    
+    updateUI();
+}
+
+// Canal de eventos: cambios hechos en otras pestañas o dispositivos y resultados de Jira
+let eventSource = null;
+// Si el servidor rechaza el canal (límite de conexiones), se consulta /api/data periódicamente
+// y se vuelve a intentar el canal más tarde
+const EVENTS_POLL_INTERVAL = 15000;
+const EVENTS_RETRY_DELAY = 60000;
+let eventsPollTimer = null;
+let eventsRetryTimer = null;
+
+function connectEvents() {
+    if (!authToken || typeof EventSource === 'undefined') {
+        return;
+    }
+    disconnectEvents();
+    // Se autentica con la cookie HttpOnly de la sesión (el token nunca va en la URL)
+    eventSource = new EventSource(`${API_BASE}/api/events`);
+    eventSource.addEventListener('error', () => {
+        // CLOSED: el servidor respondió con error (p. ej. 503); si no, el navegador reconecta solo
+        if (eventSource && eventSource.readyState === EventSource.CLOSED) {
+            startEventsPolling();
+        }
+    });
+    eventSource.addEventListener('data', (e) => {
+        // Con acciones sin confirmar se ignoran los eventos (llegará uno posterior)
+        if (eventQueue.length > 0 || flushInFlight) {
+            return;
+        }
+        try {
+            applyServerData(JSON.parse(e.data));
+            localStorage.setItem('ticketCounter', JSON.stringify(state));
+        } catch (err) {
+            console.error('Error procesando evento:', err);
+        }
+    });
+}
+
+function startEventsPolling() {
+    disconnectEvents();
+    eventsPollTimer = setInterval(() => {
+        if (eventQueue.length === 0 && !flushInFlight) {
+            loadData();
+        }
+    }, EVENTS_POLL_INTERVAL);
+    eventsRetryTimer = setTimeout(connectEvents, EVENTS_RETRY_DELAY);
+}
+
+function disconnectEvents() {
+    if (eventSource) {
+        eventSource.close();
+        eventSource = null;
+    }
+    clearInterval(eventsPollTimer);
+    clearTimeout(eventsRetryTimer);
+    eventsPollTimer = null;
+    eventsRetryTimer = null;
+}
+
 // Cargar datos desde la API
 async function loadData() {
     try {
-        const response = await fetch(`${API_BASE}/api/data`, {
-            headers: getAuthHeaders()
-        });
-        if (response.ok) {
-            const data = await response.json();
-            state = {
-                pendingTickets: data.pendingTickets || 0,
-                totalTickets: data.totalTickets || 0,
-                resolvedTickets: data.resolvedTickets || 0
-            };
+        const data = await fetchJsonConditional(`${API_BASE}/api/data`);
+        if (data) {
+            applyServerData(data);
             console.log('✓ Datos cargados desde servidor');
-            
-            // Mostrar información de sincronización Jira si está disponible
             if (data.jiraSync) {
                 console.log('✓ Sincronizado con Jira:', data.jiraSync.lastSync);
-                updateJiraStatus(data.jiraSync);
             } else {
                 checkJiraConfig();
             }
-            
-            updateUI();
             return;
         }
     } catch (e) {
@@ -233,50 +329,96 @@ async function loadData() {
     updateUI();
 }
 
-// Guardar datos en el servidor
-async function saveData(action = 'manual_update') {
+// Cola de acciones pendientes de enviar (persistida: no se pierde sin conexión ni al recargar)
+const EVENT_QUEUE_KEY = 'eventQueue';
+const EVENT_BATCH_SIZE = 100;
+let eventQueue = loadEventQueue();
+let flushTimer = null;
+let flushInFlight = false;
+
+function loadEventQueue() {
+    try {
+        return JSON.parse(localStorage.getItem(EVENT_QUEUE_KEY)) || [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function persistEventQueue() {
+    localStorage.setItem(EVENT_QUEUE_KEY, JSON.stringify(eventQueue));
+}
+
+function newEventKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(36).substr(2, 12)}`;
+}
+
+// Encolar una acción (new_ticket, ticket_resolved, reset) y programar el envío
+function queueAction(action) {
+    localStorage.setItem('ticketCounter', JSON.stringify(state));
     // Si no hay autenticación, solo guardar en localStorage
     if (!authToken) {
-        localStorage.setItem('ticketCounter', JSON.stringify(state));
-        return false;
+        return;
     }
-    
+    eventQueue.push({ key: newEventKey(), action: action, ts: Date.now() });
+    persistEventQueue();
+    scheduleFlush(300);
+}
+
+function scheduleFlush(delay) {
+    if (flushTimer) {
+        return;
+    }
+    flushTimer = setTimeout(() => {
+        flushTimer = null;
+        flushEventQueue();
+    }, delay);
+}
+
+// Enviar la cola en lotes; cada acción lleva su clave, así que reenviar un lote es seguro
+async function flushEventQueue(keepalive = false) {
+    if (!authToken || flushInFlight || eventQueue.length === 0) {
+        return;
+    }
+    flushInFlight = true;
+    const batch = eventQueue.slice(0, EVENT_BATCH_SIZE);
+    let retryDelay = 0;
     try {
-        const controller = new AbortController();
-        const timeoutId = setTimeout(() => controller.abort(), 5000); // Timeout de 5 segundos
-        
-        const response = await fetch(`${API_BASE}/api/save`, {
+        const response = await fetch(`${API_BASE}/api/events/batch`, {
             method: 'POST',
             headers: getAuthHeaders(),
-            body: JSON.stringify({
-                ...state,
-                action: action
-            }),
-            signal: controller.signal
+            body: JSON.stringify({ events: batch }),
+            keepalive: keepalive
         });
-        
-        clearTimeout(timeoutId);
-        
-        if (response.ok) {
-            const result = await response.json();
-            console.log('✓ Datos guardados:', result.month);
-            // También guardar en localStorage como respaldo
-            localStorage.setItem('ticketCounter', JSON.stringify(state));
-            return true;
+        if (response.ok || response.status === 400) {
+            const result = await response.json().catch(() => ({}));
+            if (!response.ok) {
+                // Lote rechazado: se descarta para no bloquear la cola
+                console.error('Lote de acciones rechazado:', result.error);
+            }
+            const sent = new Set(batch.map((event) => event.key));
+            eventQueue = eventQueue.filter((event) => !sent.has(event.key));
+            persistEventQueue();
+            if (eventQueue.length === 0 && result.state) {
+                state = { ...result.state };
+                localStorage.setItem('ticketCounter', JSON.stringify(state));
+                updateUI();
+            }
         } else {
-            console.error('Error al guardar:', response.status);
-            localStorage.setItem('ticketCounter', JSON.stringify(state));
+            console.error('Error al enviar acciones:', response.status);
+            retryDelay = 5000;
         }
     } catch (e) {
-        if (e.name === 'AbortError') {
-            console.warn('Guardado cancelado (timeout o navegación)');
-        } else {
-            console.error('Error al guardar datos:', e);
-        }
-        // Fallback a localStorage
-        localStorage.setItem('ticketCounter', JSON.stringify(state));
+        console.error('Error al enviar acciones (se reintentará):', e);
+        retryDelay = 5000;
+    } finally {
+        flushInFlight = false;
+    }
+    if (eventQueue.length > 0 && !keepalive) {
+        scheduleFlush(retryDelay);
     }
-    return false;
 }
 
 // Actualizar la interfaz de usuario
@@ -296,8 +438,8 @@ function updateUI() {
 async function addNewTicket() {
     state.pendingTickets++;
     state.totalTickets++;
-    await saveData('new_ticket');
     updateUI();
+    queueAction('new_ticket');
 }
 
 // Resolver ticket
@@ -308,8 +450,8 @@ async function resolveTicket() {
 
     state.pendingTickets--;
     state.resolvedTickets++;
-    await saveData('ticket_resolved');
     updateUI();
+    queueAction('ticket_resolved');
 }
 
 // Reiniciar contador
@@ -320,8 +462,8 @@ async function resetCounter() {
             totalTickets: 0,
             resolvedTickets: 0
         };
-        await saveData('reset');
         updateUI();
+        queueAction('reset');
     }
 }
 
@@ -468,11 +610,8 @@ function updateJiraStatus(jiraSync) {
 // Cargar estadísticas
 async function loadStats() {
     try {
-        const response = await fetch(`${API_BASE}/api/stats/summary`, {
-            headers: getAuthHeaders()
-        });
-        if (response.ok) {
-            const data = await response.json();
+        const data = await fetchJsonConditional(`${API_BASE}/api/stats/summary`);
+        if (data) {
             return data;
         }
     } catch (e) {
@@ -645,7 +784,11 @@ document.addEventListener('DOMContentLoaded', async () => {
         return; // Esperar a que el usuario inicie sesión
     }
     
+    // Enviar primero las acciones que quedaron en cola (sin conexión o al cerrar la página)
+    await flushEventQueue();
     await loadData();
+    connectEvents();
+    window.addEventListener('online', () => flushEventQueue());
     
     const newTicketBtn = document.getElementById('newTicketBtn');
     const resolveTicketBtn = document.getElementById('resolveTicketBtn');
@@ -724,20 +867,9 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
 });
 
-// Guardar datos antes de cerrar la página (usar sendBeacon para mayor confiabilidad)
+// Enviar la cola antes de cerrar la página (fetch con keepalive permite la cabecera de auth);
+// lo que no llegue sigue en localStorage y se reenvía al volver
 window.addEventListener('beforeunload', () => {
-    if (authToken && navigator.sendBeacon) {
-        // Usar sendBeacon que es más confiable para beforeunload
-        const data = JSON.stringify({
-            ...state,
-            action: 'beforeunload'
-        });
-        navigator.sendBeacon(
-            `${API_BASE}/api/save`,
-            new Blob([data], { type: 'application/json' })
-        );
-    } else {
-        // Fallback: guardar en localStorage
-        localStorage.setItem('ticketCounter', JSON.stringify(state));
-    }
+    localStorage.setItem('ticketCounter', JSON.stringify(state));
+    flushEventQueue(true);
 });
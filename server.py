@@ -11,22 +11,22 @@ from urllib.parse import urlparse, parse_qs
 import threading
 import webbrowser
 
+from static_assets import StaticAssets
+
 DATA_FILE = 'tickets-data.json'
 PORT = 8888
 
+# Archivos estáticos en memoria (se leen una vez al arrancar)
+static_assets = StaticAssets(os.path.dirname(os.path.abspath(__file__)))
+static_assets.load()
+
 class TicketHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Maneja peticiones GET"""
-        if self.path == '/' or self.path == '/index.html':
-            self.send_file('index.html', 'text/html')
-        elif self.path == '/styles.css':
-            self.send_file('styles.css', 'text/css')
-        elif self.path == '/script.js':
-            self.send_file('script.js', 'application/javascript')
-        elif self.path == '/api/data':
+        if self.path == '/api/data':
             self.send_json_data()
         else:
-            self.send_error(404, "File not found")
+            self.send_file(urlparse(self.path).path.lstrip('/'))
     
     def do_POST(self):
         """Maneja peticiones POST para guardar datos"""
@@ -47,18 +47,23 @@ class TicketHandler(BaseHTTPRequestHandler):
         else:
             self.send_error(404, "Not found")
     
-    def send_file(self, filename, content_type):
-        """Envía un archivo estático"""
-        try:
-            with open(filename, 'rb') as f:
-                content = f.read()
-            self.send_response(200)
-            self.send_header('Content-type', content_type)
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-            self.wfile.write(content)
-        except FileNotFoundError:
+    def send_file(self, filename):
+        """Envía un archivo estático desde memoria (con la codificación que acepte el cliente)"""
+        rendered = static_assets.render(
+            filename,
+            self.headers.get('Accept-Encoding', ''),
+            self.headers.get('If-None-Match', '')
+        )
+        if rendered is None:
             self.send_error(404, f"File {filename} not found")
+            return
+        status, headers, body = rendered
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
     
     def send_json_data(self):
         """Envía los datos del archivo JSON"""
@@ -0,0 +1,170 @@
+"""
+Servicios compartidos por la app web (app.py) y los scripts auxiliares (jira_sync_worker.py)
+- Configuración de datos, almacenamiento y Jira (variables de entorno)
+- Motor de almacenamiento, versiones de datos, métricas y cliente, caché y planificador de Jira
+- No importa Flask: los scripts lo usan sin inicializar la app web (rutas, sesiones, buffers)
+"""
+
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from data_version import DataVersions
+from jira_client import JiraHttpClient, JiraResponseError, count_issues, is_resolved, iter_issues, strip_order_by
+from jira_config import JiraConfigCache
+from jira_sync import JiraIssueMirror, JiraSyncCache, JiraSyncScheduler, count_mirror, sync_mirror
+from metrics import Metrics
+from storage import create_storage
+
+logger = logging.getLogger(__name__)
+
+# Configuración
+DATA_DIR = Path('data')
+USERS_DIR = DATA_DIR / 'users'
+JIRA_CONFIG_FILE = 'jira_config.json'
+# Motor de almacenamiento de los datos mensuales: 'json' (por defecto) o 'sqlite'
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').lower()
+SQLITE_PATH = Path(os.environ.get('SQLITE_PATH', str(DATA_DIR / 'tickets.db')))
+# Sincronización con Jira en segundo plano
+JIRA_SYNC_DIR = DATA_DIR / 'jira_sync'
+JIRA_SYNC_INTERVAL = int(os.environ.get('JIRA_SYNC_INTERVAL', '300'))
+JIRA_SYNC_CONCURRENCY = int(os.environ.get('JIRA_SYNC_CONCURRENCY', '4'))
+# Espejo local de issues para sync_mode = "incremental"
+JIRA_MIRROR_DIR = DATA_DIR / 'jira_mirror'
+JIRA_RECONCILE_INTERVAL = int(os.environ.get('JIRA_RECONCILE_INTERVAL', '21600'))
+# Cliente HTTP de Jira: reintentos ante 429/5xx y circuit breaker por host
+JIRA_HTTP_RETRIES = int(os.environ.get('JIRA_HTTP_RETRIES', '3'))
+JIRA_BREAKER_THRESHOLD = int(os.environ.get('JIRA_BREAKER_THRESHOLD', '5'))
+JIRA_BREAKER_COOLDOWN = int(os.environ.get('JIRA_BREAKER_COOLDOWN', '30'))
+JIRA_NOT_CONFIGURED = 'No hay configuración de Jira. Usa "Configurar Jira" y guarda tus datos.'
+# Métricas Prometheus: cada worker vuelca las suyas a data/metrics/ cada METRICS_FLUSH_INTERVAL s
+METRICS_DIR = DATA_DIR / 'metrics'
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+
+# Crear directorios de datos si no existen
+try:
+    DATA_DIR.mkdir(exist_ok=True)
+    USERS_DIR.mkdir(exist_ok=True)
+except Exception as e:
+    print(f"Advertencia: No se pudo crear directorio data: {e}")
+
+# Métricas de este worker (latencia por ruta, sesiones, almacenamiento, Jira)
+metrics = Metrics(METRICS_DIR, flush_interval=METRICS_FLUSH_INTERVAL)
+
+# Motor de almacenamiento de los meses
+storage = create_storage(STORAGE_BACKEND, DATA_DIR, USERS_DIR, SQLITE_PATH)
+metrics.timed_methods(storage, 'storage_operation_seconds', (
+    'load_month', 'save_month', 'record_events', 'update_counters', 'month_summaries', 'month_range'
+))
+
+# Versión de los datos de cada usuario (ETags); cambia con cada escritura y sincronización
+data_versions = DataVersions(DATA_DIR / 'versions')
+
+# Configuraciones de Jira parseadas (se releen sólo si cambia el archivo)
+jira_configs = JiraConfigCache(DATA_DIR, JIRA_CONFIG_FILE)
+
+def load_jira_config(user_id=None):
+    """Carga la configuración de Jira (por usuario o global) como JiraConfig"""
+    return jira_configs.get(user_id)
+
+# Cliente HTTP compartido (pool keep-alive por URL base de Jira)
+jira_http = JiraHttpClient(
+    retries=JIRA_HTTP_RETRIES,
+    timeout=15,
+    breaker_threshold=JIRA_BREAKER_THRESHOLD,
+    breaker_cooldown=JIRA_BREAKER_COOLDOWN,
+    on_request=lambda seconds, outcome: metrics.observe('jira_http_request_seconds', seconds, outcome=outcome)
+)
+
+# Espejo local de issues (sincronización incremental)
+jira_mirror = JiraIssueMirror(JIRA_MIRROR_DIR)
+
+def jira_error_message(response, jira_url):
+    """Mensaje para el usuario según la respuesta de error de Jira"""
+    if response.status_code == 401:
+        return 'Credenciales incorrectas. Revisa tu email y API token en "Configurar Jira".'
+    elif response.status_code == 403:
+        return 'Sin permiso para acceder a Jira. Revisa que el API token sea válido.'
+    elif response.status_code == 404:
+        return f'URL de Jira no encontrada. Revisa que {jira_url} sea correcta.'
+    try:
+        err_body = response.json()
+        msg = err_body.get('errorMessages', err_body.get('errors', [str(response.text)]))
+        if isinstance(msg, list):
+            msg = msg[0] if msg else response.text
+    except Exception:
+        msg = response.text[:200] if response.text else f'HTTP {response.status_code}'
+    logger.error(f"Jira API: {response.status_code} - {msg}")
+    return f'Jira respondió con error: {msg}'
+
+def fetch_jira_tickets(user_id=None, config=None):
+    """Obtiene tickets de Jira usando la API. Retorna (datos, None) o (None, mensaje_error)."""
+    if config is None:
+        config = load_jira_config(user_id)
+    if not config:
+        return None, JIRA_NOT_CONFIGURED
+    
+    try:
+        jira_url = config.url
+        if not config.complete:
+            return None, 'Faltan URL, email o API token en la configuración.'
+        
+        search_url = config.search_url
+        headers = {
+            'Accept': 'application/json',
+            'Content-Type': 'application/json'
+        }
+        
+        def jira_get(url, params):
+            return jira_http.get(url, auth=config.auth, params=params, headers=headers)
+        
+        rules = config.rules
+        page_size = config.page_size
+        jql = config.jql
+        if config.sync_mode == 'incremental':
+            # Espejo local: carga completa la primera vez y en cada reconciliación,
+            # después sólo las issues actualizadas desde la última sincronización
+            mirror_key = JiraSyncCache.key_for(user_id, config)
+            mirror = sync_mirror(
+                jira_mirror.load(mirror_key),
+                lambda query, fields: iter_issues(jira_get, search_url, query, fields, page_size),
+                strip_order_by(jql),
+                config.reconcile_interval or JIRA_RECONCILE_INTERVAL
+            )
+            jira_mirror.save(mirror_key, mirror)
+            pending, resolved, total = count_mirror(mirror, lambda status: is_resolved(status, rules))
+        else:
+            # Contar tickets por estado: totales del servidor si las reglas lo permiten,
+            # si no escaneo paginado pidiendo sólo el campo status
+            pending, resolved, total = count_issues(jira_get, search_url, jql, rules, page_size)
+        
+        return {
+            'pendingTickets': pending,
+            'resolvedTickets': resolved,
+            'totalTickets': total,
+            'lastSync': datetime.now().isoformat()
+        }, None
+            
+    except JiraResponseError as e:
+        return None, jira_error_message(e.response, jira_url)
+    except requests.exceptions.Timeout:
+        return None, 'Tiempo de espera agotado al conectar con Jira.'
+    except requests.exceptions.ConnectionError:
+        return None, 'No se pudo conectar con Jira. Revisa la URL y tu conexión.'
+    except Exception as e:
+        logger.exception("Error obteniendo tickets de Jira")
+        return None, f'Error inesperado: {str(e)}'
+
+# Caché de resultados de Jira y planificador de refrescos (un worker lo ejecuta)
+jira_sync_cache = JiraSyncCache(JIRA_SYNC_DIR)
+jira_scheduler = JiraSyncScheduler(
+    jira_sync_cache,
+    fetch_jira_tickets,
+    load_jira_config,
+    default_interval=JIRA_SYNC_INTERVAL,
+    max_concurrency=JIRA_SYNC_CONCURRENCY,
+    on_update=data_versions.bump
+)
@@ -0,0 +1,344 @@
+"""
+Índice de sesiones en memoria para el contador de tickets
+- Mantiene un diccionario token -> sesión por worker
+- Login/logout son una línea añadida a un journal (append-only)
+- Al arrancar se carga el snapshot y se reproduce el journal
+- Una compactación en segundo plano reescribe el snapshot y elimina
+  las sesiones expiradas (TTL sobre created_at)
+- Registra métricas de latencia de búsqueda
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Límites (en segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+
+def normalize_session(session):
+    """Normaliza una sesión guardada (soporta el formato antiguo token -> user_id)"""
+    if isinstance(session, dict):
+        return session
+    if isinstance(session, str):
+        return {'user_id': session, 'email': ''}
+    return None
+
+
+class SessionStore:
+    """Sesiones indexadas en memoria: snapshot (sessions.json) + journal append-only"""
+
+    def __init__(self, path, journal_path=None, ttl_seconds=0,
+                 compact_interval=300, compact_min_entries=200):
+        self.path = Path(path)
+        self.journal_path = Path(journal_path) if journal_path else self.path.with_suffix('.journal')
+        self.lock_path = self.path.with_suffix('.lock')
+        self.ttl_seconds = ttl_seconds
+        self.compact_interval = compact_interval
+        self.compact_min_entries = compact_min_entries
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._snapshot_stamp = None
+        self._journal_ino = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._compactor_pid = None
+        self._last_sweep = time.time()
+        self._metrics = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'expired_lookups': 0,
+            'reloads': 0,
+            'reload_seconds': 0.0,
+            'journal_lines_replayed': 0,
+            'appends': 0,
+            'compactions': 0,
+            'expired_removed': 0,
+            'lookup_seconds': 0.0,
+            'lookup_max_seconds': 0.0,
+            'lookup_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        }
+
+    # --- Disco ---
+
+    @contextmanager
+    def _file_lock(self, mode):
+        """Lock entre procesos: compartido para añadir, exclusivo para compactar"""
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _snapshot_disk_stamp(self):
+        """Generación del snapshot en disco; cambia en cada escritura atómica"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_snapshot(self):
+        """Lee el snapshot completo de sesiones"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except Exception:
+            return {}
+
+    def _apply_journal(self, sessions, f):
+        """Aplica las líneas del journal desde la posición actual de f"""
+        applied = 0
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                # Línea a medio escribir: se releerá en la próxima consulta
+                f.seek(-len(raw), os.SEEK_CUR)
+                break
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                continue
+            token = entry.get('token')
+            if not token:
+                continue
+            if entry.get('op') == 'put':
+                sessions[token] = entry.get('session')
+            elif entry.get('op') == 'del':
+                sessions.pop(token, None)
+            applied += 1
+        return applied
+
+    def _full_reload(self):
+        """Carga el snapshot y reproduce el journal completo"""
+        start = time.perf_counter()
+        with self._file_lock(fcntl.LOCK_SH):
+            sessions = self._read_snapshot()
+            self._snapshot_stamp = self._snapshot_disk_stamp()
+            self._journal_ino, self._journal_offset, self._journal_entries = None, 0, 0
+            try:
+                with open(self.journal_path, 'rb') as f:
+                    self._journal_ino = os.fstat(f.fileno()).st_ino
+                    self._journal_entries = self._apply_journal(sessions, f)
+                    self._journal_offset = f.tell()
+            except FileNotFoundError:
+                pass
+        self._sessions = sessions
+        self._metrics['reloads'] += 1
+        self._metrics['journal_lines_replayed'] += self._journal_entries
+        self._metrics['reload_seconds'] += time.perf_counter() - start
+
+    def _refresh(self):
+        """Aplica los cambios hechos por otros workers (cola del journal o recarga)"""
+        if self._snapshot_disk_stamp() != self._snapshot_stamp:
+            self._full_reload()
+            return
+        try:
+            st = os.stat(self.journal_path)
+        except FileNotFoundError:
+            if self._journal_ino is not None:
+                self._full_reload()
+            return
+        if st.st_ino != self._journal_ino or st.st_size < self._journal_offset:
+            self._full_reload()
+            return
+        if st.st_size == self._journal_offset:
+            return
+        with open(self.journal_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_ino != self._journal_ino:
+                self._full_reload()
+                return
+            f.seek(self._journal_offset)
+            applied = self._apply_journal(self._sessions, f)
+            self._journal_offset = f.tell()
+        self._journal_entries += applied
+        self._metrics['journal_lines_replayed'] += applied
+
+    def _append(self, entry):
+        """Añade una línea al journal (una sola escritura con O_APPEND)"""
+        line = (json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+        with self._file_lock(fcntl.LOCK_SH):
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        self._metrics['appends'] += 1
+
+    # --- Expiración ---
+
+    def is_expired(self, session, now=None):
+        """Indica si la sesión superó el TTL (según created_at)"""
+        if not self.ttl_seconds or not isinstance(session, dict):
+            return False
+        created_at = session.get('created_at')
+        if not created_at:
+            return False
+        try:
+            created = datetime.fromisoformat(created_at)
+        except ValueError:
+            return False
+        now = now or datetime.now()
+        return now - created > timedelta(seconds=self.ttl_seconds)
+
+    # --- Compactación ---
+
+    def compact(self):
+        """Reescribe el snapshot sin sesiones expiradas y vacía el journal"""
+        with self._lock:
+            with open(self.lock_path, 'a') as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Otro worker está compactando
+                    return False
+                try:
+                    sessions = self._read_snapshot()
+                    try:
+                        with open(self.journal_path, 'rb') as f:
+                            self._apply_journal(sessions, f)
+                    except FileNotFoundError:
+                        pass
+                    now = datetime.now()
+                    live = {t: s for t, s in sessions.items() if s and not self.is_expired(s, now)}
+                    expired = len(sessions) - len(live)
+
+                    pid = os.getpid()
+                    tmp_snapshot = self.path.with_name(f'{self.path.name}.{pid}.tmp')
+                    with open(tmp_snapshot, 'w', encoding='utf-8') as f:
+                        json.dump(live, f, separators=(',', ':'), ensure_ascii=False)
+                    tmp_journal = self.journal_path.with_name(f'{self.journal_path.name}.{pid}.tmp')
+                    open(tmp_journal, 'wb').close()
+                    os.replace(tmp_snapshot, self.path)
+                    os.replace(tmp_journal, self.journal_path)
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._full_reload()
+            self._metrics['compactions'] += 1
+            self._metrics['expired_removed'] += expired
+            self._last_sweep = time.time()
+        if expired:
+            logger.info(f"Sesiones compactadas: {len(live)} activas, {expired} expiradas eliminadas")
+        return True
+
+    def _compaction_due(self):
+        """Compactar si el journal creció o toca barrer expiradas"""
+        with self._lock:
+            self._refresh()
+            if self._journal_entries >= self.compact_min_entries:
+                return True
+            return bool(self.ttl_seconds) and time.time() - self._last_sweep >= self.compact_interval
+
+    def _compaction_loop(self):
+        """Hilo en segundo plano que compacta periódicamente"""
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                if self._compaction_due():
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Error compactando sesiones: {e}")
+
+    def _ensure_compactor(self):
+        """Arranca el hilo de compactación en este proceso (tras el fork de gunicorn)"""
+        if not self.compact_interval or self._compactor_pid == os.getpid():
+            return
+        self._compactor_pid = os.getpid()
+        threading.Thread(target=self._compaction_loop, name='session-compactor', daemon=True).start()
+
+    # --- API pública ---
+
+    def get(self, token):
+        """Obtiene la sesión asociada a un token (o None)"""
+        if not token:
+            return None
+        self._ensure_compactor()
+        start = time.perf_counter()
+        with self._lock:
+            self._refresh()
+            session = normalize_session(self._sessions.get(token))
+            if session is not None and self.is_expired(session):
+                self._metrics['expired_lookups'] += 1
+                session = None
+            self._observe_lookup(time.perf_counter() - start, session is not None)
+        return session
+
+    def add(self, token, session):
+        """Registra una sesión nueva (una línea en el journal)"""
+        self._ensure_compactor()
+        with self._lock:
+            self._append({'op': 'put', 'token': token, 'session': session})
+            self._refresh()
+
+    def remove(self, token):
+        """Elimina una sesión (una línea en el journal)"""
+        with self._lock:
+            self._refresh()
+            if token not in self._sessions:
+                return False
+            self._append({'op': 'del', 'token': token})
+            self._refresh()
+        return True
+
+    def load_all(self):
+        """Devuelve una copia de todas las sesiones"""
+        with self._lock:
+            self._refresh()
+            return dict(self._sessions)
+
+    def replace_all(self, sessions):
+        """Sustituye todas las sesiones (snapshot nuevo y journal vacío)"""
+        with self._lock:
+            with self._file_lock(fcntl.LOCK_EX):
+                pid = os.getpid()
+                tmp_snapshot = self.path.with_name(f'{self.path.name}.{pid}.tmp')
+                with open(tmp_snapshot, 'w', encoding='utf-8') as f:
+                    json.dump(sessions, f, separators=(',', ':'), ensure_ascii=False)
+                tmp_journal = self.journal_path.with_name(f'{self.journal_path.name}.{pid}.tmp')
+                open(tmp_journal, 'wb').close()
+                os.replace(tmp_snapshot, self.path)
+                os.replace(tmp_journal, self.journal_path)
+            self._full_reload()
+
+    # --- Métricas ---
+
+    def _observe_lookup(self, elapsed, found):
+        """Actualiza contadores e histograma de latencia"""
+        m = self._metrics
+        m['lookups'] += 1
+        m['hits' if found else 'misses'] += 1
+        m['lookup_seconds'] += elapsed
+        if elapsed > m['lookup_max_seconds']:
+            m['lookup_max_seconds'] = elapsed
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed <= bound:
+                m['lookup_buckets'][i] += 1
+                break
+        else:
+            m['lookup_buckets'][-1] += 1
+
+    def stats(self):
+        """Métricas del índice de sesiones de este worker"""
+        with self._lock:
+            m = dict(self._metrics)
+            m['lookup_buckets'] = {
+                **{str(bound): count for bound, count in zip(LATENCY_BUCKETS, m['lookup_buckets'])},
+                '+Inf': m['lookup_buckets'][-1],
+            }
+            m['lookup_avg_seconds'] = m['lookup_seconds'] / m['lookups'] if m['lookups'] else 0.0
+            m['sessions'] = len(self._sessions)
+            m['journal_entries'] = self._journal_entries
+            m['journal_bytes'] = self._journal_offset
+            m['ttl_seconds'] = self.ttl_seconds
+            m['pid'] = os.getpid()
+        return m
@@ -0,0 +1,162 @@
+"""
+Archivos estáticos del frontend servidos desde memoria
+- Al arrancar se leen index.html, script.js, styles.css e image/, se calcula una huella
+  (hash del contenido) y variantes gzip/brotli (brotli sólo si está instalado)
+- index.html se reescribe para apuntar a las URLs con huella (script.<hash>.js), que se
+  sirven con caché inmutable; index.html y las URLs sin huella se revalidan con ETag
+- Sólo se sirven los archivos del manifiesto (nunca data/ ni la configuración)
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional
+    brotli = None
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+# Preferencia del servidor cuando el cliente acepta varias codificaciones
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+_LINK_ATTR = re.compile(r'((?:src|href)=")([^"]+)(")')
+
+
+def accepted_encodings(header):
+    """Codificaciones aceptadas (q > 0) de un Accept-Encoding"""
+    accepted = set()
+    for part in (header or '').split(','):
+        fields = [f.strip() for f in part.split(';')]
+        if not fields[0]:
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            if param.startswith('q='):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(fields[0].lower())
+    return accepted
+
+
+def etag_matches(if_none_match, etag):
+    """Indica si el If-None-Match del cliente incluye el ETag"""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+class StaticAsset:
+    """Un archivo con sus variantes comprimidas"""
+
+    def __init__(self, name, body, content_type):
+        self.name = name
+        self.content_type = content_type
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.variants = {'identity': body}
+        if content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.variants['br'] = compressed
+
+    @property
+    def fingerprinted_name(self):
+        path = Path(self.name)
+        return str(path.with_name(f'{path.stem}.{self.digest[:12]}{path.suffix}'))
+
+    def encoding_for(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ENCODING_PREFERENCE:
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return 'identity'
+
+
+class StaticAssets:
+    """Manifiesto en memoria de los archivos estáticos"""
+
+    def __init__(self, root, entry='index.html', files=('script.js', 'styles.css'), dirs=('image',)):
+        self.root = Path(root)
+        self.entry = entry
+        self.files = files
+        self.dirs = dirs
+        # ruta de la URL -> (archivo, Cache-Control)
+        self._routes = {}
+
+    def _read(self, name):
+        body = (self.root / name).read_bytes()
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        return body, content_type
+
+    def _names(self):
+        names = [name for name in self.files if (self.root / name).is_file()]
+        for directory in self.dirs:
+            for path in sorted((self.root / directory).rglob('*')):
+                if path.is_file():
+                    names.append(path.relative_to(self.root).as_posix())
+        return names
+
+    def load(self):
+        """Lee los archivos, calcula huellas y variantes comprimidas. Retorna cuántos cargó."""
+        routes = {}
+        fingerprints = {}
+        for name in self._names():
+            asset = StaticAsset(name, *self._read(name))
+            fingerprints[name] = asset.fingerprinted_name
+            routes[name] = (asset, REVALIDATE_CACHE)
+            routes[asset.fingerprinted_name] = (asset, IMMUTABLE_CACHE)
+        if (self.root / self.entry).is_file():
+            body, content_type = self._read(self.entry)
+            html = _LINK_ATTR.sub(
+                lambda m: m.group(1) + fingerprints.get(m.group(2), m.group(2)) + m.group(3),
+                body.decode('utf-8')
+            )
+            routes[self.entry] = (StaticAsset(self.entry, html.encode('utf-8'), content_type), REVALIDATE_CACHE)
+        self._routes = routes
+        return len(routes)
+
+    def lookup(self, path):
+        return self._routes.get(path or self.entry)
+
+    def render(self, path, accept_encoding='', if_none_match=''):
+        """Respuesta para una ruta: (status, headers, body) o None si no es un archivo estático"""
+        found = self.lookup(path)
+        if found is None:
+            return None
+        asset, cache_control = found
+        encoding = asset.encoding_for(accept_encoding)
+        etag = f'"{asset.digest[:32]}-{encoding}"'
+        headers = {
+            'Cache-Control': cache_control,
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+        }
+        if etag_matches(if_none_match, etag):
+            return 304, headers, b''
+        body = asset.variants[encoding]
+        headers['Content-Type'] = asset.content_type
+        headers['Content-Length'] = str(len(body))
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
+
+    def stats(self):
+        sizes = {}
+        for path, (asset, _) in self._routes.items():
+            if path == asset.name:
+                sizes[path] = {encoding: len(body) for encoding, body in asset.variants.items()}
+        return {'assets': sizes, 'brotli': brotli is not None}
@@ -0,0 +1,982 @@
+"""
+Motores de almacenamiento para los datos mensuales del contador
+- JsonStorage: por usuario y mes, contadores en JSON compacto e historial en un log con
+  filas en columnas (acciones internadas); un índice summary.json por usuario con los
+  contadores de cada mes y sus sumas acumuladas. El formato original (JSON con sangría e
+  historial embebido o en objetos) se sigue leyendo y se convierte en la primera lectura
+- SqliteStorage: base de datos SQLite en modo WAL (contadores + historial)
+Ambos permiten que varios workers de gunicorn escriban sin perder actualizaciones.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+COUNTER_KEYS = ('pendingTickets', 'totalTickets', 'resolvedTickets')
+# Claves de idempotencia recordadas por mes, aparte de los contadores: las más recientes,
+# como mucho IDEMPOTENCY_KEYS_LIMIT y durante IDEMPOTENCY_KEYS_TTL segundos (lo que puede
+# tardar el frontend en reenviar un lote encolado sin conexión)
+IDEMPOTENCY_KEYS_LIMIT = 1000
+IDEMPOTENCY_KEYS_TTL = 7 * 86400
+SUMMARY_FORMAT_VERSION = 1
+# Formato de los archivos de un mes: 2 = contadores compactos + log con cabecera y filas en columnas
+MONTH_FORMAT_VERSION = 2
+# Columnas del log; las de los resúmenes de retención (retention.py) quedan vacías en los eventos
+HISTORY_COLUMNS = ('timestamp', 'action') + COUNTER_KEYS + ('events', 'created', 'resolved', 'resets')
+# Acciones internadas: en el log se guarda su índice; las demás, como texto
+HISTORY_ACTIONS = ('new_ticket', 'ticket_resolved', 'reset', 'manual_update', 'migrated_from_old_format',
+                   'rollup')
+# Acción de los resúmenes de retención: cada uno representa 'events' eventos originales
+ROLLUP_ACTION = 'rollup'
+
+
+def empty_month(month):
+    """Documento vacío de un mes"""
+    return {
+        "pendingTickets": 0,
+        "totalTickets": 0,
+        "resolvedTickets": 0,
+        "month": month,
+        "history": []
+    }
+
+
+def merge_counters(current, counters):
+    """Combina contadores nuevos (posiblemente parciales) con los actuales"""
+    return {key: counters.get(key, current.get(key, 0)) for key in COUNTER_KEYS}
+
+
+def history_events(entries):
+    """Eventos que representa un historial (un resumen de retención cuenta los que resume)"""
+    return sum(entry.get('events', 0) if entry.get('action') == ROLLUP_ACTION else 1 for entry in entries)
+
+
+def summary_row(month, data, events):
+    """Fila del índice de resumen: contadores del mes y métricas derivadas"""
+    counters = merge_counters(data, {})
+    total = counters['totalTickets']
+    return {
+        'month': month,
+        **counters,
+        'resolutionRate': round(counters['resolvedTickets'] / total, 4) if total else 0.0,
+        'events': events,
+        'updatedAt': data.get('updatedAt')
+    }
+
+
+def range_result(month_from, month_to, totals, months):
+    """Respuesta de una consulta por rango de meses"""
+    total = totals['totalTickets']
+    return {
+        'from': month_from,
+        'to': month_to,
+        'months': months,
+        **totals,
+        'resolutionRate': round(totals['resolvedTickets'] / total, 4) if total else 0.0
+    }
+
+
+def empty_cumulative():
+    """Sumas acumuladas por columnas: months[i] y, por contador, la suma hasta months[i] incluido"""
+    return {'months': [], **{key: [] for key in COUNTER_KEYS}}
+
+
+def extend_cumulative(cumulative, rows, current_month):
+    """Añade los meses cerrados (anteriores a current_month) que aún no tienen suma acumulada"""
+    last = cumulative['months'][-1] if cumulative['months'] else ''
+    for month in sorted(m for m in rows if last < m < current_month):
+        cumulative['months'].append(month)
+        for key in COUNTER_KEYS:
+            previous = cumulative[key][-1] if cumulative[key] else 0
+            cumulative[key].append(previous + rows[month].get(key, 0))
+    return cumulative
+
+
+def truncate_cumulative(cumulative, month):
+    """Descarta las sumas desde month (cambió un mes ya cerrado)"""
+    position = bisect_left(cumulative['months'], month)
+    for column in cumulative.values():
+        del column[position:]
+
+
+def cumulative_range(cumulative, rows, month_from, month_to):
+    """Totales de [month_from, month_to]: dos búsquedas en las sumas acumuladas más los meses abiertos"""
+    months = cumulative['months']
+    lo = bisect_left(months, month_from)
+    hi = bisect_right(months, month_to)
+    totals = {key: 0 for key in COUNTER_KEYS}
+    count = 0
+    if hi > lo:
+        for key in COUNTER_KEYS:
+            totals[key] = cumulative[key][hi - 1] - (cumulative[key][lo - 1] if lo else 0)
+        count = hi - lo
+    # Meses aún abiertos (sin suma acumulada): se suman al vuelo
+    last = months[-1] if months else ''
+    for month, row in rows.items():
+        if month > last and month_from <= month <= month_to:
+            for key in COUNTER_KEYS:
+                totals[key] += row.get(key, 0)
+            count += 1
+    return range_result(month_from, month_to, totals, count)
+
+
+class StorageEngine:
+    """Interfaz común de los motores de almacenamiento"""
+
+    name = None
+
+    def month_path(self, user_id, month):
+        """Ubicación física de los datos de un mes"""
+        raise NotImplementedError
+
+    def load_month(self, user_id, month, history_limit=None):
+        """Carga el documento de un mes (contadores + últimas history_limit entradas)"""
+        raise NotImplementedError
+
+    def iter_history(self, user_id, month):
+        """Recorre el historial completo de un mes en orden cronológico"""
+        raise NotImplementedError
+
+    def save_month(self, user_id, month, data):
+        """Reemplaza el documento completo de un mes (incluido el historial)"""
+        raise NotImplementedError
+
+    def record_event(self, user_id, month, counters, action, timestamp=None, extra=None):
+        """Actualiza contadores y añade una entrada de historial de forma atómica"""
+        return self.record_events(user_id, month, [{
+            'counters': counters,
+            'action': action,
+            'timestamp': timestamp,
+            'extra': extra
+        }])
+
+    def record_events(self, user_id, month, events):
+        """Aplica varios eventos en orden en una sola escritura atómica.
+
+        Cada evento es un dict con action, counters (absolutos) o delta (incrementos) y
+        opcionalmente timestamp, applied_at, baseline, extra e idempotency_key (ver
+        apply_events). Retorna el documento resultante.
+        """
+        raise NotImplementedError
+
+    def update_counters(self, user_id, month, counters):
+        """Actualiza sólo los contadores de un mes de forma atómica"""
+        raise NotImplementedError
+
+    def compact_history(self, user_id, month, compact):
+        """Reemplaza el historial de un mes por compact(data, history) de forma atómica.
+
+        compact recibe los contadores (con los campos internos, que se conservan) y el
+        historial completo; puede modificar data y retorna el historial nuevo, o None si no
+        hay nada que cambiar. Retorna cuántas entradas de historial se eliminaron.
+        """
+        raise NotImplementedError
+
+    def list_months(self, user_id):
+        """Lista los meses con datos para un usuario"""
+        raise NotImplementedError
+
+    def month_summaries(self, user_id):
+        """Filas de resumen (summary_row) de todos los meses, del más reciente al más antiguo"""
+        raise NotImplementedError
+
+    def month_range(self, user_id, month_from, month_to):
+        """Totales de los meses entre month_from y month_to (YYYY-MM, ambos incluidos)"""
+        rows = [row for row in self.month_summaries(user_id) if month_from <= row['month'] <= month_to]
+        totals = {key: sum(row[key] for row in rows) for key in COUNTER_KEYS}
+        return range_result(month_from, month_to, totals, len(rows))
+
+
+def history_entry(data, action, timestamp=None, extra=None):
+    """Entrada de historial con la foto de los contadores"""
+    entry = {
+        'timestamp': timestamp or datetime.now().isoformat(),
+        'action': action,
+        **{key: data[key] for key in COUNTER_KEYS}
+    }
+    if extra:
+        entry.update(extra)
+    return entry
+
+
+def event_keys(events):
+    """Claves de idempotencia de una lista de eventos"""
+    return [event['idempotency_key'] for event in events if event.get('idempotency_key')]
+
+
+def prune_keys(applied_keys, now):
+    """Claves vigentes de {clave: aplicada (epoch)}: sin las caducadas y sólo las más recientes"""
+    fresh = sorted((at, key) for key, at in applied_keys.items() if now - at < IDEMPOTENCY_KEYS_TTL)
+    return {key: at for at, key in fresh[-IDEMPOTENCY_KEYS_LIMIT:]}
+
+
+def apply_events(data, events, applied_keys=None):
+    """Aplica eventos sobre los contadores de data; devuelve las entradas de historial.
+
+    Un evento con counters (valores absolutos) más antiguo que updatedAt (p. ej. volcado tarde
+    por otro worker) queda en el historial pero no pisa los contadores más recientes.
+    Un evento con delta (incrementos) o baseline (absolutos que fijan una base nueva, p. ej.
+    un reset) se aplica siempre, en el orden de la lista; su applied_at (hora del servidor)
+    mueve updatedAt en lugar del timestamp, que sólo fecha la entrada de historial.
+    Los eventos con una idempotency_key que ya está en applied_keys ({clave: aplicada (epoch)},
+    que guarda el motor aparte de los contadores) se ignoran; las nuevas se añaden.
+    """
+    entries = []
+    applied_keys = {} if applied_keys is None else applied_keys
+    now = time.time()
+    for event in events:
+        key = event.get('idempotency_key')
+        if key:
+            if key in applied_keys:
+                continue
+            applied_keys[key] = now
+        timestamp = event.get('timestamp') or datetime.now().isoformat()
+        delta = event.get('delta')
+        if delta is not None:
+            counters = {k: data.get(k, 0) + delta.get(k, 0) for k in COUNTER_KEYS}
+        else:
+            counters = merge_counters(data, event.get('counters') or {})
+        entries.append(history_entry(counters, event['action'], timestamp, event.get('extra')))
+        if delta is not None or event.get('baseline') or timestamp >= data.get('updatedAt', ''):
+            data.update(counters)
+            data['updatedAt'] = max(event.get('applied_at') or timestamp, data.get('updatedAt', ''))
+    return entries
+
+
+def public_month(data):
+    """Documento de un mes sin los campos internos"""
+    data.pop('idempotencyKeys', None)
+    data.pop('formatVersion', None)
+    return data
+
+
+def json_loads(raw):
+    """json.loads con orjson si está instalado"""
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def history_header():
+    """Primera línea del log compacto: versión, columnas y tabla de acciones"""
+    return {'formatVersion': MONTH_FORMAT_VERSION, 'columns': list(HISTORY_COLUMNS), 'actions': list(HISTORY_ACTIONS)}
+
+
+def encode_history_row(entry, columns, action_index):
+    """Fila del log: valores de las columnas (sin los vacíos del final) y un dict opcional con el resto"""
+    row = [entry.get(column) for column in columns]
+    row[1] = action_index.get(row[1], row[1])
+    while row and row[-1] is None:
+        row.pop()
+    extra = {k: v for k, v in entry.items() if k not in columns}
+    if extra:
+        row.append(extra)
+    return row
+
+
+def decode_history_row(row, header):
+    """Entrada de historial a partir de una fila y la cabecera de su log"""
+    extra = row[-1] if row and isinstance(row[-1], dict) else None
+    entry = {column: value for column, value in zip(header['columns'], row[:-1] if extra else row)
+             if value is not None}
+    action = entry.get('action')
+    if isinstance(action, int):
+        actions = header['actions']
+        entry['action'] = actions[action] if 0 <= action < len(actions) else str(action)
+    if extra:
+        entry.update(extra)
+    return entry
+
+
+def tail_lines(path, count, block_size=8192):
+    """Devuelve las últimas count líneas de un archivo leyendo desde el final"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b''
+        while position > 0 and buffer.count(b'\n') <= count:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+    lines = buffer.splitlines()
+    if position > 0:
+        # La primera línea del buffer puede estar incompleta
+        lines = lines[1:]
+    return lines[-count:] if count else []
+
+
+class JsonStorage(StorageEngine):
+    """Por usuario y mes: tickets-<mes>.json (contadores) + tickets-<mes>.history.ndjson (historial)"""
+
+    name = 'json'
+
+    def __init__(self, data_dir, users_dir):
+        self.data_dir = Path(data_dir)
+        self.users_dir = Path(users_dir)
+
+    def user_dir(self, user_id):
+        """Directorio de datos del usuario (se crea si no existe)"""
+        if not user_id:
+            return None
+        user_dir = self.users_dir / user_id
+        user_dir.mkdir(exist_ok=True)
+        return user_dir
+
+    def _base_dir(self, user_id):
+        # Fallback a formato antiguo (sin usuario)
+        return self.user_dir(user_id) or self.data_dir
+
+    def month_path(self, user_id, month):
+        return self._base_dir(user_id) / f'tickets-{month}.json'
+
+    def history_path(self, user_id, month):
+        """Log append-only (NDJSON) con el historial del mes"""
+        return self._base_dir(user_id) / f'tickets-{month}.history.ndjson'
+
+    def keys_path(self, user_id, month):
+        """Claves de idempotencia ya aplicadas del mes ({clave: epoch})"""
+        return self._base_dir(user_id) / f'idempotency-{month}.json'
+
+    def summary_path(self, user_id):
+        """Índice con una fila de resumen por mes"""
+        return self._base_dir(user_id) / 'summary.json'
+
+    @contextmanager
+    def _locked(self, user_id):
+        """Lock exclusivo entre procesos para el read-modify-write de un usuario"""
+        with open(self._base_dir(user_id) / '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self, path, month):
+        if path.exists():
+            with open(path, 'rb') as f:
+                return json_loads(f.read())
+        return empty_month(month)
+
+    def _write(self, path, data, indent=None):
+        """Escritura atómica (archivo temporal + rename)"""
+        tmp_file = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False, separators=None if indent else (',', ':'))
+        os.replace(tmp_file, path)
+
+    def _write_snapshot(self, user_id, month, data):
+        """Contadores del mes en formato compacto, con la marca de versión"""
+        data['month'] = month
+        data['formatVersion'] = MONTH_FORMAT_VERSION
+        self._write(self.month_path(user_id, month), data)
+
+    @staticmethod
+    def _encode_entries(entries, header):
+        columns = header['columns']
+        action_index = {action: i for i, action in enumerate(header['actions'])}
+        return ''.join(
+            json.dumps(encode_history_row(entry, columns, action_index), ensure_ascii=False, separators=(',', ':'))
+            + '\n' for entry in entries
+        )
+
+    def _log_header(self, log_path):
+        """Cabecera del log compacto, o None si no existe o está en el formato antiguo (objetos)"""
+        try:
+            with open(log_path, 'rb') as f:
+                first = f.readline()
+        except FileNotFoundError:
+            return None
+        entry = self._parse_line(first) if first.endswith(b'\n') else None
+        if isinstance(entry, dict) and entry.get('formatVersion') == MONTH_FORMAT_VERSION:
+            return entry
+        return None
+
+    def _append_history(self, log_path, entries):
+        """Añade entradas al log con una sola escritura O_APPEND (convierte antes un log antiguo)"""
+        header = self._log_header(log_path)
+        if header is None:
+            if log_path.exists() and log_path.stat().st_size > 0:
+                self._rewrite_history(log_path, chain(self._iter_log(log_path), entries))
+                return
+            header = history_header()
+            payload = json.dumps(header, separators=(',', ':')) + '\n' + self._encode_entries(entries, header)
+        else:
+            payload = self._encode_entries(entries, header)
+        fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload.encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def _rewrite_history(self, log_path, entries):
+        """Reescribe el log completo (en formato compacto) de forma atómica.
+
+        entries puede ser un generador que lea el propio log: se escribe entrada a entrada
+        en un archivo temporal, sin cargar el historial completo en memoria.
+        """
+        header = history_header()
+        tmp_file = log_path.with_name(f'{log_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header, separators=(',', ':')) + '\n')
+            for entry in entries:
+                f.write(self._encode_entries((entry,), header))
+        os.replace(tmp_file, log_path)
+
+    def _read_keys(self, user_id, month):
+        try:
+            with open(self.keys_path(user_id, month), 'rb') as f:
+                return json_loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _read_snapshot(self, user_id, month):
+        """Lee los contadores; mueve al log el historial embebido del formato antiguo y a su
+        archivo las claves de idempotencia que antes iban en los contadores"""
+        data = self._read(self.month_path(user_id, month), month)
+        legacy_keys = data.pop('idempotencyKeys', None)
+        if legacy_keys:
+            applied_keys = self._read_keys(user_id, month)
+            now = time.time()
+            for key in legacy_keys:
+                applied_keys.setdefault(key, now)
+            self._write(self.keys_path(user_id, month), prune_keys(applied_keys, now))
+        legacy_history = data.pop('history', None)
+        if legacy_history:
+            log_path = self.history_path(user_id, month)
+            existing = list(self._iter_log(log_path))
+            # Si el log ya empieza por el historial embebido, una migración previa quedó a medias
+            if existing[:1] != legacy_history[:1]:
+                self._rewrite_history(log_path, legacy_history + existing)
+        return data
+
+    @staticmethod
+    def _parse_line(line):
+        try:
+            return json_loads(line)
+        except ValueError:
+            return None
+
+    def _decode_line(self, line, header):
+        """Entrada de una línea del log: fila compacta u objeto del formato antiguo (o None)"""
+        value = self._parse_line(line)
+        if isinstance(value, list):
+            return decode_history_row(value, header)
+        if isinstance(value, dict) and 'formatVersion' not in value:
+            return value
+        return None
+
+    def _iter_log(self, log_path):
+        """Lee el log línea a línea (sin cargarlo completo en memoria)"""
+        header = self._log_header(log_path) or history_header()
+        try:
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    entry = self._decode_line(line, header) if line.endswith(b'\n') else None
+                    if entry is not None:
+                        yield entry
+        except FileNotFoundError:
+            return
+
+    def upgrade_month(self, user_id, month):
+        """Pasa un mes del formato antiguo al compacto (bajo el lock del usuario)"""
+        with self._locked(user_id):
+            data = self._read_snapshot(user_id, month)
+            if data.get('formatVersion') == MONTH_FORMAT_VERSION:
+                return False
+            log_path = self.history_path(user_id, month)
+            if log_path.exists() and self._log_header(log_path) is None:
+                self._rewrite_history(log_path, self._iter_log(log_path))
+            self._write_snapshot(user_id, month, data)
+        return True
+
+    def verify_month(self, user_id, month):
+        """Valida un mes sin modificarlo: formato, contadores y líneas del log (leído en streaming)"""
+        data = self._read(self.month_path(user_id, month), month)
+        invalid_counters = [k for k in COUNTER_KEYS if not isinstance(data.get(k, 0), int)]
+        log_path = self.history_path(user_id, month)
+        header = self._log_header(log_path)
+        events = invalid_lines = 0
+        try:
+            with open(log_path, 'rb') as f:
+                if header:
+                    f.readline()
+                for line in f:
+                    if line.endswith(b'\n') and self._decode_line(line, header or history_header()) is not None:
+                        events += 1
+                    else:
+                        invalid_lines += 1
+        except FileNotFoundError:
+            pass
+        return {
+            'legacy': data.get('formatVersion') != MONTH_FORMAT_VERSION or (events > 0 and header is None),
+            'events': events + len(data.get('history') or []),
+            'invalid_counters': invalid_counters,
+            'invalid_lines': invalid_lines
+        }
+
+    def iter_history(self, user_id, month):
+        data = self._read(self.month_path(user_id, month), month)
+        # Historial embebido del formato antiguo (aún no migrado al log)
+        yield from data.get('history') or []
+        yield from self._iter_log(self.history_path(user_id, month))
+
+    def load_month(self, user_id, month, history_limit=None):
+        month_path = self.month_path(user_id, month)
+        data = self._read(month_path, month)
+        if month_path.exists() and data.get('formatVersion') != MONTH_FORMAT_VERSION:
+            # Mes en el formato antiguo: se convierte una vez y se vuelve a leer
+            self.upgrade_month(user_id, month)
+            data = self._read(month_path, month)
+        legacy_history = data.pop('history', None) or []
+        log_path = self.history_path(user_id, month)
+        if history_limit:
+            history = []
+            if log_path.exists():
+                header = self._log_header(log_path) or history_header()
+                lines = tail_lines(log_path, history_limit)
+                history = [e for e in (self._decode_line(line, header) for line in lines) if e is not None]
+            if len(history) < history_limit and legacy_history:
+                history = legacy_history[-(history_limit - len(history)):] + history
+        else:
+            history = legacy_history + list(self._iter_log(log_path))
+        data['month'] = month
+        data['history'] = history
+        return public_month(data)
+
+    def save_month(self, user_id, month, data):
+        snapshot = {k: v for k, v in data.items() if k != 'history'}
+        history = data.get('history') or []
+        with self._locked(user_id):
+            self._rewrite_history(self.history_path(user_id, month), history)
+            self._write_snapshot(user_id, month, snapshot)
+            self._update_summary(user_id, month, snapshot, events=len(history))
+
+    def record_events(self, user_id, month, events):
+        with self._locked(user_id):
+            data = self._read_snapshot(user_id, month)
+            # El archivo de claves sólo se lee y reescribe si el lote trae claves
+            applied_keys = self._read_keys(user_id, month) if event_keys(events) else None
+            entries = apply_events(data, events, applied_keys)
+            if applied_keys is not None:
+                self._write(self.keys_path(user_id, month), prune_keys(applied_keys, time.time()))
+            self._append_history(self.history_path(user_id, month), entries)
+            self._write_snapshot(user_id, month, data)
+            self._update_summary(user_id, month, data, added_events=len(entries))
+        return data
+
+    def update_counters(self, user_id, month, counters):
+        with self._locked(user_id):
+            data = self._read_snapshot(user_id, month)
+            data.update(merge_counters(data, counters))
+            data['updatedAt'] = datetime.now().isoformat()
+            self._write_snapshot(user_id, month, data)
+            self._update_summary(user_id, month, data)
+        return data
+
+    def compact_history(self, user_id, month, compact):
+        with self._locked(user_id):
+            data = self._read_snapshot(user_id, month)
+            log_path = self.history_path(user_id, month)
+            history = list(self._iter_log(log_path))
+            compacted = compact(data, history)
+            if compacted is None:
+                return 0
+            self._rewrite_history(log_path, compacted)
+            self._write_snapshot(user_id, month, data)
+            self._update_summary(user_id, month, data, events=history_events(compacted))
+        return len(history) - len(compacted)
+
+    def _month_files(self, user_id):
+        """Meses con archivo de contadores (sólo lista el directorio, no abre los archivos)"""
+        return {file.stem.replace('tickets-', '') for file in self._base_dir(user_id).glob('tickets-*.json')}
+
+    def _count_events(self, user_id, month):
+        data = self._read(self.month_path(user_id, month), month)
+        log_path = self.history_path(user_id, month)
+        if data.get('retention'):
+            # Mes resumido (pocas entradas): se cuentan los eventos originales
+            return history_events(chain(data.get('history') or [], self._iter_log(log_path)))
+        count = len(data.get('history') or [])
+        try:
+            with open(log_path, 'rb') as f:
+                count += sum(chunk.count(b'\n') for chunk in iter(lambda: f.read(65536), b''))
+        except FileNotFoundError:
+            return count
+        # La cabecera del log compacto no es un evento
+        return count - 1 if self._log_header(log_path) else count
+
+    def _read_summary(self, user_id):
+        try:
+            with open(self.summary_path(user_id), 'rb') as f:
+                index = json_loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if index.get('formatVersion') != SUMMARY_FORMAT_VERSION:
+            return None
+        return index
+
+    def rebuild_summary(self, user_id):
+        """Reconstruye el índice de resumen leyendo todos los meses (bajo el lock del usuario)"""
+        rows = {}
+        for month in sorted(self._month_files(user_id)):
+            try:
+                data = self._read(self.month_path(user_id, month), month)
+                rows[month] = summary_row(month, data, self._count_events(user_id, month))
+            except Exception as e:
+                logger.error(f"Error leyendo {user_id or '(sin usuario)'}/{month}: {e}")
+        index = {
+            'formatVersion': SUMMARY_FORMAT_VERSION,
+            'months': rows,
+            'cumulative': extend_cumulative(empty_cumulative(), rows, datetime.now().strftime('%Y-%m'))
+        }
+        self._write(self.summary_path(user_id), index)
+        return index
+
+    def reindex(self, user_id):
+        """Reconstruye el índice de resumen tomando el lock del usuario (p. ej. tras una migración)"""
+        with self._locked(user_id):
+            return self.rebuild_summary(user_id)
+
+    def _update_summary(self, user_id, month, data, events=None, added_events=0):
+        """Actualiza la fila del mes en el índice (se llama con el lock del usuario tomado)"""
+        index = self._read_summary(user_id)
+        if index is None or (month not in index['months']
+                              and set(index['months']) | {month} != self._month_files(user_id)):
+            # Índice ausente o desfasado (meses escritos por fuera del motor): se reconstruye
+            self.rebuild_summary(user_id)
+            return
+        if events is None:
+            previous = index['months'].get(month)
+            events = (previous['events'] if previous else 0) + added_events
+        index['months'][month] = summary_row(month, data, events)
+        cumulative = index.get('cumulative') or empty_cumulative()
+        if cumulative['months'] and month <= cumulative['months'][-1]:
+            # Cambió un mes ya cerrado (volcado tardío o migración): se recalcula desde ese mes
+            truncate_cumulative(cumulative, month)
+        # Los meses que se cerraron desde la última escritura se acumulan aquí
+        index['cumulative'] = extend_cumulative(cumulative, index['months'], datetime.now().strftime('%Y-%m'))
+        self._write(self.summary_path(user_id), index)
+
+    def _summary(self, user_id):
+        """Índice de resumen vigente; se reconstruye si falta o no coincide con los meses en disco"""
+        index = self._read_summary(user_id)
+        if index is not None and set(index['months']) == self._month_files(user_id):
+            return index
+        with self._locked(user_id):
+            return self.rebuild_summary(user_id)
+
+    def list_months(self, user_id):
+        return list(self._summary(user_id)['months'])
+
+    def month_summaries(self, user_id):
+        rows = self._summary(user_id)['months']
+        return [rows[month] for month in sorted(rows, reverse=True)]
+
+    def month_range(self, user_id, month_from, month_to):
+        index = self._summary(user_id)
+        cumulative = extend_cumulative(index.get('cumulative') or empty_cumulative(), index['months'],
+                                       datetime.now().strftime('%Y-%m'))
+        return cumulative_range(cumulative, index['months'], month_from, month_to)
+
+
+class SqliteStorage(StorageEngine):
+    """Base de datos SQLite (WAL) con tablas counters e history"""
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS counters (
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            pending INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            resolved INTEGER NOT NULL DEFAULT 0,
+            extra TEXT,
+            updated_at TEXT,
+            PRIMARY KEY (user_id, month)
+        );
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            action TEXT,
+            pending INTEGER,
+            total INTEGER,
+            resolved INTEGER,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_user_month_ts ON history (user_id, month, timestamp);
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            user_id TEXT NOT NULL,
+            month TEXT NOT NULL,
+            key TEXT NOT NULL,
+            applied_at REAL NOT NULL,
+            PRIMARY KEY (user_id, month, key)
+        );
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._local = threading.local()
+        self._conn().executescript(self.SCHEMA)
+
+    def _conn(self):
+        """Conexión por hilo (y por proceso, tras el fork de gunicorn)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transacción de escritura (BEGIN IMMEDIATE serializa a los escritores)"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    @staticmethod
+    def _uid(user_id):
+        return user_id or ''
+
+    def month_path(self, user_id, month):
+        return self.db_path
+
+    def _read_counters(self, conn, user_id, month):
+        row = conn.execute(
+            'SELECT pending, total, resolved, extra FROM counters WHERE user_id = ? AND month = ?',
+            (self._uid(user_id), month)
+        ).fetchone()
+        if row is None:
+            return None
+        data = json.loads(row['extra']) if row['extra'] else {}
+        data.update({
+            'pendingTickets': row['pending'],
+            'totalTickets': row['total'],
+            'resolvedTickets': row['resolved']
+        })
+        return data
+
+    def _write_counters(self, conn, user_id, month, data):
+        extra = {k: v for k, v in data.items() if k not in COUNTER_KEYS and k not in ('month', 'history')}
+        conn.execute(
+            'INSERT INTO counters (user_id, month, pending, total, resolved, extra, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT (user_id, month) DO UPDATE SET pending = excluded.pending, '
+            'total = excluded.total, resolved = excluded.resolved, extra = excluded.extra, '
+            'updated_at = excluded.updated_at',
+            (self._uid(user_id), month, data.get('pendingTickets', 0), data.get('totalTickets', 0),
+             data.get('resolvedTickets', 0), json.dumps(extra, ensure_ascii=False) if extra else None,
+             datetime.now().isoformat())
+        )
+
+    def _read_for_write(self, conn, user_id, month):
+        """Contadores (o None) dentro de una transacción; mueve a su tabla las claves de
+        idempotencia que antes iban en extra"""
+        data = self._read_counters(conn, user_id, month)
+        legacy_keys = data.pop('idempotencyKeys', None) if data else None
+        if legacy_keys:
+            self._save_keys(conn, user_id, month, dict.fromkeys(legacy_keys, time.time()))
+        return data
+
+    def _applied_keys(self, conn, user_id, month, keys):
+        """Las claves de `keys` ya aplicadas en el mes ({clave: epoch})"""
+        rows = conn.execute(
+            'SELECT key, applied_at FROM idempotency_keys WHERE user_id = ? AND month = ? '
+            'AND key IN (SELECT value FROM json_each(?))',
+            (self._uid(user_id), month, json.dumps(keys))
+        )
+        return {row['key']: row['applied_at'] for row in rows}
+
+    def _save_keys(self, conn, user_id, month, applied_keys):
+        """Guarda claves nuevas y descarta las caducadas y las que pasan del límite"""
+        uid = self._uid(user_id)
+        conn.executemany(
+            'INSERT OR IGNORE INTO idempotency_keys (user_id, month, key, applied_at) VALUES (?, ?, ?, ?)',
+            [(uid, month, key, at) for key, at in applied_keys.items()]
+        )
+        conn.execute(
+            'DELETE FROM idempotency_keys WHERE user_id = ? AND month = ? AND (applied_at < ? OR key NOT IN '
+            '(SELECT key FROM idempotency_keys WHERE user_id = ? AND month = ? ORDER BY applied_at DESC LIMIT ?))',
+            (uid, month, time.time() - IDEMPOTENCY_KEYS_TTL, uid, month, IDEMPOTENCY_KEYS_LIMIT)
+        )
+
+    def _insert_history(self, conn, user_id, month, entries):
+        rows = []
+        for entry in entries:
+            extra = {k: v for k, v in entry.items()
+                     if k not in COUNTER_KEYS and k not in ('timestamp', 'action')}
+            rows.append((
+                self._uid(user_id), month, entry.get('timestamp', ''), entry.get('action'),
+                entry.get('pendingTickets'), entry.get('totalTickets'), entry.get('resolvedTickets'),
+                json.dumps(extra, ensure_ascii=False) if extra else None
+            ))
+        conn.executemany(
+            'INSERT INTO history (user_id, month, timestamp, action, pending, total, resolved, extra) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    @staticmethod
+    def _history_entry(row):
+        entry = {'timestamp': row['timestamp'], 'action': row['action']}
+        for key, column in zip(COUNTER_KEYS, ('pending', 'total', 'resolved')):
+            if row[column] is not None:
+                entry[key] = row[column]
+        if row['extra']:
+            entry.update(json.loads(row['extra']))
+        return entry
+
+    def load_month(self, user_id, month, history_limit=None):
+        conn = self._conn()
+        data = self._read_counters(conn, user_id, month)
+        if data is None:
+            return empty_month(month)
+        rows = conn.execute(
+            'SELECT * FROM (SELECT * FROM history WHERE user_id = ? AND month = ? '
+            'ORDER BY timestamp DESC, id DESC LIMIT ?) ORDER BY timestamp, id',
+            (self._uid(user_id), month, history_limit or -1)
+        ).fetchall()
+        data['month'] = month
+        data['history'] = [self._history_entry(row) for row in rows]
+        return public_month(data)
+
+    def iter_history(self, user_id, month):
+        cursor = self._conn().execute(
+            'SELECT * FROM history WHERE user_id = ? AND month = ? ORDER BY timestamp, id',
+            (self._uid(user_id), month)
+        )
+        for row in cursor:
+            yield self._history_entry(row)
+
+    def save_month(self, user_id, month, data):
+        with self._transaction() as conn:
+            self._write_counters(conn, user_id, month, data)
+            conn.execute('DELETE FROM history WHERE user_id = ? AND month = ?', (self._uid(user_id), month))
+            self._insert_history(conn, user_id, month, data.get('history', []))
+
+    def record_events(self, user_id, month, events):
+        with self._transaction() as conn:
+            data = self._read_for_write(conn, user_id, month) or empty_month(month)
+            keys = event_keys(events)
+            applied_keys = self._applied_keys(conn, user_id, month, keys) if keys else None
+            entries = apply_events(data, events, applied_keys)
+            if applied_keys is not None:
+                self._save_keys(conn, user_id, month, applied_keys)
+            self._write_counters(conn, user_id, month, data)
+            self._insert_history(conn, user_id, month, entries)
+        data['month'] = month
+        return data
+
+    def update_counters(self, user_id, month, counters):
+        with self._transaction() as conn:
+            data = self._read_for_write(conn, user_id, month) or empty_month(month)
+            data.update(merge_counters(data, counters))
+            data['updatedAt'] = datetime.now().isoformat()
+            self._write_counters(conn, user_id, month, data)
+        data['month'] = month
+        return data
+
+    def compact_history(self, user_id, month, compact):
+        with self._transaction() as conn:
+            data = self._read_for_write(conn, user_id, month)
+            if data is None:
+                return 0
+            rows = conn.execute(
+                'SELECT * FROM history WHERE user_id = ? AND month = ? ORDER BY timestamp, id',
+                (self._uid(user_id), month)
+            ).fetchall()
+            history = [self._history_entry(row) for row in rows]
+            compacted = compact(data, history)
+            if compacted is None:
+                return 0
+            self._write_counters(conn, user_id, month, data)
+            conn.execute('DELETE FROM history WHERE user_id = ? AND month = ?', (self._uid(user_id), month))
+            self._insert_history(conn, user_id, month, compacted)
+        return len(history) - len(compacted)
+
+    def list_months(self, user_id):
+        rows = self._conn().execute('SELECT month FROM counters WHERE user_id = ?', (self._uid(user_id),))
+        return [row['month'] for row in rows]
+
+    def month_summaries(self, user_id):
+        conn = self._conn()
+        # Los resúmenes de retención cuentan los eventos que representan
+        events = dict(conn.execute(
+            'SELECT month, SUM(CASE WHEN action = ? THEN COALESCE(json_extract(extra, \'$.events\'), 0) ELSE 1 END) '
+            'FROM history WHERE user_id = ? GROUP BY month', (ROLLUP_ACTION, self._uid(user_id))
+        ).fetchall())
+        rows = conn.execute(
+            'SELECT month, pending, total, resolved, extra FROM counters WHERE user_id = ? ORDER BY month DESC',
+            (self._uid(user_id),)
+        )
+        summaries = []
+        for row in rows:
+            data = json.loads(row['extra']) if row['extra'] else {}
+            data.update({
+                'pendingTickets': row['pending'],
+                'totalTickets': row['total'],
+                'resolvedTickets': row['resolved']
+            })
+            summaries.append(summary_row(row['month'], data, events.get(row['month'], 0)))
+        return summaries
+
+    def month_range(self, user_id, month_from, month_to):
+        row = self._conn().execute(
+            'SELECT COUNT(*) AS months, COALESCE(SUM(pending), 0) AS pending, COALESCE(SUM(total), 0) AS total, '
+            'COALESCE(SUM(resolved), 0) AS resolved FROM counters WHERE user_id = ? AND month BETWEEN ? AND ?',
+            (self._uid(user_id), month_from, month_to)
+        ).fetchone()
+        totals = {'pendingTickets': row['pending'], 'totalTickets': row['total'], 'resolvedTickets': row['resolved']}
+        return range_result(month_from, month_to, totals, row['months'])
+
+
+def create_storage(backend, data_dir, users_dir, sqlite_path=None):
+    """Crea el motor de almacenamiento configurado ('json' o 'sqlite')"""
+    if backend == 'sqlite':
+        return SqliteStorage(sqlite_path or Path(data_dir) / 'tickets.db')
+    if backend != 'json':
+        logger.warning(f"Motor de almacenamiento desconocido '{backend}', usando json")
+    return JsonStorage(data_dir, users_dir)
+
+
+def import_json_to_sqlite(json_storage, sqlite_storage):
+    """Importa todos los archivos tickets-*.json existentes a SQLite. Retorna meses importados."""
+    imported = 0
+    user_ids = [None] + sorted(p.name for p in json_storage.users_dir.iterdir() if p.is_dir())
+    for user_id in user_ids:
+        for month in sorted(json_storage.list_months(user_id)):
+            try:
+                data = json_storage.load_month(user_id, month)
+                sqlite_storage.save_month(user_id, month, data)
+                imported += 1
+            except Exception as e:
+                logger.error(f"Error importando {user_id or '(sin usuario)'}/{month}: {e}")
+    return imported
@@ -0,0 +1,34 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py importado en un directorio de datos temporal (se inicializa una sola vez)"""
+    workdir = tmp_path_factory.mktemp('app')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    os.environ['WRITE_COALESCE_INTERVAL'] = '0'
+    try:
+        module = importlib.import_module('app')
+        yield module
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    response = client.post('/api/auth/login', json={'email': 'tests@example.com'})
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
@@ -0,0 +1,59 @@
+from storage import COUNTER_KEYS, IDEMPOTENCY_KEYS_TTL, apply_events, prune_keys
+
+RESET = {key: 0 for key in COUNTER_KEYS}
+
+
+def counters(data):
+    return tuple(data[key] for key in COUNTER_KEYS)
+
+
+def test_events_apply_in_list_order():
+    data = {'pendingTickets': 0, 'totalTickets': 0, 'resolvedTickets': 0}
+    entries = apply_events(data, [
+        {'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1}, 'timestamp': '2026-10-01T10:00:02'},
+        {'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1}, 'timestamp': '2026-10-01T10:00:01'},
+        {'action': 'ticket_resolved', 'delta': {'pendingTickets': -1, 'resolvedTickets': 1},
+         'timestamp': '2026-10-01T10:00:00'},
+    ])
+    assert counters(data) == (1, 2, 1)
+    assert [counters(entry) for entry in entries] == [(1, 1, 0), (2, 2, 0), (1, 2, 1)]
+
+
+def test_baseline_reset_ignores_client_clock():
+    # Contadores recién escritos por el servidor (p. ej. una sincronización con Jira)
+    data = {'pendingTickets': 7, 'totalTickets': 10, 'resolvedTickets': 3, 'updatedAt': '2026-10-01T12:00:00'}
+    entries = apply_events(data, [
+        {'action': 'reset', 'counters': RESET, 'baseline': True,
+         'timestamp': '2026-10-01T11:00:00', 'applied_at': '2026-10-01T12:00:05'},
+        {'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1},
+         'timestamp': '2026-10-01T11:00:01', 'applied_at': '2026-10-01T12:00:05'},
+    ])
+    assert counters(data) == (1, 1, 0)
+    assert data['updatedAt'] == '2026-10-01T12:00:05'
+    # El historial conserva la hora del cliente
+    assert [entry['timestamp'] for entry in entries] == ['2026-10-01T11:00:00', '2026-10-01T11:00:01']
+
+
+def test_stale_absolute_counters_do_not_overwrite():
+    data = {'pendingTickets': 7, 'totalTickets': 10, 'resolvedTickets': 3, 'updatedAt': '2026-10-01T12:00:00'}
+    entries = apply_events(data, [{'action': 'manual_update', 'counters': RESET, 'timestamp': '2026-10-01T11:00:00'}])
+    assert counters(data) == (7, 10, 3)
+    assert len(entries) == 1
+
+
+def test_idempotency_keys_skip_repeated_events():
+    data = {'pendingTickets': 0, 'totalTickets': 0, 'resolvedTickets': 0}
+    applied_keys = {}
+    event = {'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1}, 'idempotency_key': 'k1'}
+    apply_events(data, [event, dict(event)], applied_keys)
+    apply_events(data, [dict(event)], applied_keys)
+    assert counters(data) == (1, 1, 0)
+    assert list(applied_keys) == ['k1']
+    assert 'idempotencyKeys' not in data
+
+
+def test_prune_keys_bounds_by_age_and_count(monkeypatch):
+    monkeypatch.setattr('storage.IDEMPOTENCY_KEYS_LIMIT', 2)
+    now = 1_000_000.0
+    applied_keys = {'old': now - IDEMPOTENCY_KEYS_TTL - 1, 'a': now - 3, 'b': now - 2, 'c': now - 1}
+    assert prune_keys(applied_keys, now) == {'b': now - 2, 'c': now - 1}
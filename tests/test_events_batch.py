@@ -0,0 +1,44 @@
+import pytest
+
+from storage import COUNTER_KEYS
+
+
+@pytest.mark.parametrize('body', [[], [{'action': 'new_ticket'}], 5, 'x', None, {'events': 'x'}, {}])
+def test_invalid_body_is_rejected(client, auth_headers, body):
+    response = client.post('/api/events/batch', json=body, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_invalid_action_is_rejected(client, auth_headers):
+    response = client.post('/api/events/batch', json={'events': [{'action': 'nope'}]}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_requires_session(client):
+    assert client.post('/api/events/batch', json={'events': []}).status_code == 401
+
+
+def test_reset_applies_after_server_update(app_module, client, auth_headers):
+    user_id = client.get('/api/auth/me', headers=auth_headers).get_json()['user']['id']
+    now = app_module.datetime.now()
+    month = now.strftime('%Y-%m')
+    # Hora del cliente atrasada respecto del servidor, pero dentro del mes actual
+    start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    ts = [start.replace(second=1).isoformat(), start.replace(second=2).isoformat()]
+    # Escritura del servidor más reciente que el reloj del cliente (como tras sincronizar Jira)
+    app_module.storage.update_counters(user_id, month, {'pendingTickets': 7, 'totalTickets': 10,
+                                                       'resolvedTickets': 3})
+    batch = {'events': [
+        {'action': 'reset', 'ts': ts[0], 'key': 'r1'},
+        {'action': 'new_ticket', 'ts': ts[1], 'key': 'n1'},
+    ]}
+    response = client.post('/api/events/batch', headers=auth_headers, json=batch)
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['state'] == {'pendingTickets': 1, 'totalTickets': 1, 'resolvedTickets': 0}
+
+    # Reintento del mismo lote: las claves ya aplicadas se ignoran
+    retry = client.post('/api/events/batch', headers=auth_headers, json=batch).get_json()
+    assert retry['state'] == body['state']
+    assert set(body['state']) == set(COUNTER_KEYS)
@@ -0,0 +1,29 @@
+import threading
+
+
+def test_login_sets_http_only_cookie(client):
+    response = client.post('/api/auth/login', json={'email': 'cookie@example.com'})
+    cookie = response.headers['Set-Cookie']
+    assert cookie.startswith('auth_token=')
+    assert 'HttpOnly' in cookie and 'SameSite=Strict' in cookie
+
+
+def test_token_in_query_string_is_not_accepted(app_module):
+    client = app_module.app.test_client()
+    token = client.post('/api/auth/login', json={'email': 'query@example.com'}).get_json()['token']
+    client.delete_cookie('auth_token')
+    assert client.get(f'/api/events?token={token}').status_code == 401
+
+
+def test_streams_are_capped_per_worker(app_module, client, monkeypatch):
+    client.post('/api/auth/login', json={'email': 'stream@example.com'})
+    monkeypatch.setattr(app_module, 'sse_streams', threading.BoundedSemaphore(1))
+    first = client.get('/api/events', buffered=False)
+    assert first.status_code == 200
+    rejected = client.get('/api/events')
+    assert rejected.status_code == 503
+    assert rejected.headers['Retry-After']
+    first.close()
+    second = client.get('/api/events', buffered=False)
+    assert second.status_code == 200
+    second.close()
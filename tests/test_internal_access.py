@@ -0,0 +1,18 @@
+def test_internal_endpoints_closed_without_admin_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', '')
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/api/internal/stats', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_forced_profile_requires_admin_token(app_module, monkeypatch):
+    # X-Profile sólo fuerza un perfil si internal_access_allowed() lo permite
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', '')
+    with app_module.app.test_request_context(headers={'X-Profile': '1', 'X-Admin-Token': ''}):
+        assert not app_module.internal_access_allowed()
+
+
+def test_internal_endpoints_accept_admin_token(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, 'ADMIN_TOKEN', 'secret')
+    assert client.get('/api/internal/stats', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    assert client.get('/api/internal/stats', headers={'X-Admin-Token': 'secret'}).status_code == 200
+    assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
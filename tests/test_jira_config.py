@@ -0,0 +1,34 @@
+import pytest
+
+from data_version import DataVersions, InvalidUserId
+
+
+def test_invalid_jira_config_is_rejected(client):
+    for body in ([1, 2], {'url': None}, {'email': 'a@example.com'}, {'url': 'https://x', 'email': None}):
+        response = client.post('/api/jira/config', json=body, headers={'X-User-ID': 'cfg-user'})
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+
+
+def test_user_id_outside_the_allowed_pattern_is_rejected(app_module, client, tmp_path):
+    victim = tmp_path / 'victim.txt'
+    victim.write_text('x' * 100)
+    for user_id in (f'../../{victim}', '../versions/x', 'a.b'):
+        for method, path in (('post', '/api/jira/sync'), ('post', '/api/jira/config'), ('get', '/api/jira/config')):
+            response = getattr(client, method)(path, json={'url': 'https://jira.example.com'},
+                                               headers={'X-User-ID': user_id})
+            assert response.status_code == 400
+    assert victim.read_text() == 'x' * 100
+    assert not app_module.jira_configs.path_for(None).exists()
+
+
+def test_script_generated_user_id_is_accepted(client):
+    response = client.get('/api/jira/config', headers={'X-User-ID': 'user_1718000000000_k3j9x2abc'})
+    assert response.status_code == 200
+
+
+def test_data_versions_reject_ids_that_are_not_file_names(tmp_path):
+    versions = DataVersions(tmp_path / 'versions')
+    with pytest.raises(InvalidUserId):
+        versions.bump('../outside')
+    assert not (tmp_path / 'outside').exists()
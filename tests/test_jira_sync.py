@@ -0,0 +1,53 @@
+from jira_config import JiraConfig
+from jira_sync import JiraSyncCache, JiraSyncScheduler
+
+CONFIG = JiraConfig.from_dict({'url': 'https://jira.example.com', 'email': 'a@example.com', 'api_token': 't'})
+
+
+def counters(pending, last_sync):
+    return {'pendingTickets': pending, 'resolvedTickets': 0, 'totalTickets': pending, 'lastSync': last_sync}
+
+
+def test_store_result_notifies_only_when_result_changes(tmp_path):
+    updates = []
+    scheduler = JiraSyncScheduler(JiraSyncCache(tmp_path), None, None, on_update=updates.append)
+
+    scheduler.store_result('u1', CONFIG, counters(3, '2024-01-01T10:00:00'), None)
+    scheduler.store_result('u1', CONFIG, counters(3, '2024-01-01T10:05:00'), None)
+    assert updates == ['u1']
+    scheduler.store_result('u1', CONFIG, counters(4, '2024-01-01T10:10:00'), None)
+    scheduler.store_result('u1', CONFIG, None, 'Timeout')
+    scheduler.store_result('u1', CONFIG, None, 'Timeout')
+    assert updates == ['u1', 'u1', 'u1']
+
+
+def test_global_config_save_changes_etag_of_users_without_own_config(app_module, client, auth_headers):
+    global_file = app_module.jira_configs.path_for(None)
+    first = client.get('/api/data', headers=auth_headers)
+    client.post('/api/jira/config', json={'url': 'https://jira.example.com', 'email': 'a@example.com'})
+    second = client.get('/api/data', headers={**auth_headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    client.post('/api/jira/config', json={'url': 'https://jira2.example.com', 'email': 'a@example.com'})
+    third = client.get('/api/data', headers={**auth_headers, 'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 200
+    assert third.headers['ETag'] != second.headers['ETag']
+    global_file.unlink()
+    app_module.jira_configs.invalidate(None)
+
+
+def test_refresh_with_same_counters_changes_data_etag(app_module, client, auth_headers, monkeypatch):
+    headers = {**auth_headers, 'X-User-ID': 'etag-user'}
+    client.post('/api/jira/config', headers=headers,
+                json={'url': 'https://jira.example.com', 'email': 'a@example.com', 'api_token': 't'})
+    config = app_module.load_jira_config('etag-user')
+    monkeypatch.setattr(app_module.jira_scheduler, 'ensure_started', lambda: None)
+
+    app_module.jira_scheduler.store_result('etag-user', config, counters(2, '2024-01-01T10:00:00'), None)
+    first = client.get('/api/data', headers=headers)
+    assert first.headers['ETag'].startswith('W/')
+    app_module.jira_scheduler.store_result('etag-user', config, counters(2, '2024-01-01T10:05:00'), None)
+    second = client.get('/api/data', headers={**headers, 'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 200
+    assert second.get_json()['jiraSync']['lastSync'] == '2024-01-01T10:05:00'
+    third = client.get('/api/data', headers={**headers, 'If-None-Match': second.headers['ETag']})
+    assert third.status_code == 304
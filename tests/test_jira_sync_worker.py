@@ -0,0 +1,13 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_worker_does_not_initialize_web_app(tmp_path):
+    code = ('import sys; sys.path.insert(0, sys.argv[1]); import jira_sync_worker; '
+            'print("app" in sys.modules, "flask" in sys.modules)')
+    output = subprocess.run([sys.executable, '-c', code, str(ROOT)], cwd=tmp_path,
+                            capture_output=True, text=True, check=True).stdout
+    assert output.split() == ['False', 'False']
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+
+from storage import MONTH_FORMAT_VERSION, JsonStorage
+
+MONTH = '2024-03'
+HISTORY = [
+    {'timestamp': f'{MONTH}-0{i + 1}T10:00:00', 'action': action,
+     'pendingTickets': i, 'totalTickets': i, 'resolvedTickets': 0}
+    for i, action in enumerate(['new_ticket', 'custom_action', 'reset', 'new_ticket', 'manual_update'])
+]
+HISTORY[1]['data'] = {'note': 'extra fields survive'}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / 'users' / 'u1').mkdir(parents=True)
+    return JsonStorage(tmp_path, tmp_path / 'users')
+
+
+def write_legacy(storage, history_in_log):
+    """Mes en el formato original: JSON con sangría e historial embebido o en un log de objetos"""
+    data = {'pendingTickets': 4, 'totalTickets': 4, 'resolvedTickets': 0, 'month': MONTH}
+    if history_in_log:
+        storage.history_path('u1', MONTH).write_text(''.join(json.dumps(entry) + '\n' for entry in HISTORY))
+    else:
+        data['history'] = HISTORY
+    storage.month_path('u1', MONTH).write_text(json.dumps(data, indent=2))
+
+
+@pytest.mark.parametrize('history_in_log', [False, True])
+def test_legacy_month_is_converted_on_first_read(storage, history_in_log):
+    write_legacy(storage, history_in_log)
+
+    data = storage.load_month('u1', MONTH)
+    assert data['history'] == HISTORY
+    assert data['totalTickets'] == 4 and 'formatVersion' not in data
+
+    snapshot = json.loads(storage.month_path('u1', MONTH).read_text())
+    assert snapshot['formatVersion'] == MONTH_FORMAT_VERSION and 'history' not in snapshot
+    header = json.loads(storage.history_path('u1', MONTH).read_text().splitlines()[0])
+    assert header['formatVersion'] == MONTH_FORMAT_VERSION
+    assert storage.verify_month('u1', MONTH) == {
+        'legacy': False, 'events': len(HISTORY), 'invalid_counters': [], 'invalid_lines': 0
+    }
+
+
+@pytest.mark.parametrize('history_in_log', [False, True])
+def test_converted_month_round_trips(storage, history_in_log):
+    write_legacy(storage, history_in_log)
+    assert storage.verify_month('u1', MONTH)['legacy'] is True
+
+    assert storage.upgrade_month('u1', MONTH) is True
+    assert storage.upgrade_month('u1', MONTH) is False
+    assert list(storage.iter_history('u1', MONTH)) == HISTORY
+    assert storage.load_month('u1', MONTH, history_limit=2)['history'] == HISTORY[-2:]
+
+    storage.record_events('u1', MONTH, [{'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1},
+                                         'timestamp': f'{MONTH}-09T10:00:00'}])
+    history = list(storage.iter_history('u1', MONTH))
+    assert history[:-1] == HISTORY
+    assert history[-1]['totalTickets'] == 5
+    assert storage.month_summaries('u1')[0]['events'] == len(HISTORY) + 1
+
+
+def test_record_events_on_legacy_month_keeps_old_history(storage):
+    write_legacy(storage, history_in_log=False)
+
+    storage.record_events('u1', MONTH, [{'action': 'ticket_resolved',
+                                         'delta': {'pendingTickets': -1, 'resolvedTickets': 1},
+                                         'timestamp': f'{MONTH}-09T10:00:00'}])
+    history = storage.load_month('u1', MONTH)['history']
+    assert history[:-1] == HISTORY
+    assert history[-1]['resolvedTickets'] == 1
+
+
+def test_idempotency_keys_move_out_of_old_snapshots(storage):
+    data = {'pendingTickets': 1, 'totalTickets': 1, 'resolvedTickets': 0, 'idempotencyKeys': ['k1'],
+            'formatVersion': MONTH_FORMAT_VERSION}
+    storage.month_path('u1', MONTH).write_text(json.dumps(data))
+
+    event = {'action': 'new_ticket', 'delta': {'pendingTickets': 1, 'totalTickets': 1}, 'idempotency_key': 'k1'}
+    assert storage.record_events('u1', MONTH, [event])['totalTickets'] == 1
+    assert 'idempotencyKeys' not in json.loads(storage.month_path('u1', MONTH).read_text())
+    assert 'k1' in json.loads(storage.keys_path('u1', MONTH).read_text())
@@ -0,0 +1,24 @@
+import json
+
+from migrate_data import migrate_user
+from storage import MONTH_FORMAT_VERSION, JsonStorage
+
+
+def test_migrate_user_upgrades_months_and_rebuilds_summary(tmp_path):
+    user_dir = tmp_path / 'users' / 'u1'
+    user_dir.mkdir(parents=True)
+    history = [{'timestamp': '2024-02-01T10:00:00', 'action': 'new_ticket',
+                'pendingTickets': 1, 'totalTickets': 1, 'resolvedTickets': 0}]
+    (user_dir / 'tickets-2024-02.json').write_text(json.dumps(
+        {'pendingTickets': 1, 'totalTickets': 1, 'resolvedTickets': 0, 'month': '2024-02', 'history': history},
+        indent=2))
+
+    check = migrate_user(tmp_path, 'u1', check=True)
+    assert (check['legacy'], check['upgraded'], check['events']) == (1, 0, 1)
+    assert not (user_dir / 'summary.json').exists()
+
+    result = migrate_user(tmp_path, 'u1')
+    assert (result['upgraded'], result['errors']) == (1, [])
+    assert json.loads((user_dir / 'tickets-2024-02.json').read_text())['formatVersion'] == MONTH_FORMAT_VERSION
+    summary = JsonStorage(tmp_path, tmp_path / 'users').month_summaries('u1')
+    assert [(row['month'], row['events']) for row in summary] == [('2024-02', 1)]
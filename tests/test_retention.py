@@ -0,0 +1,75 @@
+import pytest
+
+from retention import HistoryRetention
+from storage import JsonStorage, SqliteStorage
+from timeseries import aggregate_month
+
+MONTH = '2024-01'
+
+
+@pytest.fixture(params=['json', 'sqlite'])
+def storage(request, tmp_path):
+    if request.param == 'sqlite':
+        return SqliteStorage(tmp_path / 'tickets.db')
+    (tmp_path / 'users').mkdir()
+    return JsonStorage(tmp_path, tmp_path / 'users')
+
+
+def record(storage, action, delta, timestamp, key=None):
+    storage.record_events('u1', MONTH, [
+        {'action': action, 'delta': delta, 'timestamp': timestamp, 'idempotency_key': key}
+    ])
+
+
+def fill_month(storage):
+    for minute in range(6):
+        record(storage, 'new_ticket', {'pendingTickets': 1, 'totalTickets': 1},
+               f'{MONTH}-05T10:{minute:02d}:00', key=f'k{minute}')
+    record(storage, 'ticket_resolved', {'pendingTickets': -1, 'resolvedTickets': 1}, f'{MONTH}-05T11:00:00')
+    record(storage, 'new_ticket', {'pendingTickets': 1, 'totalTickets': 1}, f'{MONTH}-06T09:00:00')
+
+
+def test_compact_month_rolls_up_history(storage, tmp_path):
+    fill_month(storage)
+    before = aggregate_month(storage.iter_history('u1', MONTH))
+    retention = HistoryRetention(storage, tmp_path / 'retention')
+
+    assert retention.compact_month('u1', MONTH, 'hour') == 5
+    data = storage.load_month('u1', MONTH)
+    assert [entry['action'] for entry in data['history']] == ['rollup'] * 3
+    assert data['totalTickets'] == 7 and data['pendingTickets'] == 6
+    assert aggregate_month(storage.iter_history('u1', MONTH)) == before
+    # Ya resumido: no se vuelve a reescribir
+    assert retention.compact_month('u1', MONTH, 'hour') == 0
+
+
+def test_compact_month_keeps_event_count_and_idempotency_keys(storage, tmp_path):
+    fill_month(storage)
+    HistoryRetention(storage, tmp_path / 'retention').compact_month('u1', MONTH, 'day')
+
+    assert storage.month_summaries('u1')[0]['events'] == 8
+    # Una clave ya aplicada antes de resumir sigue sin aplicarse dos veces
+    record(storage, 'new_ticket', {'pendingTickets': 1, 'totalTickets': 1}, f'{MONTH}-05T10:00:00', key='k0')
+    assert storage.load_month('u1', MONTH)['totalTickets'] == 7
+    record(storage, 'new_ticket', {'pendingTickets': 1, 'totalTickets': 1}, f'{MONTH}-07T10:00:00')
+    assert storage.month_summaries('u1')[0]['events'] == 9
+
+
+def test_summary_rebuild_counts_rolled_up_events(tmp_path):
+    (tmp_path / 'users').mkdir()
+    storage = JsonStorage(tmp_path, tmp_path / 'users')
+    fill_month(storage)
+    HistoryRetention(storage, tmp_path / 'retention').compact_month('u1', MONTH, 'day')
+    storage.summary_path('u1').unlink()
+    assert storage.month_summaries('u1')[0]['events'] == 8
+
+
+def test_idempotency_keys_are_kept_outside_the_counters(storage):
+    fill_month(storage)
+    if isinstance(storage, JsonStorage):
+        snapshot = storage.month_path('u1', MONTH).read_text()
+        assert 'k0' not in snapshot and 'idempotencyKeys' not in snapshot
+        assert 'k0' in storage.keys_path('u1', MONTH).read_text()
+    else:
+        row = storage._conn().execute('SELECT extra FROM counters').fetchone()
+        assert row['extra'] is None or 'idempotencyKeys' not in row['extra']
@@ -0,0 +1,65 @@
+import pytest
+
+import timeseries
+from retention import rollup_history
+from timeseries import aggregate_month, history_columns
+
+ENGINES = ['python'] + (['numpy'] if timeseries.np is not None else [])
+
+
+def entry(timestamp, action, pending, total, resolved):
+    return {'timestamp': timestamp, 'action': action, 'pendingTickets': pending, 'totalTickets': total,
+            'resolvedTickets': resolved}
+
+
+HISTORY = [
+    entry('2026-09-01T09:00:00', 'new_ticket', 1, 1, 0),
+    entry('2026-09-01T09:30:00', 'new_ticket', 2, 2, 0),
+    entry('2026-09-01T10:00:00', 'ticket_resolved', 1, 2, 1),
+    entry('2026-09-01T11:00:00', 'reset', 0, 0, 0),
+    entry('2026-09-01T11:30:00', 'new_ticket', 1, 1, 0),
+    {'timestamp': '2026-09-02T08:00:00', 'action': 'note'},
+    entry('2026-09-02T09:00:00', 'ticket_resolved', 0, 1, 1),
+]
+
+
+def aggregate(entries, engine, granularity):
+    timestamps, created, resolved, pending = history_columns(entries)
+    length = timeseries.GRANULARITIES[granularity]
+    function = timeseries._aggregate_numpy if engine == 'numpy' else timeseries._aggregate_python
+    return function([ts[:length] for ts in timestamps], created, resolved, pending)
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_reset_starts_a_new_baseline(engine):
+    days = aggregate(HISTORY, engine, 'day')
+    assert days == {'2026-09-01': (3, 1, 1), '2026-09-02': (0, 1, 0)}
+    hours = aggregate(HISTORY, engine, 'hour')
+    assert hours['2026-09-01T11'] == (1, 0, 1)
+    assert all(created >= 0 and resolved >= 0 for created, resolved, _ in hours.values())
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_lowered_counters_do_not_count_negative(engine):
+    history = [entry('2026-09-01T09:00:00', 'manual_update', 5, 10, 5),
+               entry('2026-09-01T10:00:00', 'manual_update', 1, 4, 3),
+               entry('2026-09-01T11:00:00', 'ticket_resolved', 0, 4, 4)]
+    assert aggregate(history, engine, 'day') == {'2026-09-01': (10, 6, 0)}
+
+
+def test_entries_without_counters_are_skipped():
+    timestamps, created, resolved, pending = history_columns([{'timestamp': '2026-09-01T09:00:00',
+                                                              'action': 'note'}])
+    assert timestamps == [] and aggregate_month([{'timestamp': 'x'}]) == {'day': {}, 'hour': {}}
+
+
+@pytest.mark.parametrize('granularity', ['hour', 'day'])
+def test_rollup_keeps_the_series(granularity):
+    rolled = rollup_history(HISTORY, granularity)
+    assert aggregate_month(rolled)['day'] == aggregate_month(HISTORY)['day']
+    if granularity == 'hour':
+        assert aggregate_month(rolled)['hour'] == aggregate_month(HISTORY)['hour']
+    # Un segundo resumen (hora -> día) tampoco cambia los totales
+    assert aggregate_month(rollup_history(rolled, 'day'))['day'] == aggregate_month(HISTORY)['day']
+    assert sum(row['events'] for row in rolled) == len(HISTORY)
+    assert sum(row['resets'] for row in rolled) == 1
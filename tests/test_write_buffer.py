@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from storage import JsonStorage
+from write_buffer import WriteBuffer
+
+MONTH = '2024-05'
+
+
+@pytest.fixture
+def storage(tmp_path):
+    (tmp_path / 'users').mkdir()
+    return JsonStorage(tmp_path, tmp_path / 'users')
+
+
+def total(data):
+    return data['totalTickets'], len(data['history'])
+
+
+def test_read_during_flush_sees_events_exactly_once(storage):
+    buffer = WriteBuffer(storage, interval=60)
+    written, resume = threading.Event(), threading.Event()
+    record_events = storage.record_events
+
+    def slow_record_events(*args):
+        result = record_events(*args)
+        written.set()
+        resume.wait(5)
+        return result
+
+    storage.record_events = slow_record_events
+    buffer.record_event('u1', MONTH, {'totalTickets': 1, 'pendingTickets': 1}, 'new_ticket')
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    assert written.wait(5)
+
+    result = []
+    reader = threading.Thread(target=lambda: result.append(
+        buffer.read('u1', MONTH, lambda: storage.load_month('u1', MONTH))))
+    reader.start()
+    reader.join(0.2)
+    # Escrito pero aún en el buffer: la lectura espera al final del volcado
+    assert reader.is_alive()
+    resume.set()
+    flusher.join(5)
+    reader.join(5)
+    assert total(result[0]) == (1, 1)
+    assert buffer.stats()['pending_events'] == 0
+
+
+def test_failed_flush_keeps_events_pending(storage):
+    buffer = WriteBuffer(storage, interval=60)
+    record_events = storage.record_events
+    buffer.record_event('u1', MONTH, {'totalTickets': 1, 'pendingTickets': 1}, 'new_ticket')
+
+    def failing(*args):
+        raise OSError('disk full')
+
+    storage.record_events = failing
+    assert buffer.flush_key('u1', MONTH) is False
+    assert total(buffer.read('u1', MONTH, lambda: storage.load_month('u1', MONTH))) == (1, 1)
+
+    storage.record_events = record_events
+    buffer.record_event('u1', MONTH, {'totalTickets': 2, 'pendingTickets': 2}, 'new_ticket')
+    assert buffer.flush() is True
+    assert total(storage.load_month('u1', MONTH)) == (2, 2)
+    assert buffer.stats()['pending_events'] == 0
@@ -0,0 +1,163 @@
+"""
+Buffer de escritura (write-behind) para los guardados del contador
+- Agrupa los eventos de un mismo usuario+mes en memoria
+- Los vuelca en una sola escritura cada `interval` segundos o al apagar
+- Conserva cada entrada de historial con su timestamp original
+- Los eventos siguen pendientes hasta que están escritos; la lectura (read) y el volcado de
+  una misma clave (escritura, quitarlos del buffer y on_write) se excluyen con un lock por clave
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from storage import apply_events
+
+logger = logging.getLogger(__name__)
+
+# Locks por clave (usuario, mes), repartidos en un número fijo
+KEY_LOCKS = 64
+
+
+class WriteBuffer:
+    """Coalescencia de escrituras por (usuario, mes) sobre un motor de almacenamiento"""
+
+    def __init__(self, storage, interval=0.25, on_write=None):
+        self.storage = storage
+        self.interval = interval
+        # on_write(user_id, month) tras cada escritura en el almacenamiento
+        self.on_write = on_write
+        self._lock = threading.Lock()
+        # Serializa los volcados para no reordenar eventos de una misma clave
+        self._flush_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(KEY_LOCKS)]
+        self._pending = {}
+        self._flusher_pid = None
+        self._metrics = {
+            'events': 0,
+            'writes': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'flush_seconds': 0.0,
+        }
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def _ensure_flusher(self):
+        """Arranca el hilo de volcado en este proceso (tras el fork de gunicorn)"""
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name='write-buffer', daemon=True).start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def record_event(self, user_id, month, counters, action, extra=None):
+        """Encola un evento (o lo escribe directamente si el buffer está desactivado)"""
+        event = {
+            'counters': counters,
+            'action': action,
+            'timestamp': datetime.now().isoformat(),
+            'extra': extra
+        }
+        if not self.enabled:
+            self._metrics['events'] += 1
+            self._metrics['writes'] += 1
+            self.storage.record_events(user_id, month, [event])
+            if self.on_write:
+                self.on_write(user_id, month)
+            return
+        self._ensure_flusher()
+        with self._lock:
+            self._pending.setdefault((user_id, month), []).append(event)
+            self._metrics['events'] += 1
+
+    def _key_lock(self, key):
+        return self._key_locks[hash(key) % KEY_LOCKS]
+
+    def read(self, user_id, month, load):
+        """Documento de load() con los eventos pendientes aplicados.
+
+        Con el lock de la clave: un volcado no puede quedar entre las dos lecturas (ni ver
+        sus eventos dos veces ni ninguna).
+        """
+        with self._key_lock((user_id, month)):
+            return self.pending_view(user_id, month, load())
+
+    def pending_view(self, user_id, month, data):
+        """Aplica a un documento leído los eventos aún no volcados (read-your-writes)"""
+        with self._lock:
+            events = list(self._pending.get((user_id, month), ()))
+        if not events:
+            return data
+        entries = apply_events(data, events)
+        if 'history' in data:
+            data['history'].extend(entries)
+        return data
+
+    def _write(self, key, events):
+        """Escribe los primeros eventos pendientes de la clave y después los quita del buffer"""
+        user_id, month = key
+        start = time.perf_counter()
+        try:
+            with self._key_lock(key):
+                try:
+                    self.storage.record_events(user_id, month, events)
+                except Exception as e:
+                    # Siguen pendientes: se reintentan en el próximo volcado
+                    self._metrics['flush_errors'] += 1
+                    logger.error(f"Error volcando {len(events)} eventos de {user_id}/{month}: {e}")
+                    return False
+                self._metrics['writes'] += 1
+                with self._lock:
+                    # Sólo se añaden eventos al final mientras tanto (_flush_lock serializa los volcados)
+                    remaining = self._pending.get(key, [])[len(events):]
+                    if remaining:
+                        self._pending[key] = remaining
+                    else:
+                        self._pending.pop(key, None)
+                if self.on_write:
+                    self.on_write(user_id, month)
+            return True
+        finally:
+            self._metrics['flush_seconds'] += time.perf_counter() - start
+
+    def flush_key(self, user_id, month):
+        """Vuelca los eventos pendientes de un usuario+mes"""
+        with self._flush_lock:
+            with self._lock:
+                events = list(self._pending.get((user_id, month), ()))
+            if events:
+                return self._write((user_id, month), events)
+        return True
+
+    def flush(self):
+        """Vuelca todos los eventos pendientes"""
+        with self._flush_lock:
+            with self._lock:
+                pending = {key: list(events) for key, events in self._pending.items()}
+            if not pending:
+                return True
+            self._metrics['flushes'] += 1
+            ok = True
+            for key, events in pending.items():
+                ok = self._write(key, events) and ok
+        return ok
+
+    def stats(self):
+        """Métricas de coalescencia de este worker"""
+        with self._lock:
+            m = dict(self._metrics)
+            m['pending_events'] = sum(len(events) for events in self._pending.values())
+            m['pending_keys'] = len(self._pending)
+        m['coalesced_writes'] = max(0, m['events'] - m['writes'] - m['pending_events'])
+        m['interval_seconds'] = self.interval
+        m['pid'] = os.getpid()
+        return m